@@ -0,0 +1,89 @@
+import csv
+import hashlib
+import os
+import sys
+
+# Change sets between two versions of icelandic_addresses.csv, so consumers can patch what they
+# built from the previous file instead of reloading it. Rows are keyed by (POSTNR, HEITI_NF); the
+# previous file is held as one small digest per key, and only removed rows are read back in full.
+CHANGES_FILENAME = 'icelandic_addresses_changes.csv'
+CHANGE_COLUMNS = ['op', 'POSTNR', 'HEITI_NF', 'HEITI_TGF']
+
+
+# Function to get a fixed-size digest of an address row
+def row_digest(row):
+    return hashlib.blake2b('\x1f'.join(row).encode('utf-8'), digest_size=16).digest()
+
+
+# Function to read the rows of an address CSV as tuples (header skipped)
+def read_address_rows(filename):
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for row in reader:
+            yield tuple(row)
+
+
+# Function to compute the change set from the old to the new address file as (op, POSTNR, HEITI_NF, HEITI_TGF)
+# tuples: added and modified rows carry the new values, removed rows the old ones
+def address_changes(old_filename, new_filename):
+    old_digests = {}
+    if os.path.exists(old_filename):
+        old_digests = {row[:2]: row_digest(row) for row in read_address_rows(old_filename)}
+    changes = []
+    for row in read_address_rows(new_filename):
+        old_digest = old_digests.pop(row[:2], None)
+        if old_digest is None:
+            changes.append(('added',) + row)
+        elif old_digest != row_digest(row):
+            changes.append(('modified',) + row)
+    if old_digests:
+        changes.extend(('removed',) + row for row in read_address_rows(old_filename) if row[:2] in old_digests)
+    return changes
+
+
+# Function to apply a change set to address rows, keeping the file's order (POSTNR, blank last, then HEITI_NF)
+def apply_changes(rows, changes):
+    patched = {row[:2]: row for row in rows}
+    for op, *row in changes:
+        if op == 'removed':
+            patched.pop(tuple(row[:2]), None)
+        else:
+            patched[tuple(row[:2])] = tuple(row)
+    return sorted(patched.values(), key=lambda row: (row[0] == '', int(row[0]) if row[0] else 0, row[1] == '', row[1]))
+
+
+# Function to write a change set file
+def write_changes(changes, filename=CHANGES_FILENAME):
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, lineterminator='\n')
+        writer.writerow(CHANGE_COLUMNS)
+        writer.writerows(changes)
+
+
+# Function to move a freshly written file into place only when its content differs from the current file.
+# Returns True when the file was replaced; an unchanged file keeps its bytes and modification time.
+def replace_if_changed(temp_filename, filename):
+    if os.path.exists(filename) and os.path.getsize(filename) == os.path.getsize(temp_filename):
+        with open(temp_filename, 'rb') as new_file, open(filename, 'rb') as old_file:
+            while True:
+                new_block, old_block = new_file.read(1 << 20), old_file.read(1 << 20)
+                if new_block != old_block:
+                    break
+                if not new_block:
+                    os.remove(temp_filename)
+                    return False
+    os.replace(temp_filename, filename)
+    return True
+
+
+if __name__ == '__main__':
+    # python address_changes.py old_icelandic_addresses.csv icelandic_addresses.csv [changes.csv]
+    if len(sys.argv) >= 3:
+        changes = address_changes(sys.argv[1], sys.argv[2])
+        if len(sys.argv) >= 4:
+            write_changes(changes, sys.argv[3])
+        counts = {op: sum(1 for change in changes if change[0] == op) for op in ('added', 'removed', 'modified')}
+        print(f"{counts['added']} added, {counts['removed']} removed, {counts['modified']} modified")
+    else:
+        print("Usage: python address_changes.py <old.csv> <new.csv> [changes.csv]")
@@ -0,0 +1,227 @@
+import mmap
+import os
+import struct
+import sys
+
+from address_lookup import AddressIndex, fold, postcode_key, ADDRESSES_FILENAME, DEFAULT_LIMIT
+
+# Binary form of the address prefix index, written next to icelandic_addresses.csv and read through
+# mmap, so a process can answer lookups without parsing the CSV or building Python objects for it.
+#
+# Layout (little-endian):
+#   header     magic, accent flag, counts and the offset of every section
+#   addresses  one fixed-size record per address: POSTNR, then offset/length of HEITI_NF and HEITI_TGF
+#   keys       (key offset, key length, address row) sorted by folded key: the global prefix index
+#   postcode keys  the same records sorted by POSTNR, then folded key
+#   directory  (POSTNR, first postcode key, count) sorted by POSTNR
+#   strings    UTF-8 bytes of every name and folded key, each stored once
+# UTF-8 byte order is code point order, so the key records are searched by comparing raw bytes.
+# The index file is derived from icelandic_addresses.csv and is not committed (11 MB, rewritten whenever
+# the addresses change): open_index_file() builds it where it is used when it is missing or out of date.
+INDEX_FILENAME = 'icelandic_addresses.idx'
+MAGIC = b'ADRIDX01'
+HEADER = struct.Struct('<8sB3xIII5Q')
+ADDRESS = struct.Struct('<HIHIH')
+KEY = struct.Struct('<IHI')
+DIRECTORY = struct.Struct('<HII')
+# POSTNR stored for addresses without a postcode
+NO_POSTNR = 0xFFFF
+
+
+# Function to convert a POSTNR from the CSV to its stored number
+def postnr_number(postnr):
+    return int(postnr) if postnr else NO_POSTNR
+
+
+# Function to write an AddressIndex to the binary index file (atomically)
+def write_index_file(index, filename=INDEX_FILENAME):
+    strings = bytearray()
+    string_offsets = {}
+
+    def add_string(text):
+        if text not in string_offsets:
+            string_offsets[text] = len(strings)
+            strings.extend(text.encode('utf-8'))
+        return string_offsets[text], len(text.encode('utf-8'))
+
+    address_records = bytearray()
+    for postnr, heiti_nf, heiti_tgf in index.addresses:
+        address_records += ADDRESS.pack(postnr_number(postnr), *add_string(heiti_nf), *add_string(heiti_tgf))
+
+    key_records = bytearray()
+    for key, row in zip(index.keys, index.rows):
+        key_records += KEY.pack(*add_string(key), row)
+
+    postcode_records = bytearray()
+    directory_records = bytearray()
+    postcode_count = 0
+    for postnr in sorted(index.postcodes, key=postnr_number):
+        keys, rows = index.postcodes[postnr]
+        directory_records += DIRECTORY.pack(postnr_number(postnr), postcode_count, len(keys))
+        for key, row in zip(keys, rows):
+            postcode_records += KEY.pack(*add_string(key), row)
+        postcode_count += len(keys)
+
+    addresses_offset = HEADER.size
+    keys_offset = addresses_offset + len(address_records)
+    postcode_keys_offset = keys_offset + len(key_records)
+    directory_offset = postcode_keys_offset + len(postcode_records)
+    strings_offset = directory_offset + len(directory_records)
+    header = HEADER.pack(MAGIC, int(index.accents), len(index.addresses), len(index.keys), len(index.postcodes),
+                         addresses_offset, keys_offset, postcode_keys_offset, directory_offset, strings_offset)
+
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as f:
+        for section in (header, address_records, key_records, postcode_records, directory_records, strings):
+            f.write(section)
+    os.replace(temp_filename, filename)
+
+
+class AddressIndexReader:
+    def __init__(self, filename=INDEX_FILENAME):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, accents, self.address_count, self.key_count, self.postcode_count, self.addresses_offset,
+         self.keys_offset, self.postcode_keys_offset, self.directory_offset, self.strings_offset) = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            self.data.close()
+            raise ValueError(f"{filename} is not an address index file")
+        self.accents = bool(accents)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.address_count
+
+    def _string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length]
+
+    # Function to read one address record as (POSTNR, HEITI_NF, HEITI_TGF), the CSV's string values
+    def address(self, row):
+        postnr, nf_offset, nf_length, tgf_offset, tgf_length = ADDRESS.unpack_from(self.data, self.addresses_offset + row * ADDRESS.size)
+        return ('' if postnr == NO_POSTNR else str(postnr),
+                self._string(nf_offset, nf_length).decode('utf-8'),
+                self._string(tgf_offset, tgf_length).decode('utf-8'))
+
+    def _key(self, table_offset, position):
+        key_offset, key_length, row = KEY.unpack_from(self.data, table_offset + position * KEY.size)
+        return self._string(key_offset, key_length), row
+
+    # Function to find the range of postcode key records of one POSTNR with a binary search of the directory
+    def _postcode_range(self, postnr):
+        postcode = postcode_key(postnr)
+        number = postnr_number(postcode) if postcode is not None else None
+        # NO_POSTNR only stands for the blank postcode
+        if number is None or (postcode and number >= NO_POSTNR):
+            return 0, 0
+        low, high = 0, self.postcode_count
+        while low < high:
+            middle = (low + high) // 2
+            directory_postnr, start, count = DIRECTORY.unpack_from(self.data, self.directory_offset + middle * DIRECTORY.size)
+            if directory_postnr == number:
+                return start, start + count
+            if directory_postnr < number:
+                low = middle + 1
+            else:
+                high = middle
+        return 0, 0
+
+    # Function to find up to `limit` addresses whose nominative or dative form starts with `prefix`,
+    # with the same results and order as AddressIndex.lookup
+    def lookup(self, prefix, postnr=None, limit=DEFAULT_LIMIT):
+        if postnr is None:
+            table_offset, low, high = self.keys_offset, 0, self.key_count
+        else:
+            table_offset = self.postcode_keys_offset
+            low, high = self._postcode_range(postnr)
+        key = fold(prefix.strip(), self.accents).encode('utf-8')
+        end = high
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(table_offset, middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        seen = set()
+        while low < end and len(found) < limit:
+            entry_key, row = self._key(table_offset, low)
+            if not entry_key.startswith(key):
+                break
+            if row not in seen:
+                seen.add(row)
+                found.append(self.address(row))
+            low += 1
+        return found
+
+
+# Function to tell whether the index file exists and was written after the CSV it is built from
+def index_is_current(filename=INDEX_FILENAME, csv_filename=ADDRESSES_FILENAME):
+    return os.path.exists(filename) and os.stat(filename).st_mtime_ns >= os.stat(csv_filename).st_mtime_ns
+
+
+# Function to build the index file from the CSV. Returns the number of addresses indexed.
+def build_index_file(csv_filename=ADDRESSES_FILENAME, filename=INDEX_FILENAME):
+    index = AddressIndex.from_csv(csv_filename)
+    write_index_file(index, filename)
+    print(f"Built {filename} from {csv_filename} ({len(index.addresses)} addresses, {os.path.getsize(filename)} bytes).")
+    return len(index.addresses)
+
+
+# Function to open the index file, building it from the CSV first when it is missing or out of date
+def open_index_file(filename=INDEX_FILENAME, csv_filename=ADDRESSES_FILENAME):
+    if not index_is_current(filename, csv_filename):
+        build_index_file(csv_filename, filename)
+    return AddressIndexReader(filename)
+
+
+# Function to check an index file against the CSV: every address record, and the lookup of every
+# address name (with and without its postcode) against the in-memory index. Returns the mismatches.
+def verify_index_file(filename=INDEX_FILENAME, csv_filename=ADDRESSES_FILENAME):
+    mismatches = []
+    with AddressIndexReader(filename) as reader:
+        index = AddressIndex.from_csv(csv_filename, reader.accents)
+        if len(reader) != len(index.addresses):
+            return [f"{len(reader)} addresses in {filename}, {len(index.addresses)} in {csv_filename}"]
+        for row, address in enumerate(index.addresses):
+            if reader.address(row) != address:
+                mismatches.append(f"row {row}: {reader.address(row)} != {address}")
+            for name in address[1:]:
+                for postnr in (None, address[0]):
+                    if name and reader.lookup(name, postnr) != index.lookup(name, postnr):
+                        mismatches.append(f"lookup {name!r} in {postnr}")
+    return mismatches
+
+
+if __name__ == '__main__':
+    # python address_index_file.py build [icelandic_addresses.csv] [icelandic_addresses.idx]
+    # python address_index_file.py verify [icelandic_addresses.idx] [icelandic_addresses.csv]
+    # python address_index_file.py query "Amtmannsst" [101]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'build':
+        csv_filename = sys.argv[2] if len(sys.argv) >= 3 else ADDRESSES_FILENAME
+        index_filename = sys.argv[3] if len(sys.argv) >= 4 else INDEX_FILENAME
+        build_index_file(csv_filename, index_filename)
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'verify':
+        index_filename = sys.argv[2] if len(sys.argv) >= 3 else INDEX_FILENAME
+        csv_filename = sys.argv[3] if len(sys.argv) >= 4 else ADDRESSES_FILENAME
+        mismatches = verify_index_file(index_filename, csv_filename)
+        for mismatch in mismatches[:20]:
+            print(mismatch)
+        print(f"{index_filename}: {'OK' if not mismatches else f'{len(mismatches)} mismatches'} against {csv_filename}")
+        sys.exit(1 if mismatches else 0)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'query':
+        with open_index_file() as reader:
+            for postnr, heiti_nf, heiti_tgf in reader.lookup(sys.argv[2], sys.argv[3] if len(sys.argv) >= 4 else None):
+                print(f"{postnr} {heiti_nf} ({heiti_tgf})")
+    else:
+        with open_index_file() as reader:
+            print(f"{reader.filename}: {len(reader)} addresses, {reader.key_count} indexed names, {reader.postcode_count} postcodes")
@@ -0,0 +1,105 @@
+import csv
+import sys
+import unicodedata
+from bisect import bisect_left
+
+# Prefix lookup over icelandic_addresses.csv (POSTNR, HEITI_NF, HEITI_TGF) for address autocomplete.
+# Both the nominative and the dative form of every address are folded and kept in one sorted list,
+# so a prefix query is a binary search followed by a short forward scan. Each postcode also has its
+# own sorted list, so filtering by POSTNR never scans other postcodes.
+ADDRESSES_FILENAME = 'icelandic_addresses.csv'
+DEFAULT_LIMIT = 10
+
+# Letters folded away when accents are ignored, the usual way Icelandic is typed without an Icelandic keyboard
+ICELANDIC_TO_ASCII = str.maketrans({'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ý': 'y', 'ö': 'o', 'æ': 'ae', 'þ': 'th', 'ð': 'd'})
+
+
+# Function to fold a name for matching: Unicode NFC, full case folding (Þ -> þ, Ð -> ð, Æ -> æ ...)
+# and, when accents are ignored, Icelandic letters spelled out in ASCII (Þórsgata -> thorsgata)
+def fold(text, accents=True):
+    text = unicodedata.normalize('NFC', text).casefold()
+    if not accents:
+        text = text.translate(ICELANDIC_TO_ASCII)
+    return text
+
+
+# Function to normalize a POSTNR for matching, as both lookups (here and address_index_file.py) do:
+# " 101", "0101" and 101 are all postcode "101"; blank is the postcode of addresses without one.
+# None when the value is not a postcode.
+def postcode_key(postnr):
+    postnr = str(postnr).strip()
+    if not postnr:
+        return ''
+    if not (postnr.isascii() and postnr.isdigit()):
+        return None
+    return str(int(postnr))
+
+
+# Function to sort (key, row) entries into parallel key and row lists
+def sorted_entries(entries):
+    entries.sort()
+    return [key for key, _ in entries], [row for _, row in entries]
+
+
+class AddressIndex:
+    def __init__(self, addresses, accents=True):
+        self.addresses = addresses  # list of (POSTNR, HEITI_NF, HEITI_TGF) tuples
+        self.accents = accents
+        entries = []
+        postcode_entries = {}
+        for row, (postnr, heiti_nf, heiti_tgf) in enumerate(addresses):
+            postcode = postcode_key(postnr)
+            for key in {fold(name, accents) for name in (heiti_nf, heiti_tgf) if name}:
+                entries.append((key, row))
+                postcode_entries.setdefault(postnr if postcode is None else postcode, []).append((key, row))
+        self.keys, self.rows = sorted_entries(entries)
+        self.postcodes = {postnr: sorted_entries(postcode_list) for postnr, postcode_list in postcode_entries.items()}
+
+    # Function to load the index from icelandic_addresses.csv
+    @classmethod
+    def from_csv(cls, csv_filename=ADDRESSES_FILENAME, accents=True):
+        with open(csv_filename, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            addresses = [(postnr, heiti_nf, heiti_tgf) for postnr, heiti_nf, heiti_tgf in reader]
+        return cls(addresses, accents)
+
+    # Function to find up to `limit` addresses whose nominative or dative form starts with `prefix`,
+    # optionally within one postcode. Results are ordered by the matching name.
+    def lookup(self, prefix, postnr=None, limit=DEFAULT_LIMIT):
+        if postnr is None:
+            keys, rows = self.keys, self.rows
+        else:
+            keys, rows = self.postcodes.get(postcode_key(postnr), ([], []))
+        key = fold(prefix.strip(), self.accents)
+        found = []
+        seen = set()
+        index = bisect_left(keys, key)
+        while index < len(keys) and len(found) < limit and keys[index].startswith(key):
+            row = rows[index]
+            if row not in seen:
+                seen.add(row)
+                found.append(self.addresses[row])
+            index += 1
+        return found
+
+
+if __name__ == '__main__':
+    # python address_lookup.py query "Amtmannsst" [101]
+    # python address_lookup.py serve [8001]    then  GET http://127.0.0.1:8001/lookup?q=amtm&postnr=101
+    # Add --ignore-accents to either command to match without Icelandic letters (thorsg -> Þórsgata)
+    accents = '--ignore-accents' not in sys.argv
+    arguments = [argument for argument in sys.argv[1:] if argument != '--ignore-accents']
+    index = AddressIndex.from_csv(ADDRESSES_FILENAME, accents)
+    if len(arguments) >= 2 and arguments[0] == 'query':
+        postnr = arguments[2] if len(arguments) >= 3 else None
+        for postnr_found, heiti_nf, heiti_tgf in index.lookup(arguments[1], postnr):
+            print(f"{postnr_found} {heiti_nf} ({heiti_tgf})")
+    elif arguments and arguments[0] == 'serve':
+        from address_server import make_lookup_server
+        port = int(arguments[1]) if len(arguments) >= 2 else 8001
+        server = make_lookup_server(index, port)
+        print(f"Serving address lookup for {len(index.addresses)} addresses on http://127.0.0.1:{server.server_address[1]}/lookup?q=")
+        server.serve_forever()
+    else:
+        print(f"{ADDRESSES_FILENAME}: {len(index.addresses)} addresses, {len(index.keys)} indexed names")
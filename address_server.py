@@ -0,0 +1,49 @@
+import json
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from address_lookup import DEFAULT_LIMIT
+
+# Local autocomplete endpoint over an address index (AddressIndex or the memory-mapped AddressIndexReader).
+# Kept apart from address_lookup.py so processes that only look addresses up do not import http.server.
+# Started with: python address_lookup.py serve [port]
+
+
+# Function to turn lookup results into JSON-ready dicts
+def as_records(addresses):
+    return [{'POSTNR': postnr, 'HEITI_NF': heiti_nf, 'HEITI_TGF': heiti_tgf} for postnr, heiti_nf, heiti_tgf in addresses]
+
+
+# Request handler: GET /lookup?q=<prefix>[&postnr=101][&limit=10] returns a JSON list
+class LookupRequestHandler(BaseHTTPRequestHandler):
+    def __init__(self, *args, index=None, **kwargs):
+        self.index = index
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/lookup':
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        try:
+            limit = int(query.get('limit', [DEFAULT_LIMIT])[0])
+        except ValueError:
+            self.send_error(400, "limit must be a number")
+            return
+        postnr = query.get('postnr', [None])[0]
+        body = json.dumps(as_records(self.index.lookup(query.get('q', [''])[0], postnr, limit)), ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Function to create the lookup server (port 0 picks a free port)
+def make_lookup_server(index, port=0, host='127.0.0.1'):
+    return ThreadingHTTPServer((host, port), partial(LookupRequestHandler, index=index))
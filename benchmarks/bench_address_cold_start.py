@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+# Measures cold-start cost of one address lookup in a fresh process: loading icelandic_addresses.csv
+# with pandas, building the in-memory prefix index from the CSV, and opening the memory-mapped index
+# file. Each case reports wall time to the first answer and peak resident memory. The index file is
+# built first when it is missing or older than the CSV (it is not committed). Run from the repository root:
+#   python benchmarks/bench_address_cold_start.py
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+from address_index_file import open_index_file
+
+RUNS = 5
+
+CASES = {
+    'pandas read_csv': '''
+import pandas as pd
+df = pd.read_csv('icelandic_addresses.csv', dtype=str)
+key = 'amtmannsst'
+answer = df[df['HEITI_NF'].str.casefold().str.startswith(key) | df['HEITI_TGF'].fillna('').str.casefold().str.startswith(key)].head(10)
+''',
+    'AddressIndex from CSV': '''
+from address_lookup import AddressIndex
+answer = AddressIndex.from_csv('icelandic_addresses.csv').lookup('amtmannsst')
+''',
+    'mmap index file': '''
+from address_index_file import AddressIndexReader
+answer = AddressIndexReader('icelandic_addresses.idx').lookup('amtmannsst')
+''',
+}
+
+# Wrapper run in the child: time from interpreter start to the answer, and peak RSS
+TIMING = '''
+import resource, time
+start = time.perf_counter()
+{body}
+print(f"{{(time.perf_counter() - start) * 1000:.1f}} {{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}}")
+'''
+
+
+if __name__ == '__main__':
+    open_index_file(os.path.join(REPOSITORY_DIRECTORY, 'icelandic_addresses.idx'), os.path.join(REPOSITORY_DIRECTORY, 'icelandic_addresses.csv')).close()
+    baseline = subprocess.run([sys.executable, '-c', TIMING.format(body='pass')], cwd=REPOSITORY_DIRECTORY, capture_output=True, text=True, check=True)
+    print(f"empty interpreter: {baseline.stdout.split()[1]} MB peak RSS")
+    print(f"{'case':<22} {'ms to first answer':>19} {'peak RSS MB':>12}")
+    for name, body in CASES.items():
+        results = []
+        for _ in range(RUNS):
+            output = subprocess.run([sys.executable, '-c', TIMING.format(body=body)], cwd=REPOSITORY_DIRECTORY, capture_output=True, text=True, check=True)
+            results.append(tuple(float(value) for value in output.stdout.split()))
+        milliseconds = sorted(result[0] for result in results)[RUNS // 2]
+        peak = max(result[1] for result in results)
+        print(f"{name:<22} {milliseconds:>19.1f} {peak:>12.1f}")
@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import quote
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from address_lookup import AddressIndex, fold
+from address_server import make_lookup_server
+
+# Measures prefix lookup latency over icelandic_addresses.csv: the sorted prefix index, a linear
+# scan of every address (what consumers of the CSV did), and a round trip through the local HTTP
+# endpoint. Run from the repository root:
+#   python benchmarks/bench_address_lookup.py
+ADDRESSES_FILENAME = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'icelandic_addresses.csv')
+QUERIES = 2000
+
+
+# Function to answer a lookup by scanning every address
+def linear_lookup(addresses, prefix, postnr=None, limit=10):
+    key = fold(prefix)
+    found = [address for address in addresses if (postnr is None or address[0] == postnr) and any(fold(name).startswith(key) for name in address[1:] if name)]
+    return found[:limit]
+
+
+# Function to sample realistic prefixes: the start of a random name, in random letter case
+def sample_queries(addresses, count, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        postnr, heiti_nf, heiti_tgf = rng.choice(addresses)
+        name = rng.choice([heiti_nf, heiti_tgf]) or heiti_nf
+        prefix = name[:rng.randint(1, 8)]
+        queries.append((prefix.upper() if rng.random() < 0.3 else prefix, postnr if rng.random() < 0.3 else None))
+    return queries
+
+
+# Function to time each call and return the latencies in milliseconds, sorted
+def latencies_ms(function, queries):
+    times = []
+    for prefix, postnr in queries:
+        start = time.perf_counter()
+        function(prefix, postnr)
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)
+
+
+# Function to format the median, 99th percentile and worst latency
+def summary(times):
+    return f"p50 {times[len(times) // 2]:.4f} ms  p99 {times[int(len(times) * 0.99)]:.4f} ms  max {times[-1]:.4f} ms"
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    index = AddressIndex.from_csv(ADDRESSES_FILENAME)
+    print(f"Index built in {time.perf_counter() - start:.2f} s ({len(index.addresses)} addresses, {len(index.keys)} names)")
+    queries = sample_queries(index.addresses, QUERIES)
+
+    # The index must find exactly the addresses a full scan finds
+    for prefix, postnr in queries[:100]:
+        expected = set(linear_lookup(index.addresses, prefix, postnr, limit=len(index.addresses)))
+        if set(index.lookup(prefix, postnr, limit=len(index.addresses))) != expected:
+            print(f"Index and linear scan disagree for {prefix!r} in {postnr}")
+            sys.exit(1)
+
+    print(f"index:       {summary(latencies_ms(index.lookup, queries))}")
+    print(f"linear scan: {summary(latencies_ms(lambda p, n: linear_lookup(index.addresses, p, n), queries[:100]))}  (100 queries)")
+
+    server = make_lookup_server(index)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/lookup"
+
+    def http_lookup(prefix, postnr):
+        url = f"{base_url}?q={quote(prefix)}" + (f"&postnr={postnr}" if postnr else '')
+        with urlopen(url) as response:
+            return json.load(response)
+
+    print(f"HTTP:        {summary(latencies_ms(http_lookup, queries[:500]))}  (500 queries)")
+    server.shutdown()
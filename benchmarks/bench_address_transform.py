@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stadfangaskra_fixture import write_registry
+from stadfangaskra_transform import read_registry_chunks, first_dative_names, transform_chunk, REGISTRY_DTYPES, STREET_KEY
+
+# Compares the previous per-group back-fill and per-row HUSMERKING lambdas of stadfangaskra.py with
+# the shared column-wise transform stage, on a synthetic registry (130k+ rows at scale 1) held in memory.
+# Both must produce the same part a and part b rows. Run from the repository root:
+#   python benchmarks/bench_address_transform.py [scale]
+
+
+# Function to run the previous transforms: the back-fill once per output, then two row-wise applies
+def lambda_transforms(df):
+    a = df[['SVFNR', 'POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
+    a['HEITI_TGF'] = a.groupby(STREET_KEY)['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
+    b = df[['POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
+    b['HEITI_TGF'] = b.groupby(STREET_KEY)['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
+    b['HEITI_NF'] = b.apply(lambda row: f"{row['HEITI_NF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' else row['HEITI_NF'], axis=1)
+    b['HEITI_TGF'] = b.apply(lambda row: f"{row['HEITI_TGF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' and pd.notna(row['HEITI_TGF']) else row['HEITI_TGF'], axis=1)
+    return a, b.drop('HUSMERKING', axis=1).drop_duplicates(subset=STREET_KEY)
+
+
+# Function to run the shared stage: group-first dative names, one lookup per row, column-wise concatenation
+def shared_transform(df):
+    return transform_chunk(df, first_dative_names([df]))
+
+
+# Function to time one call in seconds
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+# Function to compare two frames by their written CSV text (the form both outputs are saved in)
+def same_csv(first, second):
+    return first.to_csv(index=False) == second.to_csv(index=False)
+
+
+if __name__ == '__main__':
+    scale = int(sys.argv[1]) if len(sys.argv) >= 2 else 1
+    with tempfile.TemporaryDirectory() as directory:
+        registry_filename = os.path.join(directory, 'Stadfangaskra.csv')
+        write_registry(registry_filename, scale)
+        df = pd.concat(read_registry_chunks(registry_filename, list(REGISTRY_DTYPES)), ignore_index=True)
+
+    lambda_seconds, (lambda_a, lambda_b) = timed(lambda_transforms, df)
+    shared_seconds, (shared_a, shared_b) = timed(shared_transform, df)
+    if not same_csv(lambda_a, shared_a) or not same_csv(lambda_b, shared_b):
+        print("The shared transform stage differs from the lambda transforms")
+        sys.exit(1)
+    print(f"{len(df)} registry rows, {len(shared_b)} unique addresses")
+    print(f"lambdas: {lambda_seconds:.2f} s  shared stage: {shared_seconds:.3f} s  speedup: {lambda_seconds / shared_seconds:.0f}x")
@@ -0,0 +1,46 @@
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_tables import extract_table_rows
+
+# Compares the previous full-document BeautifulSoup parse with the targeted extraction layer
+# on the saved BBC and island.is pages. Run from the repository root:
+#   python benchmarks/bench_html_extract.py
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+CASES = [
+    ('BBC table', 'bbc_premier_league_table.html', {'data-testid': 'football-table'}),
+    ('island.is licenses', 'island_taxi_licenses.html', {'class': '_1wc4apv0 _1wc4apv5 _1ovv93d1o3 _1ovv93d1o4 b7a64p0'}),
+]
+
+
+# Function to extract the rows the way the scripts did before: parse the page, find the table, walk every cell
+def soup_table_rows(html, attrs):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', attrs)
+    return [tuple(cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])) for row in table.find_all('tr')]
+
+
+# Function to time a callable and return the best time per call in milliseconds
+def best_ms(function, repeat=5):
+    number = 1
+    while timeit.timeit(function, number=number) < 0.2:
+        number *= 2
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1000
+
+
+if __name__ == '__main__':
+    print(f"{'page':<20} {'size':>9} {'rows':>6} {'soup ms':>9} {'extract ms':>11} {'speedup':>8}")
+    for name, filename, attrs in CASES:
+        with open(os.path.join(FIXTURES_DIRECTORY, filename), encoding='utf-8') as f:
+            html = f.read()
+        rows = extract_table_rows(html, attrs)
+        if rows != soup_table_rows(html, attrs):
+            print(f"{name}: extracted rows differ from BeautifulSoup")
+            sys.exit(1)
+        soup_ms = best_ms(lambda: soup_table_rows(html, attrs))
+        extract_ms = best_ms(lambda: extract_table_rows(html, attrs))
+        print(f"{name:<20} {len(html):>9} {len(rows):>6} {soup_ms:>9.2f} {extract_ms:>11.2f} {soup_ms / extract_ms:>7.1f}x")
@@ -0,0 +1,79 @@
+import contextlib
+import filecmp
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from league_backfill import backfill, backfill_season, archive_files
+from standings_archive_fixture import write_standings_archive
+
+# Times `python manutd.py --backfill` (league_backfill.backfill) on a synthetic archive of 30 seasons of a
+# 20-team league (standings_archive_fixture.py: a page per matchday, every fifth season as one CSV file)
+# with an increasing number of worker processes, starting from an empty store and team history each run.
+# The outputs of every worker count must be byte for byte those of the single-process run. The share of
+# the single-process run spent in the per-season tasks (the part the pool runs in parallel) is also
+# measured, with the speedup it allows on any number of CPUs (Amdahl's law).
+#   python benchmarks/bench_league_backfill.py [--seasons N] [workers ...]
+SEASONS = 30
+RUNS = 3
+
+
+# Function to backfill into fresh output files; returns (seconds, team history file, store file)
+def run_backfill(archive_directory, output_directory, workers):
+    data_filename = os.path.join(output_directory, f'team_history_{workers}.csv')
+    store_filename = os.path.join(output_directory, f'standings_{workers}.npz')
+    aggregates_filename = os.path.join(output_directory, f'aggregates_{workers}.json')
+    for filename in (data_filename, store_filename, aggregates_filename):
+        if os.path.exists(filename):
+            os.remove(filename)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not backfill(archive_directory, workers, data_filename, store_filename, aggregates_filename=aggregates_filename):
+            raise RuntimeError(f"The backfill with {workers} worker(s) failed")
+    return time.perf_counter() - start, data_filename, store_filename
+
+
+# Function to time the per-season tasks alone, one after another, in seconds
+def season_task_seconds(archive_directory):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for season, filenames in sorted(archive_files(archive_directory).items()):
+            backfill_season(season, filenames, [])
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    seasons = SEASONS
+    if '--seasons' in arguments:
+        position = arguments.index('--seasons')
+        seasons = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    cpus = os.cpu_count() or 1
+    worker_counts = [int(argument) for argument in arguments] or sorted({1, 2, max(cpus // 2, 1), cpus})
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive_directory = os.path.join(directory, 'archive')
+        files = write_standings_archive(archive_directory, seasons)
+        print(f"{seasons} seasons, {files} archived files, {cpus} CPU(s), median of {RUNS} runs")
+        print(f"{'workers':>7} {'seconds':>9} {'speedup':>8}  outputs")
+        reference = None
+        for workers in worker_counts:
+            times = []
+            for _ in range(RUNS):
+                seconds, data_filename, store_filename = run_backfill(archive_directory, directory, workers)
+                times.append(seconds)
+            if reference is None:
+                reference = (statistics.median(times), data_filename, store_filename)
+            identical = filecmp.cmp(data_filename, reference[1], shallow=False) and filecmp.cmp(store_filename, reference[2], shallow=False)
+            print(f"{workers:>7} {statistics.median(times):>9.2f} {reference[0] / statistics.median(times):>7.2f}x  {'identical' if identical else 'DIFFER'}")
+
+        # Each measurement of the tasks is paired with a single-process run just before it
+        parallel = min(statistics.median(season_task_seconds(archive_directory) / run_backfill(archive_directory, directory, 1)[0]
+                                         for _ in range(RUNS)), 1)
+        print(f"per-season tasks: {parallel:.0%} of the single-process run; at best "
+              + ', '.join(f"{1 / (1 - parallel + parallel / count):.1f}x on {count}" for count in (2, 4, 8, 16)) + " CPUs")
@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from taxi_history import LicenseHistory, presence_spans, to_ordinal
+
+# Compares the interval index in taxi_history.py with a linear filter over every presence span
+# (what a scan of the daily files or the summary amounts to) on several simulated years of daily
+# license lists with churn and lapsed-then-renewed licenses. Run from the repository root:
+#   python benchmarks/bench_license_history.py [years] [licenses]
+DEFAULT_YEARS = 5
+DEFAULT_LICENSES = 1000
+QUERIES = 2000
+
+
+# Function to simulate daily ID lists: a steady pool of licenses where a few leave, lapse or join each day
+def simulated_days(years, licenses, seed=0):
+    rng = random.Random(seed)
+    active = {f"Leyfishafi {n} - Hreyfill svf. - {n}" for n in range(licenses)}
+    lapsed = []
+    next_number = licenses
+    day = date(2025, 1, 1)
+    for _ in range(365 * years):
+        for holder_id in rng.sample(sorted(active), 2):
+            active.discard(holder_id)
+            if rng.random() < 0.5:
+                lapsed.append(holder_id)
+        for _ in range(2):
+            if lapsed and rng.random() < 0.5:
+                active.add(lapsed.pop(rng.randrange(len(lapsed))))
+            else:
+                active.add(f"Leyfishafi {next_number} - Hopp Leigubílar ehf. - {next_number}")
+                next_number += 1
+        # Some days have no scrape at all
+        if rng.random() > 0.05:
+            yield day.isoformat(), list(active)
+        day += timedelta(days=1)
+
+
+# Function to answer a point query by checking every span
+def linear_active_on(spans, ordinal):
+    return sorted({holder_id for holder_id, id_spans in spans.items() for start, end in id_spans if start <= ordinal <= end})
+
+
+# Function to answer a range query by checking every span
+def linear_active_between(spans, low, high):
+    return sorted({holder_id for holder_id, id_spans in spans.items() for start, end in id_spans if start <= high and end >= low})
+
+
+if __name__ == '__main__':
+    years = int(sys.argv[1]) if len(sys.argv) >= 2 else DEFAULT_YEARS
+    licenses = int(sys.argv[2]) if len(sys.argv) >= 3 else DEFAULT_LICENSES
+    days = list(simulated_days(years, licenses))
+    start = time.perf_counter()
+    history = LicenseHistory(presence_spans(days))
+    build_seconds = time.perf_counter() - start
+    span_count = sum(len(id_spans) for id_spans in history.spans.values())
+    print(f"{len(days)} recorded days, {len(history.spans)} IDs, {span_count} spans, index built in {build_seconds:.2f} s")
+
+    # Every point query is checked against the recorded day it falls on
+    for day, ids in days[::97]:
+        if history.active_on(day) != sorted(set(ids)) or history.count_active_on(day) != len(set(ids)):
+            print(f"{day}: index disagrees with the recorded day")
+            sys.exit(1)
+
+    rng = random.Random(1)
+    first, last = to_ordinal(days[0][0]), to_ordinal(days[-1][0])
+    points = [rng.randint(first, last) for _ in range(QUERIES)]
+    ranges = [sorted((rng.randint(first, last), rng.randint(first, last))) for _ in range(QUERIES // 10)]
+    to_iso = lambda ordinal: date.fromordinal(ordinal).isoformat()
+
+    cases = [
+        ('count on date', len(points),
+         lambda: [history.count_active_on(to_iso(p)) for p in points],
+         lambda: [len(linear_active_on(history.spans, p)) for p in points]),
+        ('active on date', len(points),
+         lambda: [history.active_on(to_iso(p)) for p in points],
+         lambda: [linear_active_on(history.spans, p) for p in points]),
+        ('active between', len(ranges),
+         lambda: [history.active_between(to_iso(a), to_iso(b)) for a, b in ranges],
+         lambda: [linear_active_between(history.spans, a, b) for a, b in ranges]),
+    ]
+    print(f"{'query':<16} {'count':>6} {'linear ms/q':>12} {'index ms/q':>11} {'speedup':>8}")
+    for name, count, indexed, linear in cases:
+        start = time.perf_counter()
+        indexed_results = indexed()
+        index_ms = (time.perf_counter() - start) * 1000 / count
+        start = time.perf_counter()
+        linear_results = linear()
+        linear_ms = (time.perf_counter() - start) * 1000 / count
+        if indexed_results != linear_results:
+            print(f"{name}: index and linear scan disagree")
+            sys.exit(1)
+        print(f"{name:<16} {count:>6} {linear_ms:>12.3f} {index_ms:>11.3f} {linear_ms / index_ms:>7.1f}x")
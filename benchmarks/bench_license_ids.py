@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from taxi_records import build_license_ids, station_categories
+
+# Compares the previous row-wise ID generation (DataFrame.apply) with the column-wise version on
+# synthetic license tables. Run from the repository root:
+#   python benchmarks/bench_license_ids.py [rows ...]
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+STATIONS = ['Hreyfill svf.', 'BSR ehf.', 'Hopp Leigubílar ehf.', 'Eigin leigubílastöð', 'Ober leigubílar ehf.',
+            'Iceland Taxi Reykjavík ehf.', 'Taxi Service ehf.', 'Borgarbílastöðin ehf.', '', 'nan']
+
+
+# Function to build a synthetic scraped license table with the same columns and value shapes as island.is
+def synthetic_licenses(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    numbers = rng.integers(1, 700, rows).astype(str)
+    numbers[rng.random(rows) < 0.2] = ''
+    return pd.DataFrame({
+        'Nafn': pd.Series(rng.integers(0, rows, rows)).map(lambda n: f"Leyfishafi {n}"),
+        'Kennitala': '',
+        'Stöð': rng.choice(STATIONS, rows),
+        'Stöðvarnúmer': numbers,
+    })
+
+
+# Function to generate the IDs the way taxi.py did before (one Python call per row)
+def row_wise_ids(df):
+    def generate_id(row):
+        id_parts = [str(row['Nafn'])]
+        if pd.notna(row['Stöð']) and str(row['Stöð']).strip() != '' and str(row['Stöð']).lower() != 'nan':
+            id_parts.append(str(row['Stöð']).replace('.0', ''))
+        if pd.notna(row['Stöðvarnúmer']) and str(row['Stöðvarnúmer']).strip() != '' and str(row['Stöðvarnúmer']).lower() != 'nan':
+            id_parts.append(str(row['Stöðvarnúmer']).replace('.0', ''))
+        return " - ".join(id_parts)
+    return df.apply(generate_id, axis=1)
+
+
+# Function to time one call in seconds
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'rows':>9} {'apply s':>9} {'vectorized s':>13} {'speedup':>8} {'Stöð object MB':>15} {'Stöð category MB':>17}")
+    for size in sizes:
+        df = synthetic_licenses(size)
+        apply_seconds, expected = timed(row_wise_ids, df)
+        vector_seconds, ids = timed(build_license_ids, df)
+        if not (ids == expected).all():
+            print(f"{size}: vectorized IDs differ from the row-wise IDs")
+            sys.exit(1)
+        stations = df['Stöð'].astype(object)
+        object_mb = stations.memory_usage(deep=True) / 1e6
+        category_mb = station_categories(stations).memory_usage(deep=True) / 1e6
+        print(f"{size:>9} {apply_seconds:>9.3f} {vector_seconds:>13.4f} {apply_seconds / vector_seconds:>7.1f}x {object_mb:>15.2f} {category_mb:>17.2f}")
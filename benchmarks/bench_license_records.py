@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from operator import itemgetter
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import taxi
+from html_tables import extract_table_rows
+from taxi_records import LicenseRecord, build_license_ids, station_categories
+from license_page_fixture import write_license_page
+
+# Compares the previous per-row dictionaries of taxi.py's parse stage (every row also holding the
+# "Uppfært af Samgöngustofu" stamp and the date) with the LicenseBatch columns, on a synthetic license
+# page. Reports the memory the parsed rows hold per row (tracemalloc; the cell strings themselves are
+# the page's and are left out) and the time to collect the rows and to build the day's DataFrame from
+# them. Run from the repository root:
+#   python benchmarks/bench_license_records.py [rows]
+DEFAULT_ROWS = 100_000
+RUNS = 5
+BENCHMARK_DAY = date(2026, 1, 15)
+STAMP = "15. janúar 2026"
+
+
+# Function to collect the rows the way taxi.py did before: one dictionary per row
+def rows_as_dictionaries(rows, extracted_value_truncated, current_date):
+    new_data_list = []
+    header_names = list(rows[0])
+    scraped_col_indices = {}
+    for output_col, scraped_header in taxi.OUTPUT_COLUMN_MAPPING.items():
+        try:
+            scraped_col_indices[output_col] = header_names.index(scraped_header)
+        except ValueError:
+            scraped_col_indices[output_col] = -1
+    for row_data in rows[1:]:
+        new_row_data = {}
+        for col_name, index in scraped_col_indices.items():
+            if index != -1 and index < len(row_data):
+                new_row_data[col_name] = row_data[index]
+            else:
+                new_row_data[col_name] = ""
+        if "Kennitala" in new_row_data:
+            kennitala = new_row_data["Kennitala"]
+            if len(kennitala) == 9:
+                new_row_data["Kennitala"] = "0" + kennitala
+        new_row_data["Uppfært af Samgöngustofu"] = extracted_value_truncated
+        new_row_data["Date"] = current_date
+        new_data_list.append(new_row_data)
+    return new_data_list
+
+
+# Function to build the day's DataFrame from the dictionaries, as taxi.py did before
+def frame_from_dictionaries(new_data_list):
+    new_df = pd.DataFrame(new_data_list)
+    new_df['ID'] = build_license_ids(new_df)
+    new_df['Stöð'] = station_categories(new_df['Stöð'])
+    return new_df
+
+
+# Function to collect the rows as a list of LicenseRecord tuples (one slotted tuple per row)
+def rows_as_records(rows, extracted_value_truncated, current_date):
+    header_names = list(rows[0])
+    take = itemgetter(*(header_names.index(scraped_header) for scraped_header in taxi.OUTPUT_COLUMN_MAPPING.values()))
+    records = []
+    for row_data in rows[1:]:
+        nafn, kennitala, stod, stodvarnumer, forradamadur = take(row_data)
+        if len(kennitala) == 9:
+            kennitala = "0" + kennitala
+        records.append(LicenseRecord(nafn, kennitala, stod, stodvarnumer, forradamadur))
+    return records
+
+
+# Function to measure the memory held by what function(*args) returns, in bytes
+def retained_bytes(function, *args):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return held
+
+
+# Function to get the best of RUNS timings of function(*args) in seconds, with its last result
+def best_time(function, *args):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == '__main__':
+    row_count = int(sys.argv[1]) if len(sys.argv) >= 2 else DEFAULT_ROWS
+    with tempfile.TemporaryDirectory() as directory:
+        page_filename = os.path.join(directory, 'licenses.html')
+        write_license_page(page_filename, row_count)
+        with open(page_filename, 'r', encoding='utf-8') as f:
+            rows = extract_table_rows(f.read(), {'class': taxi.LICENSE_TABLE_CLASS})
+
+    print(f"{row_count} license rows, best of {RUNS} runs")
+    print(f"{'parsed rows as':<26} {'bytes/row':>10} {'collect ms':>11} {'frame ms':>9}")
+    dictionary_bytes = retained_bytes(rows_as_dictionaries, rows, STAMP, BENCHMARK_DAY)
+    record_bytes = retained_bytes(rows_as_records, rows, STAMP, BENCHMARK_DAY)
+    batch_bytes = retained_bytes(taxi.build_license_batch, rows, STAMP, BENCHMARK_DAY)
+
+    dictionary_seconds, dictionaries = best_time(rows_as_dictionaries, rows, STAMP, BENCHMARK_DAY)
+    record_seconds, _ = best_time(rows_as_records, rows, STAMP, BENCHMARK_DAY)
+    batch_seconds, batch = best_time(taxi.build_license_batch, rows, STAMP, BENCHMARK_DAY)
+    dictionary_frame_seconds, expected = best_time(frame_from_dictionaries, dictionaries)
+    batch_frame_seconds, new_df = best_time(taxi.build_license_frame, batch)
+
+    print(f"{'dictionaries (before)':<26} {dictionary_bytes / row_count:>10.0f} {dictionary_seconds * 1000:>11.1f} {dictionary_frame_seconds * 1000:>9.1f}")
+    print(f"{'LicenseRecord tuples':<26} {record_bytes / row_count:>10.0f} {record_seconds * 1000:>11.1f} {'':>9}")
+    print(f"{'LicenseBatch columns':<26} {batch_bytes / row_count:>10.0f} {batch_seconds * 1000:>11.1f} {batch_frame_seconds * 1000:>9.1f}")
+
+    # The frame columns taxi.py uses afterwards must be the same
+    columns = list(taxi.OUTPUT_COLUMN_MAPPING) + ['ID']
+    try:
+        pd.testing.assert_frame_equal(new_df[columns], expected[columns])
+    except AssertionError as e:
+        print(f"The frames differ: {e}")
+        sys.exit(1)
+    print("frames identical")
@@ -0,0 +1,84 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Measures the cold start of an hourly manutd.py run in a fresh process, against the repository's saved
+# table page (replayed, see fetch.py) and copies of its outputs:
+#   unchanged table   the table's fingerprint matches the saved fetch state, so the run stops after the fetch
+#   same matchday     the table changed but the team's row is the last row of its history (patched in place)
+#   next matchday     the history ends one matchday earlier, so the new row is derived and appended
+# Each case reports the median wall time of the whole process, the time spent importing modules
+# (python -X importtime) and whether pandas or numpy were loaded. Run from anywhere:
+#   python benchmarks/bench_manutd_cold_start.py
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIRECTORY = os.path.join(REPOSITORY_DIRECTORY, 'fixtures')
+OUTPUT_FILENAMES = ['manchester_united_data.csv', 'manchester_united_data_sheets.csv', 'premier_league_standings.npz']
+RUNS = 5
+
+# Run in the child: main() with the date pinned inside the season of the saved page
+CHILD = '''
+import datetime, sys
+import manutd
+class PinnedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls({year}, 10, 1, 12, 0, 0, tzinfo=tz)
+manutd.datetime = PinnedDatetime
+manutd.main([])
+'''
+
+
+# Function to copy the outputs into a fresh working directory; `drop_last_row` removes the history's last matchday
+def prepare(directory, drop_last_row):
+    for filename in OUTPUT_FILENAMES:
+        shutil.copy(os.path.join(REPOSITORY_DIRECTORY, filename), directory)
+    if drop_last_row:
+        filename = os.path.join(directory, OUTPUT_FILENAMES[0])
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            f.writelines(lines[:-1])
+
+
+# Function to run the job once; returns (wall ms, import ms, modules imported)
+def run_once(directory, year):
+    environment = dict(os.environ, FETCH_REPLAY_DIR=FIXTURE_DIRECTORY, PYTHONPATH=REPOSITORY_DIRECTORY,
+                       PIPELINE_METRICS_FILE=os.path.join(directory, 'pipeline_metrics.jsonl'))
+    command = [sys.executable, '-X', 'importtime', '-c', CHILD.format(year=year)]
+    wall_start = time.perf_counter()
+    output = subprocess.run(command, cwd=directory, env=environment, capture_output=True, text=True)
+    wall = (time.perf_counter() - wall_start) * 1000
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr[-2000:])
+    import_microseconds = 0
+    modules = set()
+    for line in output.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if line.startswith('import time:') and '|' in line:
+            self_time, _, name = line[len('import time:'):].split('|')
+            if self_time.strip().isdigit():
+                import_microseconds += int(self_time)
+                modules.add(name.strip())
+    return wall, import_microseconds / 1000, modules
+
+
+if __name__ == '__main__':
+    with open(os.path.join(REPOSITORY_DIRECTORY, OUTPUT_FILENAMES[0]), 'r', encoding='utf-8') as f:
+        year = int(f.readlines()[-1].split('-', 1)[0])
+    print(f"{'case':<18} {'wall ms':>8} {'import ms':>10}  heavy modules loaded")
+    for case in ('unchanged table', 'same matchday', 'next matchday'):
+        results = []
+        for _ in range(RUNS):
+            with tempfile.TemporaryDirectory() as directory:
+                prepare(directory, drop_last_row=case == 'next matchday')
+                if case == 'unchanged table':
+                    # A first run saves the fetch state, so the measured run finds the table unchanged
+                    run_once(directory, year)
+                results.append(run_once(directory, year))
+        wall = sorted(result[0] for result in results)[RUNS // 2]
+        imports = sorted(result[1] for result in results)[RUNS // 2]
+        heavy = sorted(name for name in ('pandas', 'numpy', 'requests') if name in results[-1][2])
+        print(f"{case:<18} {wall:>8.0f} {imports:>10.0f}  {', '.join(heavy) or '-'}")
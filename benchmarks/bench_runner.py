@@ -0,0 +1,97 @@
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixture_server
+from suite import prepare_fixtures, REPOSITORY_DIRECTORY
+
+# Compares the three scripts run one after another (a cold process each) with runner.py running the same
+# jobs concurrently, against local stand-in servers for the three sites. Each server waits DELAY seconds
+# before answering, in place of the real sites' latency. The registry is the realistic benchmark fixture.
+# Both modes start from fresh copies of the repository's outputs, and their outputs are compared.
+#   python benchmarks/bench_runner.py [--delay SECONDS] [--workers N]
+DELAY = 0.5
+RUNS = 3
+SCRIPTS = ['stadfangaskra.py', 'taxi.py', 'manutd.py']
+# Left out of the working copies: not read by the jobs
+IGNORED = shutil.ignore_patterns('.git', 'benchmarks', 'fixtures', 'profiles', '__pycache__', '.fetch_cache', 'stadfangaskra_cache', 'pipeline_metrics.jsonl')
+
+
+# Function to start a stand-in server for one page in a thread; returns (server, URL of the page)
+def serve(filename, delay):
+    directory = tempfile.mkdtemp()
+    shutil.copy(filename, directory)
+    server = fixture_server.make_fixture_server(directory, delay=delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/{os.path.basename(filename)}"
+
+
+# Function to run commands one after another in a working directory; returns the wall time in seconds
+def run_commands(commands, directory, environment):
+    start = time.perf_counter()
+    for command in commands:
+        output = subprocess.run(command, cwd=directory, env=environment, capture_output=True, text=True)
+        if output.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed:\n{output.stdout[-2000:]}{output.stderr[-2000:]}")
+    return time.perf_counter() - start
+
+
+# Function to list the files of a working copy that differ from another's
+def different_files(first, second):
+    differences = []
+    for root, directories, files in os.walk(first):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, first)
+            if relative == 'pipeline_metrics.jsonl':
+                continue
+            other = os.path.join(second, relative)
+            if not os.path.exists(other):
+                differences.append(relative)
+                continue
+            with open(path, 'rb') as f, open(other, 'rb') as g:
+                if f.read() != g.read():
+                    differences.append(relative)
+    return differences
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    delay = float(arguments[arguments.index('--delay') + 1]) if '--delay' in arguments else DELAY
+    runner_command = [sys.executable, os.path.join(REPOSITORY_DIRECTORY, 'runner.py'), '--all']
+    if '--workers' in arguments:
+        runner_command += ['--workers', arguments[arguments.index('--workers') + 1]]
+    # The servers run in this process and print a line per request; keep them quiet
+    fixture_server.FixtureRequestHandler.log_message = lambda self, format, *args: None
+
+    fixtures = prepare_fixtures('realistic')
+    servers = [serve(fixtures['license_page'], delay), serve(fixtures['table_page'], delay), serve(fixtures['registry'], delay)]
+    environment = dict(os.environ, TAXI_URL=servers[0][1], MANUTD_URL=servers[1][1], STADFANGASKRA_URL=servers[2][1])
+    environment.pop('FETCH_REPLAY_DIR', None)
+    environment.pop('FETCH_CACHE_TTL', None)
+
+    sequential_times, runner_times = [], []
+    for _ in range(RUNS):
+        with tempfile.TemporaryDirectory() as directory:
+            sequential_directory = os.path.join(directory, 'sequential')
+            runner_directory = os.path.join(directory, 'runner')
+            shutil.copytree(REPOSITORY_DIRECTORY, sequential_directory, ignore=IGNORED)
+            shutil.copytree(REPOSITORY_DIRECTORY, runner_directory, ignore=IGNORED)
+            sequential_times.append(run_commands([[sys.executable, os.path.join(REPOSITORY_DIRECTORY, script)] for script in SCRIPTS],
+                                                 sequential_directory, environment))
+            runner_times.append(run_commands([runner_command], runner_directory, environment))
+            differences = different_files(sequential_directory, runner_directory)
+    for server, _ in servers:
+        server.shutdown()
+
+    print(f"stand-in servers answering after {delay} s, {os.cpu_count()} CPU(s), median of {RUNS} runs")
+    print(f"{'three scripts, one after another':<34} {statistics.median(sequential_times):>7.2f} s")
+    print(f"{'runner.py, concurrently':<34} {statistics.median(runner_times):>7.2f} s")
+    print("outputs identical" if not differences else f"outputs differ: {', '.join(differences)}")
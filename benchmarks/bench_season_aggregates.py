@@ -0,0 +1,98 @@
+import filecmp
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import season_aggregates
+from season_aggregates import refresh_aggregates, open_aggregates, read_season_rows, season_summary
+from league_history_fixture import write_league_history
+
+# Compares what a dashboard pays for the per-season aggregates when it rescans manchester_united_data.csv
+# (with pandas, or with season_aggregates' own functions) against a query of the materialized aggregates
+# (open_aggregates: the file is read on the first query and again only after it changed), and what the
+# hourly run pays to keep them up to date (one season refreshed) against recomputing every season.
+# Runs on the committed history and on a synthetic 50-season one. Run from the repository root:
+#   python benchmarks/bench_season_aggregates.py
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 20
+
+
+# Function to get the median time of function(*args) in milliseconds
+def median_ms(function, *args, setup=None):
+    timings = []
+    for _ in range(RUNS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+# Function to compute the final table the way consumers of the CSV file do: read it all and group it
+def pandas_final_table(data_filename):
+    history = pd.read_csv(data_filename)
+    history = history.sort_values(['season', 'played'])
+    final = history.groupby('season').last()
+    positions = history.groupby('season')['position'].agg(['min', 'max'])
+    return final.join(positions)
+
+
+# Function to recompute every season's aggregates from the whole file
+def rescan_aggregates(data_filename):
+    return {season: season_summary(rows) for season, rows in read_season_rows(data_filename).items()}
+
+
+# Function to measure one history; returns the printed lines
+def measure(name, data_filename, directory):
+    aggregates_filename = os.path.join(directory, 'aggregates.json')
+    last_season = max(read_season_rows(data_filename))
+    with open(data_filename, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    head_filename = os.path.join(directory, 'head.csv')
+    with open(head_filename, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+
+    # The hourly run: the aggregates of the history without its last row, then the last row arrives
+    work_filename = os.path.join(directory, 'history.csv')
+    def before_last_row():
+        shutil.copyfile(head_filename, work_filename)
+        refresh_aggregates(work_filename, None, aggregates_filename)
+        shutil.copyfile(data_filename, work_filename)
+    season_ms = median_ms(refresh_aggregates, work_filename, [last_season], aggregates_filename, setup=before_last_row)
+    incremental_filename = aggregates_filename + '.incremental'
+    shutil.copyfile(aggregates_filename, incremental_filename)
+    os.remove(aggregates_filename)
+    rebuild_ms = median_ms(refresh_aggregates, work_filename, None, aggregates_filename, setup=lambda: os.path.exists(aggregates_filename) and os.remove(aggregates_filename))
+    identical = filecmp.cmp(incremental_filename, aggregates_filename, shallow=False)
+
+    # The dashboard's query of the final table
+    pandas_ms = median_ms(pandas_final_table, data_filename)
+    rescan_ms = median_ms(rescan_aggregates, data_filename)
+    first_ms = median_ms(lambda: open_aggregates(aggregates_filename).final_table(), setup=season_aggregates._opened.clear)
+    cached_ms = median_ms(lambda: open_aggregates(aggregates_filename).final_table())
+
+    seasons = len(open_aggregates(aggregates_filename).seasons())
+    return [
+        f"{name}: {len(lines) - 1} rows, {seasons} seasons, aggregates file {os.path.getsize(aggregates_filename) / 1024:.0f} KB",
+        f"  hourly update   refresh the last season {season_ms:>8.2f} ms   recompute every season {rebuild_ms:>8.2f} ms"
+        f"   {'same file' if identical else 'FILES DIFFER'}",
+        f"  final table     pandas rescan {pandas_ms:>8.2f} ms   stdlib rescan {rescan_ms:>8.2f} ms"
+        f"   first query {first_ms:>6.2f} ms   cached query {cached_ms:>6.3f} ms",
+    ]
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        output = measure('committed history', os.path.join(REPOSITORY_DIRECTORY, 'manchester_united_data.csv'), directory)
+        synthetic_filename = os.path.join(directory, 'synthetic_history.csv')
+        write_league_history(os.path.join(directory, 'standings.npz'), synthetic_filename, 50)
+        output += measure('synthetic 50 seasons', synthetic_filename, directory)
+    print(f"median of {RUNS} runs")
+    print('\n'.join(output))
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stadfangaskra_fixture import write_registry
+
+# Compares peak memory and run time of the previous whole-file stadfangaskra.py pipeline with the
+# chunked ingest, each in its own process, on a synthetic registry, and checks that both write
+# identical stadfangaskra_trimmed.csv and icelandic_addresses.csv. Run from the repository root:
+#   python benchmarks/bench_stadfangaskra_memory.py [scale ...]   (e.g. 1 4; scale 4 takes about 10 minutes)
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_FILENAMES = ['stadfangaskra_trimmed.csv', 'icelandic_addresses.csv']
+
+# The previous pipeline: one read of every column, then the per-group and per-row lambdas
+BASELINE_SCRIPT = '''
+import resource, sys
+import pandas as pd
+df = pd.read_csv(sys.argv[1], dtype={'HUSMERKING': 'string', 'SVFNR': 'string'})
+a = df[['SVFNR', 'POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
+a['HEITI_TGF'] = a.groupby(['POSTNR', 'HEITI_NF'])['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
+a.to_csv('stadfangaskra_trimmed.csv', index=False)
+b = df[['POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
+b['HEITI_TGF'] = b.groupby(['POSTNR', 'HEITI_NF'])['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
+b['HEITI_NF'] = b.apply(lambda row: f"{row['HEITI_NF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' else row['HEITI_NF'], axis=1)
+b['HEITI_TGF'] = b.apply(lambda row: f"{row['HEITI_TGF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' and pd.notna(row['HEITI_TGF']) else row['HEITI_TGF'], axis=1)
+b = b.drop('HUSMERKING', axis=1).drop_duplicates(subset=['POSTNR', 'HEITI_NF']).sort_values(by=['POSTNR', 'HEITI_NF'])
+b.to_csv('icelandic_addresses.csv', index=False)
+print(f"Peak memory (RSS): {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+'''
+
+
+# Function to run a pipeline in a fresh process and return (seconds, peak RSS line)
+def run_pipeline(arguments, working_directory, registry_filename):
+    environment = dict(os.environ, STADFANGASKRA_URL=registry_filename)
+    start = time.perf_counter()
+    result = subprocess.run(arguments, cwd=working_directory, env=environment, capture_output=True, text=True, check=True)
+    seconds = time.perf_counter() - start
+    peak = [line for line in result.stdout.splitlines() if line.startswith('Peak memory')][0]
+    return seconds, peak.split(': ')[1]
+
+
+if __name__ == '__main__':
+    scales = [int(scale) for scale in sys.argv[1:]] or [1]
+    print(f"{'registry rows':>13} {'before s':>9} {'before RSS':>11} {'after s':>8} {'after RSS':>10}")
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            registry_filename = os.path.join(directory, 'Stadfangaskra.csv')
+            rows = write_registry(registry_filename, scale)
+            before_directory, after_directory = os.path.join(directory, 'before'), os.path.join(directory, 'after')
+            os.makedirs(before_directory)
+            os.makedirs(after_directory)
+            before = run_pipeline([sys.executable, '-c', BASELINE_SCRIPT, registry_filename], before_directory, registry_filename)
+            after = run_pipeline([sys.executable, os.path.join(REPOSITORY_DIRECTORY, 'stadfangaskra.py')], after_directory, registry_filename)
+            for output_filename in OUTPUT_FILENAMES:
+                with open(os.path.join(before_directory, output_filename), 'rb') as f1, open(os.path.join(after_directory, output_filename), 'rb') as f2:
+                    if f1.read() != f2.read():
+                        print(f"{output_filename} differs at scale {scale}")
+                        sys.exit(1)
+            print(f"{rows:>13} {before[0]:>9.1f} {before[1]:>11} {after[0]:>8.1f} {after[1]:>10}")
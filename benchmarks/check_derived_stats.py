@@ -0,0 +1,129 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from league_stats import compute_derived_stats, DERIVED_COLUMNS
+
+# Parity check of league_stats.compute_derived_stats, the vectorized derivation of manutd.py's derived
+# columns, against the row-wise callbacks it replaced and against the committed manchester_united_data.csv.
+# The randomized trials remove matchdays (gaps) and add played == 0 rows to the committed history.
+# Run from the repository root; exits with status 1 when any output differs:
+#   python benchmarks/check_derived_stats.py [trials]
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILENAME = os.path.join(REPOSITORY_DIRECTORY, 'manchester_united_data.csv')
+DEFAULT_TRIALS = 30
+
+
+# Function to compute the derived columns the way manutd.py did before (one Python call per row)
+def row_wise_derived_stats(df):
+    df = df.copy()
+    for col in ["played", "points", "goals for", "goals against"]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.sort_values(by=['season', 'played']).reset_index(drop=True)
+
+    def previous_row(row, df):
+        return df[(df['season'] == row['season']) & (df['played'] == row['played'] - 1)]
+
+    def calculate_last_result(row, df):
+        if pd.isna(row['played']) or row['played'] == 0:
+            return ''
+        if row['played'] == 1:
+            point_diff = row['points']
+        else:
+            previous = previous_row(row, df)
+            if previous.empty:
+                return ''
+            point_diff = row['points'] - previous.iloc[0]['points']
+        return 'W' if point_diff == 3 else 'D' if point_diff == 1 else 'L'
+    df['last result'] = df.apply(lambda row: calculate_last_result(row, df), axis=1)
+
+    def calculate_form(row, df):
+        if pd.isna(row['played']) or row['played'] == 0:
+            return ''
+        played = row['played']
+        start_played = max(played - min(int(played), 5) + 1, 1)
+        form_df = df[(df['season'] == row['season']) & (df['played'] >= start_played) & (df['played'] <= played)].sort_values(by='played')
+        return "-".join(form_df['last result'].tolist())
+    df['form'] = df.apply(lambda row: calculate_form(row, df), axis=1)
+
+    def calculate_indicator(row, df, col, first_game):
+        if pd.isna(row['played']) or row['played'] == 0:
+            return 0
+        if row['played'] == 1:
+            return first_game(row[col])
+        previous = previous_row(row, df)
+        if previous.empty:
+            return 0
+        return 1 if row[col] > previous.iloc[0][col] else 0
+    df['gf'] = df.apply(lambda row: calculate_indicator(row, df, 'goals for', lambda goals: 0 if goals == 0 else 1), axis=1)
+    df['ga'] = df.apply(lambda row: calculate_indicator(row, df, 'goals against', lambda goals: 1 if goals > 0 else 0), axis=1)
+
+    def running_count(df, counts):
+        totals = []
+        current_sum = 0
+        current_season = None
+        for _, row in df.iterrows():
+            if pd.isna(row['played']):
+                totals.append(np.nan)
+                continue
+            if row['season'] != current_season or row['played'] == 1:
+                current_sum = 0
+                current_season = row['season']
+            current_sum += 1 if counts(row) else 0
+            totals.append(current_sum)
+        return totals
+    df['games scored in'] = running_count(df, lambda row: row['gf'] == 1)
+    df['clean sheets'] = running_count(df, lambda row: row['ga'] == 0)
+    return df
+
+
+# Function to put the derived columns of a frame in one comparable form, in season and played order
+def derived_values(df):
+    df = df.sort_values(by=['season', 'played'], kind='stable').reset_index(drop=True)
+    values = pd.DataFrame({'season': df['season'], 'played': pd.to_numeric(df['played'], errors='coerce')})
+    for col in ["last result", "form"]:
+        values[col] = df[col].fillna('').astype(str)
+    for col in ["gf", "ga", "games scored in", "clean sheets"]:
+        values[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+    return values
+
+
+# Function to report the first differing rows of two derived frames; returns True when they are equal
+def same_derived_values(name, expected, actual):
+    expected, actual = derived_values(expected), derived_values(actual)
+    differs = pd.Series(False, index=expected.index)
+    for col in DERIVED_COLUMNS:
+        differs |= ~((expected[col] == actual[col]) | (expected[col].isna() & actual[col].isna()))
+    if differs.any():
+        print(f"{name}: {int(differs.sum())} row(s) differ")
+        print(pd.concat([expected[differs].head(5), actual[differs].head(5)], keys=['expected', 'actual']).to_string())
+        return False
+    return True
+
+
+# Function to alter the committed history: remove some matchdays and add some played == 0 rows
+def altered_history(history, rng):
+    altered = history.drop(index=history.index[rng.random(len(history)) < 0.05])
+    seasons = rng.choice(history['season'].unique(), 3, replace=False)
+    zero_rows = history[history['season'].isin(seasons)].groupby('season').head(1).assign(played=0, points=0, **{"goals for": 0, "goals against": 0})
+    return pd.concat([altered, zero_rows], ignore_index=True)
+
+
+if __name__ == '__main__':
+    trials = int(sys.argv[1]) if len(sys.argv) >= 2 else DEFAULT_TRIALS
+    committed = pd.read_csv(DATA_FILENAME)
+    history = committed.drop(columns=DERIVED_COLUMNS)
+
+    identical = same_derived_values('committed file', committed, compute_derived_stats(history))
+    identical &= same_derived_values('committed history', row_wise_derived_stats(history), compute_derived_stats(history))
+    rng = np.random.default_rng(0)
+    for trial in range(trials):
+        altered = altered_history(history, rng)
+        identical &= same_derived_values(f"trial {trial}", row_wise_derived_stats(altered), compute_derived_stats(altered))
+
+    if not identical:
+        sys.exit(1)
+    print(f"compute_derived_stats matches {DATA_FILENAME} and the row-wise callbacks in {trials} altered histories.")
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from league_store import LeagueStore
+
+# Builds a synthetic league history: every matchday of `seasons` seasons for a 20-team league with
+# random results, written as a league standings store and as Manchester United's history in the
+# manchester_united_data.csv layout, so manutd.py's stages can be measured on long histories.
+# Run from the repository root:
+#   python benchmarks/league_history_fixture.py standings.npz team_history.csv [seasons]
+TEAM_NAME = 'Manchester United'
+TEAMS = [TEAM_NAME] + [f"Team {letter}" for letter in 'ABCDEFGHIJKLMNOPQRS']
+MATCHDAYS = 38
+LAST_SEASON_START = 2024
+
+
+# Function to play `seasons` seasons ending with LAST_SEASON_START's and return every team's row of every
+# matchday (dictionaries keyed by the store's columns), oldest season first
+def league_history_rows(seasons=50, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for year in range(LAST_SEASON_START - seasons + 1, LAST_SEASON_START + 1):
+        season = f"{year}-{year + 1}"
+        totals = {team: {'won': 0, 'drawn': 0, 'lost': 0, 'goals for': 0, 'goals against': 0} for team in TEAMS}
+        for played in range(1, MATCHDAYS + 1):
+            teams = TEAMS[:]
+            rng.shuffle(teams)
+            for home, away in zip(teams[::2], teams[1::2]):
+                home_goals, away_goals = rng.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]), rng.choice([0, 0, 1, 1, 1, 2, 3])
+                for team, scored, conceded in ((home, home_goals, away_goals), (away, away_goals, home_goals)):
+                    totals[team]['goals for'] += scored
+                    totals[team]['goals against'] += conceded
+                    totals[team]['won' if scored > conceded else 'drawn' if scored == conceded else 'lost'] += 1
+            table = sorted(TEAMS, key=lambda team: (-(3 * totals[team]['won'] + totals[team]['drawn']),
+                                                   -(totals[team]['goals for'] - totals[team]['goals against']),
+                                                   -totals[team]['goals for'], team))
+            for position, team in enumerate(table, start=1):
+                stats = totals[team]
+                rows.append({
+                    'season': season, 'team': team, 'played': played, 'position': position,
+                    'won': stats['won'], 'drawn': stats['drawn'], 'lost': stats['lost'],
+                    'goals for': stats['goals for'], 'goals against': stats['goals against'],
+                    'goal difference': stats['goals for'] - stats['goals against'],
+                    'points': 3 * stats['won'] + stats['drawn'],
+                })
+    return rows
+
+
+# Function to write the store and the team history. Returns the number of store rows.
+def write_league_history(store_filename, team_filename, seasons=50, seed=0):
+    rows = league_history_rows(seasons, seed)
+    if os.path.exists(store_filename):
+        os.remove(store_filename)
+    store = LeagueStore(store_filename)
+    store.upsert(rows)
+    store.save()
+    store.export_team_csv(TEAM_NAME, team_filename)
+    return len(rows)
+
+
+if __name__ == '__main__':
+    store_filename = sys.argv[1] if len(sys.argv) >= 2 else 'standings.npz'
+    team_filename = sys.argv[2] if len(sys.argv) >= 3 else 'team_history.csv'
+    seasons = int(sys.argv[3]) if len(sys.argv) >= 4 else 50
+    print(f"Wrote {write_league_history(store_filename, team_filename, seasons)} league rows to {store_filename} and {team_filename}.")
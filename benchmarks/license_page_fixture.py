@@ -0,0 +1,42 @@
+import os
+import re
+import sys
+
+# Builds a synthetic license list page of any size from the saved island.is page
+# (fixtures/island_taxi_licenses.html), so taxi.py's stages can be measured on tables larger than
+# today's. The page's table rows are repeated; every repeat appends its copy number to Nafn, so
+# each row still has its own license ID. Run from the repository root:
+#   python benchmarks/license_page_fixture.py licenses.html [rows]
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_FILENAME = os.path.join(REPOSITORY_DIRECTORY, 'fixtures', 'island_taxi_licenses.html')
+# The first cell of a row holds Nafn
+FIRST_CELL_TEXT = re.compile(r'(<td[^>]*>(?:<[^>]+>)*?<p[^>]*>)([^<]*)')
+
+
+# Function to write the page with `rows` license rows. Returns the number of rows written.
+def write_license_page(filename, rows=10000):
+    with open(PAGE_FILENAME, 'r', encoding='utf-8') as f:
+        page = f.read()
+    body_start = page.index('>', page.index('<tbody')) + 1
+    body_end = page.index('</tbody>', body_start)
+    page_rows = re.findall(r'<tr.*?</tr>', page[body_start:body_end], flags=re.DOTALL)
+
+    body = []
+    for number in range(rows):
+        copy, row = divmod(number, len(page_rows))
+        if copy == 0:
+            body.append(page_rows[row])
+        else:
+            body.append(FIRST_CELL_TEXT.sub(lambda match: f"{match.group(1)}{match.group(2)} {copy}", page_rows[row], count=1))
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(page[:body_start])
+        f.write(''.join(body))
+        f.write(page[body_end:])
+    return rows
+
+
+if __name__ == '__main__':
+    output_filename = sys.argv[1] if len(sys.argv) >= 2 else 'licenses.html'
+    rows = int(sys.argv[2]) if len(sys.argv) >= 3 else 10000
+    print(f"Wrote {write_license_page(output_filename, rows)} license rows to {output_filename}.")
@@ -0,0 +1,68 @@
+import csv
+import os
+import random
+import sys
+
+# Builds a synthetic Stadfangaskra.csv (national address registry layout, all columns) from the
+# committed icelandic_addresses.csv, so the address scripts can be run and measured offline.
+# Rows are shuffled so street groups span read chunks, some house numbers are repeated as separate
+# registry entries and some dative names are blanked for the back-fill to restore. Run from the
+# repository root:
+#   python benchmarks/stadfangaskra_fixture.py Stadfangaskra.csv [scale] [step]
+# fixtures/Stadfangaskra.csv (used by replay mode) was written with: ... fixtures/Stadfangaskra.csv 1 60
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDRESSES_FILENAME = os.path.join(REPOSITORY_DIRECTORY, 'icelandic_addresses.csv')
+REGISTRY_COLUMNS = ['FID', 'HNITNUM', 'SVFNR', 'BYGGD', 'LANDNR', 'HEINUM', 'FASTEIGNAHEITI', 'MATSNR', 'POSTNR',
+                    'HEITI_NF', 'HEITI_TGF', 'HUSNR', 'BOKST', 'VIDSK', 'SERHEITI', 'DAGS_INN', 'DAGS_LEIDR',
+                    'GAGNA_EIGN', 'TEGHNIT', 'YFIRFARID', 'YFIRF_HEITI', 'ATH', 'NAKV_XY', 'HNIT', 'N_HNIT_WGS84',
+                    'E_HNIT_WGS84', 'NOTNR', 'LM_HEIMILISFANG', 'VEF_BIRTING', 'HUSMERKING']
+
+
+# Function to split an address line ("Amtmannsstígur 2B") into street name and house marking
+def split_house_marking(text):
+    street, _, marking = text.rpartition(' ')
+    if street and marking[:1].isdigit():
+        return street, marking
+    return text, ''
+
+
+# Function to write the synthetic registry; `scale` repeats the address list under new postcodes
+# and `step` keeps only every step-th address (for small fixtures)
+def write_registry(filename, scale=1, seed=0, step=1):
+    rng = random.Random(seed)
+    with open(ADDRESSES_FILENAME, 'r', newline='', encoding='utf-8') as csvfile:
+        addresses = list(csv.DictReader(csvfile))[::step]
+
+    records = []
+    for copy in range(scale):
+        for address in addresses:
+            street_nf, marking = split_house_marking(address['HEITI_NF'])
+            street_tgf, _ = split_house_marking(address['HEITI_TGF'])
+            postnr = int(address['POSTNR']) + 1000 * copy
+            for _ in range(2 if rng.random() < 0.05 else 1):
+                records.append((postnr, street_nf, street_tgf, marking))
+    rng.shuffle(records)
+
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(REGISTRY_COLUMNS)
+        for fid, (postnr, street_nf, street_tgf, marking) in enumerate(records, start=1):
+            svfnr = f"{postnr % 9000:04d}"
+            house_number = ''.join(c for c in marking if c.isdigit())
+            writer.writerow([
+                fid, 10000000 + fid, svfnr, rng.randint(0, 99), 100000 + fid, 1000000 + fid,
+                f"{street_nf} {marking}".strip(), '', postnr,
+                street_nf, '' if rng.random() < 0.03 else street_tgf,
+                house_number, marking[len(house_number):], '', '',
+                '2008-01-01 00:00:00', '', 'Þjóðskrá Íslands', 1, 'J', '', '', '',
+                f"POINT ({356000 + rng.random() * 1000:.3f} {407000 + rng.random() * 1000:.3f})",
+                f"{64 + rng.random():.6f}", f"{-21 - rng.random():.6f}", 'Heimili', 'J', 'J', marking,
+            ])
+    return len(records)
+
+
+if __name__ == '__main__':
+    output_filename = sys.argv[1] if len(sys.argv) >= 2 else 'Stadfangaskra.csv'
+    scale = int(sys.argv[2]) if len(sys.argv) >= 3 else 1
+    step = int(sys.argv[3]) if len(sys.argv) >= 4 else 1
+    print(f"Wrote {write_registry(output_filename, scale, step=step)} registry rows to {output_filename}.")
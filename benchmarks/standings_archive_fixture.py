@@ -0,0 +1,67 @@
+import csv
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from league_history_fixture import league_history_rows
+from standings_file import STORE_COLUMNS
+
+# Builds a synthetic archive of standings for `python manutd.py --backfill`: the league history of
+# league_history_fixture.py (20 teams, 38 matchdays a season), one directory per season. A season holds
+# a saved table page per matchday, in the layout of the saved BBC page (fixtures/bbc_premier_league_table.html);
+# every CSV_EVERY-th season is archived as one CSV file in the store's layout instead. The pages hold the
+# standings table alone: the saved page is 370 KB, and a 30-season archive of whole pages would be 420 MB.
+# Run from the repository root:
+#   python benchmarks/standings_archive_fixture.py archive [seasons]
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_FILENAME = os.path.join(REPOSITORY_DIRECTORY, 'fixtures', 'bbc_premier_league_table.html')
+CSV_EVERY = 5
+ROW_TEMPLATE = ('<tr class="ssrcss-row"><td class="ssrcss-cell"><span class="pos">{position}</span><span class="team">'
+                '<a href="/sport/football/teams/x">{team}</a></span></td>{cells}<td class="ssrcss-form"><ul></ul></td></tr>')
+CELL_TEMPLATE = '<td class="ssrcss-cell">{}</td>'
+
+
+# Function to get the saved page's standings table, split around its data rows: (start, end)
+def table_template():
+    with open(PAGE_FILENAME, 'r', encoding='utf-8') as f:
+        page = f.read()
+    marker = page.index('data-testid="football-table"')
+    table = page[page.rfind('<table', 0, marker):page.index('</table>', marker) + len('</table>')]
+    rows = re.search(r'<tr class="ssrcss-row".*</tr>', table, flags=re.DOTALL)
+    return table[:rows.start()], table[rows.end():]
+
+
+# Function to write the archive. Returns the number of files written.
+def write_standings_archive(directory, seasons=30, seed=0):
+    table_start, table_end = table_template()
+    matchdays = {}
+    for row in league_history_rows(seasons, seed):
+        matchdays.setdefault(row['season'], {}).setdefault(row['played'], []).append(row)
+
+    files = 0
+    for number, (season, season_matchdays) in enumerate(sorted(matchdays.items())):
+        season_directory = os.path.join(directory, season)
+        os.makedirs(season_directory, exist_ok=True)
+        if number % CSV_EVERY == CSV_EVERY - 1:
+            with open(os.path.join(season_directory, 'standings.csv'), 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=STORE_COLUMNS)
+                writer.writeheader()
+                for played in sorted(season_matchdays):
+                    writer.writerows(season_matchdays[played])
+            files += 1
+            continue
+        for played, rows in sorted(season_matchdays.items()):
+            body = ''.join(ROW_TEMPLATE.format(position=row['position'], team=row['team'], cells=''.join(
+                CELL_TEMPLATE.format(row[col]) for col in ['played', 'won', 'drawn', 'lost', 'goals for', 'goals against', 'goal difference', 'points']))
+                for row in sorted(rows, key=lambda row: row['position']))
+            with open(os.path.join(season_directory, f"matchday-{played:02d}.html"), 'w', encoding='utf-8') as f:
+                f.write(f"<html><body>{table_start}{body}{table_end}</body></html>")
+            files += 1
+    return files
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) >= 2 else 'archive'
+    seasons = int(sys.argv[2]) if len(sys.argv) >= 3 else 30
+    print(f"Wrote {write_standings_archive(directory, seasons)} archived standings files to {directory}.")
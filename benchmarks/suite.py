@@ -0,0 +1,288 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import address_index_file
+import manutd
+import stadfangaskra
+import taxi
+from league_history_fixture import write_league_history
+from license_page_fixture import write_license_page
+from stadfangaskra_fixture import write_registry
+
+# Offline benchmark suite for the stages of manutd.py, taxi.py and stadfangaskra.py. Every case runs
+# one stage against saved pages and generated files, in a fresh working directory per repeat, and the
+# median time is compared with benchmarks/baseline.json. Two sizes:
+#   realistic  the saved pages, the committed league history and a registry the size of the real one
+#   large      a 10k-row license table, 50 seasons of league history and a 1M-row address registry
+# Generated fixtures are kept in benchmarks/fixture_cache/ and reused. Run from the repository root:
+#   python benchmarks/suite.py [--size realistic|large] [--repeat N] [--threshold 0.25] [--save-baseline] [case ...]
+# Exits with status 1 when a case is slower than its baseline by more than the threshold.
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARK_DIRECTORY)
+FIXTURE_DIRECTORY = os.path.join(REPOSITORY_DIRECTORY, 'fixtures')
+FIXTURE_CACHE_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, 'fixture_cache')
+BASELINE_FILENAME = os.path.join(BENCHMARK_DIRECTORY, 'baseline.json')
+
+SIZES = {
+    'realistic': {'license_rows': None, 'seasons': None, 'registry_scale': 1, 'repeat': 5},
+    'large': {'license_rows': 10000, 'seasons': 50, 'registry_scale': 8, 'repeat': 3},
+}
+DEFAULT_THRESHOLD = 0.25
+# Differences below this many seconds are timer noise, whatever the ratio
+MIN_DIFFERENCE = 0.005
+# The day the benchmarked taxi scrape is recorded as
+BENCHMARK_DAY = date(2025, 11, 2)
+
+
+# Function to split the last row off a history in the manchester_united_data.csv layout: writes the
+# rest to `head_filename` and returns (season, extracted data for the last row) in the form
+# manutd.extract_team_data returns
+def split_last_team_row(filename, head_filename):
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        rows = list(csv.reader(csvfile))
+    with open(head_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerows(rows[:-1])
+    last = rows[-1]
+    number = lambda value: str(int(float(value)))
+    extracted_data = [number(last[1]), "", last[3], number(last[4]), number(last[5]), number(last[6]), number(last[7]),
+                      number(last[11]), number(last[12]), number(last[9]), number(last[10])]
+    return last[0], extracted_data
+
+
+# Function to get (and generate on first use) the fixture files of a size
+def prepare_fixtures(size):
+    settings = SIZES[size]
+    directory = os.path.join(FIXTURE_CACHE_DIRECTORY, size)
+    os.makedirs(directory, exist_ok=True)
+    fixtures = {'table_page': os.path.join(FIXTURE_DIRECTORY, 'bbc_premier_league_table.html')}
+
+    if settings['license_rows'] is None:
+        fixtures['license_page'] = os.path.join(FIXTURE_DIRECTORY, 'island_taxi_licenses.html')
+    else:
+        fixtures['license_page'] = os.path.join(directory, 'licenses.html')
+        if not os.path.exists(fixtures['license_page']):
+            write_license_page(fixtures['license_page'], settings['license_rows'])
+
+    if settings['seasons'] is None:
+        fixtures['standings'] = os.path.join(REPOSITORY_DIRECTORY, 'premier_league_standings.npz')
+        team_history = os.path.join(REPOSITORY_DIRECTORY, manutd.DATA_FILENAME)
+    else:
+        fixtures['standings'] = os.path.join(directory, 'standings.npz')
+        team_history = os.path.join(directory, 'team_history.csv')
+        if not os.path.exists(fixtures['standings']):
+            write_league_history(fixtures['standings'], team_history, settings['seasons'])
+    fixtures['team_history'] = os.path.join(directory, 'team_history_head.csv')
+    fixtures['season'], fixtures['team_data'] = split_last_team_row(team_history, fixtures['team_history'])
+
+    fixtures['registry'] = os.path.join(directory, 'Stadfangaskra.csv')
+    if not os.path.exists(fixtures['registry']):
+        write_registry(fixtures['registry'], settings['registry_scale'])
+    # The transform's outputs feed the publish and index cases; the previous part b lacks every
+    # 100th address, so publishing finds a small change set as a weekly run would
+    fixtures['trimmed'] = os.path.join(directory, 'trimmed.csv')
+    fixtures['addresses'] = os.path.join(directory, 'addresses.csv')
+    fixtures['previous_addresses'] = os.path.join(directory, 'previous_addresses.csv')
+    if not os.path.exists(fixtures['previous_addresses']):
+        with contextlib.redirect_stdout(io.StringIO()):
+            stadfangaskra.transform_registry(fixtures['registry'], fixtures['trimmed'], fixtures['addresses'])
+        with open(fixtures['addresses'], 'r', encoding='utf-8') as source, open(fixtures['previous_addresses'], 'w', encoding='utf-8') as target:
+            target.writelines(line for number, line in enumerate(source) if number == 0 or number % 100)
+    return fixtures
+
+
+# Function to read a text file (the saved pages)
+def read_text(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# Function to parse the license page once, for the cases that start from parsed rows
+def parsed_licenses(fixtures):
+    with contextlib.redirect_stdout(io.StringIO()):
+        stamp, batch = taxi.parse_licenses(read_text(fixtures['license_page']), BENCHMARK_DAY)
+        return stamp, taxi.build_license_frame(batch)
+
+
+# Each case: (name, setup, run). setup(workdir, fixtures) prepares one repeat outside the timing and
+# returns the arguments for run; run performs exactly one stage.
+
+def setup_taxi_parse(workdir, fixtures):
+    return read_text(fixtures['license_page']), BENCHMARK_DAY
+
+
+def setup_taxi_frame(workdir, fixtures):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return (taxi.parse_licenses(read_text(fixtures['license_page']), BENCHMARK_DAY)[1],)
+
+
+# The summary CSV is exported after the upsert, so each repeat works on a copy of the committed one
+def setup_taxi_summary(workdir, fixtures):
+    db_filename = os.path.join(workdir, 'summary.sqlite')
+    csv_filename = os.path.join(workdir, 'taxi_licenses_summary.csv')
+    shutil.copyfile(os.path.join(REPOSITORY_DIRECTORY, 'taxi_licenses_summary.csv'), csv_filename)
+    with contextlib.redirect_stdout(io.StringIO()):
+        taxi.open_summary_store(db_filename, csv_filename).close()
+    return parsed_licenses(fixtures)[1], BENCHMARK_DAY, db_filename, csv_filename
+
+
+# The previous day is recorded without every 50th license, so the measured day is stored as a delta
+def setup_taxi_snapshot(workdir, fixtures):
+    stamp, new_df = parsed_licenses(fixtures)
+    snapshot_directory = os.path.join(workdir, 'snapshots')
+    previous_rows = new_df[taxi.SNAPSHOT_ROW_COLUMNS].values.tolist()
+    taxi.SnapshotStore(snapshot_directory).record('2025-11-01', stamp, [row for number, row in enumerate(previous_rows) if number % 50])
+    return new_df, BENCHMARK_DAY.isoformat(), stamp, snapshot_directory
+
+
+def setup_manutd_parse(workdir, fixtures):
+    return (read_text(fixtures['table_page']),)
+
+
+def run_manutd_parse(html_content):
+    return manutd.extract_team_data(manutd.find_team_row(manutd.parse_standings(html_content)))
+
+
+def setup_manutd_team_data(workdir, fixtures, full_rebuild=False):
+    filename = os.path.join(workdir, manutd.DATA_FILENAME)
+    shutil.copyfile(fixtures['team_history'], filename)
+    return filename, list(fixtures['team_data']), fixtures['season'], full_rebuild
+
+
+# The aggregates are built from the history without its last row, which is then written as an hourly run would
+def setup_manutd_aggregates(workdir, fixtures):
+    filename, team_data, season, _ = setup_manutd_team_data(workdir, fixtures)
+    aggregates_filename = os.path.join(workdir, 'aggregates.json')
+    with contextlib.redirect_stdout(io.StringIO()):
+        manutd.update_season_aggregates(filename, season, True, aggregates_filename)
+        manutd.update_team_data(filename, team_data, season)
+    return filename, season, False, aggregates_filename
+
+
+def setup_manutd_league_store(workdir, fixtures):
+    filename = os.path.join(workdir, 'standings.npz')
+    shutil.copyfile(fixtures['standings'], filename)
+    with contextlib.redirect_stdout(io.StringIO()):
+        table_rows = manutd.parse_standings(read_text(fixtures['table_page']))
+    return manutd.league_rows_from_table(table_rows, fixtures['season']), filename
+
+
+def setup_stadfangaskra_transform(workdir, fixtures):
+    return fixtures['registry'], os.path.join(workdir, 'trimmed.csv.tmp'), os.path.join(workdir, 'addresses.csv.tmp')
+
+
+def setup_stadfangaskra_publish(workdir, fixtures):
+    names = {name: os.path.join(workdir, name) for name in ('trimmed.csv', 'addresses.csv', 'changes.csv')}
+    shutil.copyfile(fixtures['previous_addresses'], names['addresses.csv'])
+    shutil.copyfile(fixtures['trimmed'], names['trimmed.csv'] + '.tmp')
+    shutil.copyfile(fixtures['addresses'], names['addresses.csv'] + '.tmp')
+    return names['trimmed.csv'] + '.tmp', names['addresses.csv'] + '.tmp', names['trimmed.csv'], names['addresses.csv'], names['changes.csv']
+
+
+def setup_address_index(workdir, fixtures):
+    return fixtures['addresses'], os.path.join(workdir, 'addresses.idx')
+
+
+CASES = [
+    ('taxi.parse', setup_taxi_parse, taxi.parse_licenses),
+    ('taxi.frame', setup_taxi_frame, taxi.build_license_frame),
+    ('taxi.summary', setup_taxi_summary, taxi.update_summary),
+    ('taxi.snapshot', setup_taxi_snapshot, taxi.record_snapshot),
+    ('manutd.parse', setup_manutd_parse, run_manutd_parse),
+    ('manutd.incremental', setup_manutd_team_data, manutd.update_team_data),
+    ('manutd.rebuild', lambda workdir, fixtures: setup_manutd_team_data(workdir, fixtures, True), manutd.update_team_data),
+    ('manutd.aggregates', setup_manutd_aggregates, manutd.update_season_aggregates),
+    ('manutd.league_store', setup_manutd_league_store, manutd.store_league_rows),
+    ('stadfangaskra.transform', setup_stadfangaskra_transform, stadfangaskra.transform_registry),
+    ('stadfangaskra.publish', setup_stadfangaskra_publish, stadfangaskra.publish_outputs),
+    ('addresses.index', setup_address_index, address_index_file.build_index_file),
+]
+
+
+# Function to time one case: the stage's wall time in seconds for every repeat, each in a fresh directory
+def time_case(setup, run, fixtures, repeat):
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            arguments = setup(workdir, fixtures)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                run(*arguments)
+                timings.append(time.perf_counter() - start)
+    return timings
+
+
+# Function to load the stored baseline ({} when there is none yet)
+def load_baseline(filename=BASELINE_FILENAME):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Function to store the medians of a size in the baseline, keeping the other size's results
+def save_baseline(size, medians, filename=BASELINE_FILENAME):
+    baseline = load_baseline(filename)
+    baseline['python'] = platform.python_version()
+    baseline['machine'] = platform.machine()
+    baseline.setdefault(size, {}).update({name: round(seconds, 6) for name, seconds in medians.items()})
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+# Function to tell whether a median is a regression against its baseline
+def is_regression(seconds, baseline_seconds, threshold=DEFAULT_THRESHOLD):
+    return seconds > baseline_seconds * (1 + threshold) and seconds - baseline_seconds > MIN_DIFFERENCE
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline benchmarks of the scraping pipelines')
+    parser.add_argument('cases', nargs='*', help='case names or prefixes (e.g. taxi, manutd.rebuild); all by default')
+    parser.add_argument('--size', choices=sorted(SIZES), default='realistic')
+    parser.add_argument('--repeat', type=int, help='repeats per case (default 5 realistic, 3 large)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed slowdown over the baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline instead of comparing')
+    args = parser.parse_args()
+
+    selected = [case for case in CASES if not args.cases or any(case[0] == name or case[0].startswith(name + '.') for name in args.cases)]
+    repeat = args.repeat or SIZES[args.size]['repeat']
+    print(f"Preparing {args.size} fixtures in {FIXTURE_CACHE_DIRECTORY} ...")
+    fixtures = prepare_fixtures(args.size)
+    baseline = load_baseline().get(args.size, {})
+
+    medians = {}
+    regressions = []
+    print(f"{'case':<26} {'median ms':>10} {'min ms':>10} {'baseline ms':>12} {'change':>8}")
+    for name, setup, run in selected:
+        timings = time_case(setup, run, fixtures, repeat)
+        medians[name] = statistics.median(timings)
+        line = f"{name:<26} {medians[name] * 1000:>10.1f} {min(timings) * 1000:>10.1f}"
+        if name in baseline and not args.save_baseline:
+            change = medians[name] / baseline[name] - 1
+            flag = ''
+            if is_regression(medians[name], baseline[name], args.threshold):
+                regressions.append(name)
+                flag = '  REGRESSION'
+            line += f" {baseline[name] * 1000:>12.1f} {change:>+8.0%}{flag}"
+        print(line, flush=True)
+
+    if args.save_baseline:
+        save_baseline(args.size, medians)
+        print(f"Baseline for {args.size} saved to {BASELINE_FILENAME}.")
+    elif regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    else:
+        print("No regressions.")
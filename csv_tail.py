@@ -0,0 +1,115 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+# Size of the chunks read backwards from the end of the file
+TAIL_BLOCK_SIZE = 4096
+
+# Suffix of the sidecar file holding the size of a CSV file and the hash of its last row
+LAST_ROW_INDEX_SUFFIX = '.last'
+
+
+# Function to read the last data rows of a CSV file without reading the whole file.
+# Seeks backwards from end-of-file one block at a time until enough complete lines are found.
+# Returns a list of (byte offset, row) tuples, oldest first; the header line (offset 0) is never returned.
+# Assumes no field contains an embedded newline, which holds for every CSV written by these scripts.
+def read_last_rows(filename, count=1):
+    if not os.path.exists(filename) or os.stat(filename).st_size == 0:
+        return []
+
+    with open(filename, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        data = b''
+        # Read until the buffer holds count + 1 line breaks (the extra one bounds the oldest line)
+        while position > 0 and data.count(b'\n') <= count + 1:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    # Split into lines while keeping track of where each one starts in the file
+    lines = []
+    line_start = position
+    for raw_line in data.split(b'\n'):
+        lines.append((line_start, raw_line))
+        line_start += len(raw_line) + 1
+    # The first piece may be a partial line unless we reached the start of the file
+    if position > 0:
+        lines = lines[1:]
+    lines = [(offset, raw_line) for offset, raw_line in lines if raw_line.strip(b'\r') and offset > 0]
+
+    rows = []
+    for offset, raw_line in lines[-count:]:
+        row = next(csv.reader([raw_line.decode('utf-8').rstrip('\r')]), [])
+        rows.append((offset, row))
+    return rows
+
+
+# Function to replace everything from the given byte offset onwards with the given rows
+def replace_rows_from(filename, offset, rows):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerows(rows)
+    with open(filename, 'r+b') as f:
+        f.seek(offset)
+        f.truncate()
+        f.write(buffer.getvalue().encode('utf-8'))
+
+
+# Function to append rows to the end of a CSV file
+def append_rows(filename, rows):
+    with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerows(rows)
+
+
+# Function to hash a row the way it is written to the file
+def row_hash(row):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerow(row)
+    return hashlib.sha256(buffer.getvalue().encode('utf-8')).hexdigest()
+
+
+# Function to read the sidecar index; only trusted while the file still has the recorded size
+def read_last_row_index(filename):
+    try:
+        with open(filename + LAST_ROW_INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(filename) or index.get('size') != os.stat(filename).st_size:
+        return None
+    return index.get('last_row_hash')
+
+
+def write_last_row_index(filename, last_row):
+    with open(filename + LAST_ROW_INDEX_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump({'size': os.stat(filename).st_size, 'last_row_hash': row_hash(last_row)}, f)
+        f.write('\n')
+
+
+# Function to append a row unless it equals the current last row, at a cost independent of file length.
+# The last row's hash comes from the sidecar index, or from a backwards seek when the index is missing
+# or stale. The header is written first when the file is new or empty. Returns True if the row was appended.
+def append_row_if_changed(filename, header, row):
+    row = [str(value) for value in row]
+    file_exists_and_not_empty = os.path.exists(filename) and os.stat(filename).st_size > 0
+
+    last_hash = read_last_row_index(filename) if file_exists_and_not_empty else None
+    if last_hash is None and file_exists_and_not_empty:
+        last_rows = read_last_rows(filename, 1)
+        if last_rows:
+            last_hash = row_hash(last_rows[-1][1])
+
+    if last_hash == row_hash(row):
+        if read_last_row_index(filename) is None:
+            write_last_row_index(filename, row)
+        return False
+
+    rows = [row] if file_exists_and_not_empty else [header, row]
+    append_rows(filename, rows)
+    write_last_row_index(filename, row)
+    return True
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP client for the scrapers: one pooled session, connect/read timeouts, retries with
+# jittered exponential backoff, an optional on-disk response cache with a time-to-live, and a
+# replay mode that answers from recorded files instead of the network.
+#   FETCH_CACHE_TTL=<seconds>  reuse cached 200 responses younger than this (0 = off, the default)
+#   FETCH_REPLAY_DIR=<dir>     serve every URL from <dir> (see replay.json there), e.g. FETCH_REPLAY_DIR=fixtures
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CACHE_DIRECTORY = os.environ.get('FETCH_CACHE_DIR', '.fetch_cache')
+CACHE_TTL = float(os.environ.get('FETCH_CACHE_TTL', '0'))
+REPLAY_DIRECTORY = os.environ.get('FETCH_REPLAY_DIR')
+REPLAY_MAP_FILENAME = 'replay.json'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# Function to get the shared session; connections are pooled and reused across requests, including
+# by the jobs runner.py runs concurrently on separate threads
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+    return _session
+
+
+# Function to build a Response object from stored bytes (used by the cache and replay mode)
+def stored_response(url, status_code, content, headers):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers.update(headers)
+    response._content = content
+    response._content_consumed = True
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+    return response
+
+
+# Function to find the recorded file for a URL in a replay directory: replay.json maps URLs to file
+# names; otherwise the last part of the URL path is used
+def replay_filename(url, directory):
+    map_path = os.path.join(directory, REPLAY_MAP_FILENAME)
+    if os.path.exists(map_path):
+        with open(map_path, 'r', encoding='utf-8') as f:
+            replay_map = json.load(f)
+        if url in replay_map:
+            return os.path.join(directory, replay_map[url])
+    return os.path.join(directory, os.path.basename(urlparse(url).path) or 'index.html')
+
+
+# Function to answer a request from a replay directory, honouring If-None-Match like a real server
+def replay_response(url, headers, directory):
+    filename = replay_filename(url, directory)
+    if not os.path.exists(filename):
+        return stored_response(url, 404, b'', {})
+    with open(filename, 'rb') as f:
+        content = f.read()
+    etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+    if headers.get('If-None-Match') == etag:
+        return stored_response(url, 304, b'', {'ETag': etag})
+    content_type = 'text/csv; charset=utf-8' if filename.endswith('.csv') else 'text/html; charset=utf-8'
+    return stored_response(url, 200, content, {'ETag': etag, 'Content-Type': content_type})
+
+
+# Function to get the cache file paths (body, metadata) for a URL
+def cache_paths(url, directory=CACHE_DIRECTORY):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(directory, key + '.body'), os.path.join(directory, key + '.json')
+
+
+# Function to load a cached 200 response younger than `ttl` seconds, or None
+def cached_response(url, ttl, directory=CACHE_DIRECTORY):
+    body_path, meta_path = cache_paths(url, directory)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if time.time() - meta['fetched_at'] > ttl:
+            return None
+        with open(body_path, 'rb') as f:
+            return stored_response(url, 200, f.read(), meta['headers'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# Function to store a 200 response in the cache
+def store_response(url, response, directory=CACHE_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    body_path, meta_path = cache_paths(url, directory)
+    with open(body_path + '.tmp', 'wb') as f:
+        f.write(response.content)
+    os.replace(body_path + '.tmp', body_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'fetched_at': time.time(), 'headers': dict(response.headers)}, f)
+
+
+# Function to wait before retry number `attempt` (0-based): exponential backoff with jitter,
+# or the server's Retry-After when it gives one in seconds
+def backoff_delay(attempt, response=None):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+# Function to GET a URL through the shared session with timeouts and retries.
+# Connection errors, timeouts and 429/5xx answers are retried up to MAX_RETRIES times; the last
+# response is returned (or the last error raised) when every attempt fails.
+# `cache_ttl` (seconds) reuses a fresh cached 200 response; streamed downloads are never cached.
+def fetch(url, headers=None, stream=False, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), cache_ttl=None):
+    headers = headers or {}
+    if REPLAY_DIRECTORY:
+        return replay_response(url, headers, REPLAY_DIRECTORY)
+    cache_ttl = CACHE_TTL if cache_ttl is None else cache_ttl
+    use_cache = cache_ttl > 0 and not stream
+    if use_cache:
+        response = cached_response(url, cache_ttl)
+        if response is not None:
+            print(f"Using cached response for {url}.")
+            return response
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = get_session().get(url, headers=headers, stream=stream, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"Request to {url} failed ({e.__class__.__name__}); retrying in {delay:.1f} s.")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            delay = backoff_delay(attempt, response)
+            print(f"Request to {url} answered {response.status_code}; retrying in {delay:.1f} s.")
+            response.close()
+        time.sleep(delay)
+
+    if use_cache and response.status_code == 200:
+        store_response(url, response)
+    return response
+
+
+# Function to load the saved fetch state (validators and content fingerprint) for a URL
+def load_fetch_state(state_filename, url):
+    if not os.path.exists(state_filename):
+        return {}
+    try:
+        with open(state_filename, 'r', encoding='utf-8') as f:
+            return json.load(f).get(url, {})
+    except (ValueError, OSError) as e:
+        print(f"Error reading fetch state {state_filename}: {e}")
+        return {}
+
+
+# Function to save the fetch state for a URL, keeping entries for other URLs
+def save_fetch_state(state_filename, url, state):
+    all_states = {}
+    if os.path.exists(state_filename):
+        try:
+            with open(state_filename, 'r', encoding='utf-8') as f:
+                all_states = json.load(f)
+        except (ValueError, OSError):
+            all_states = {}
+    all_states[url] = state
+    with open(state_filename, 'w', encoding='utf-8') as f:
+        json.dump(all_states, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+# Function to send a conditional GET using the ETag / Last-Modified validators from the saved state.
+# A 304 response means the page has not changed since the state was saved.
+def conditional_get(url, state, stream=False):
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    return fetch(url, headers=headers, stream=stream)
+
+
+# Function to build the state to save after a successful fetch
+def fetch_state_from_response(response, fingerprint):
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fingerprint': fingerprint,
+    }
+
+
+# Function to fingerprint extracted content so unchanged content can be detected cheaply
+def content_fingerprint(text):
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# Function to keep a local copy of a large download up to date without holding it in memory.
+# The body is streamed to disk in blocks and only replaces the cached copy once complete; a 304
+# (or a failed request while a cached copy exists) keeps the cached copy.
+# Returns True when the cached copy was refreshed.
+def download_to_cache(url, cache_filename, state_filename, block_size=1 << 20):
+    state = load_fetch_state(state_filename, url) if os.path.exists(cache_filename) else {}
+    try:
+        response = conditional_get(url, state, stream=True)
+    except requests.RequestException as e:
+        if os.path.exists(cache_filename):
+            print(f"Download of {url} failed ({e}); using the cached copy {cache_filename}.")
+            return False
+        raise
+    with response:
+        if response.status_code == 304:
+            print(f"{url} not modified; using the cached copy {cache_filename}.")
+            return False
+        if response.status_code != 200:
+            if os.path.exists(cache_filename):
+                print(f"Download of {url} failed with status {response.status_code}; using the cached copy {cache_filename}.")
+                return False
+            response.raise_for_status()
+            raise requests.HTTPError(f"Unexpected status {response.status_code} for {url}")
+        cache_directory = os.path.dirname(cache_filename)
+        if cache_directory:
+            os.makedirs(cache_directory, exist_ok=True)
+        temp_filename = cache_filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            for block in response.iter_content(block_size):
+                f.write(block)
+        os.replace(temp_filename, cache_filename)
+    save_fetch_state(state_filename, url, fetch_state_from_response(response, None))
+    print(f"Downloaded {url} to {cache_filename}.")
+    return True
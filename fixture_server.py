@@ -0,0 +1,61 @@
+import hashlib
+import os
+import sys
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the scraped sites, serving saved pages from a fixtures directory.
+# Responses carry ETag and Last-Modified headers and honour If-None-Match / If-Modified-Since,
+# so conditional fetches can be exercised offline, e.g.:
+#   python fixture_server.py fixtures 8000
+#   MANUTD_URL=http://127.0.0.1:8000/bbc_premier_league_table.html python manutd.py
+# An optional delay (seconds) before every response stands in for the latency of the real sites:
+#   python fixture_server.py fixtures 8000 0.5
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, delay=0, **kwargs):
+        self.delay = delay
+        super().__init__(*args, **kwargs)
+
+    # Function to answer with 304 when the client's ETag matches the file on disk
+    def send_head(self):
+        if self.delay:
+            time.sleep(self.delay)
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                etag = '"' + hashlib.sha256(f.read()).hexdigest()[:32] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        etag = getattr(self, '_etag', None)
+        if etag:
+            self.send_header('ETag', etag)
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        print(f"fixture_server: {format % args}")
+
+
+# Function to create a server for the fixtures directory (port 0 picks a free port)
+def make_fixture_server(directory, port=0, host='127.0.0.1', delay=0):
+    handler = partial(FixtureRequestHandler, directory=directory, delay=delay)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    fixtures_directory = sys.argv[1] if len(sys.argv) > 1 else 'fixtures'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    server = make_fixture_server(fixtures_directory, port, delay=delay)
+    print(f"Serving {fixtures_directory} on http://127.0.0.1:{server.server_address[1]}/")
+    server.serve_forever()
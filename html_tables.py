@@ -0,0 +1,149 @@
+import re
+from html.parser import HTMLParser
+
+# Matches an opening <p> tag (and not <path>, <pre>, <param>, ...)
+P_OPEN_TAG = re.compile(r'<p[\s>]', re.IGNORECASE)
+
+
+# Function to cut the markup of a single table out of a page without parsing the page.
+# `marker` is any attribute text unique to the opening tag, e.g. 'data-testid="football-table"'.
+# Returns None when the marker or the closing tag cannot be found.
+def table_markup(html, marker):
+    marker_index = html.find(marker)
+    if marker_index == -1:
+        return None
+    start = html.rfind('<table', 0, marker_index)
+    end = html.find('</table>', marker_index)
+    if start == -1 or end == -1:
+        return None
+    return html[start:end + len('</table>')]
+
+
+# Streaming parser that keeps only the rows of one table and builds no document tree.
+# Cell text matches BeautifulSoup's get_text(strip=True): every text piece is stripped and joined.
+class TableRowParser(HTMLParser):
+    def __init__(self, attrs=None):
+        super().__init__(convert_charrefs=True)
+        self.match_attrs = attrs or {}
+        self.rows = []
+        self.table_depth = 0  # nesting depth inside the matched table (0 = outside)
+        self.done = False
+        self.current_row = None
+        self.current_cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            if self.table_depth:
+                self.table_depth += 1
+            elif all(dict(attrs).get(key) == value for key, value in self.match_attrs.items()):
+                self.table_depth = 1
+            return
+        # Rows of nested tables are not rows of the matched table
+        if self.table_depth != 1:
+            return
+        if tag == 'tr':
+            self.close_row()
+            self.current_row = []
+        elif tag in ('td', 'th') and self.current_row is not None:
+            self.close_cell()
+            self.current_cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self.table_depth:
+            return
+        if tag == 'table':
+            self.table_depth -= 1
+            if not self.table_depth:
+                self.close_row()
+                self.done = True
+        elif self.table_depth == 1:
+            if tag in ('td', 'th'):
+                self.close_cell()
+            elif tag == 'tr':
+                self.close_row()
+
+    def handle_data(self, data):
+        if self.current_cell is not None:
+            text = data.strip()
+            if text:
+                self.current_cell.append(text)
+
+    def close_cell(self):
+        if self.current_cell is not None and self.current_row is not None:
+            self.current_row.append(''.join(self.current_cell))
+        self.current_cell = None
+
+    def close_row(self):
+        self.close_cell()
+        if self.current_row is not None:
+            self.rows.append(tuple(self.current_row))
+        self.current_row = None
+
+
+# Streaming parser that collects the stripped text pieces of a fragment
+class TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces = []
+
+    def handle_data(self, data):
+        text = data.strip()
+        if text:
+            self.pieces.append(text)
+
+
+# Function to extract the rows of one table as tuples of cell texts (header row included).
+# `attrs` selects the table by exact attribute values, e.g. {'data-testid': 'football-table'};
+# without attrs the first table on the page is used. Only the table's own markup is parsed when
+# it can be located with a plain string search; otherwise the whole page is streamed through the parser.
+# Returns None when no matching table is found.
+def extract_table_rows(html, attrs=None):
+    markup = None
+    if attrs:
+        key, value = next(iter(attrs.items()))
+        markup = table_markup(html, f'{key}="{value}"')
+    else:
+        start = html.find('<table')
+        end = html.find('</table>', start)
+        if start != -1 and end != -1:
+            markup = html[start:end + len('</table>')]
+
+    # The slice is only trusted when it holds the complete table (nested tables end the slice early)
+    if markup:
+        parser = TableRowParser(attrs)
+        parser.feed(markup)
+        parser.close()
+        if parser.done:
+            return parser.rows
+
+    parser = TableRowParser(attrs)
+    parser.feed(html)
+    parser.close()
+    if parser.table_depth:
+        parser.close_row()
+    elif not parser.done:
+        return None
+    return parser.rows
+
+
+# Function to get the text of the last <p> element that starts before `marker`,
+# the same element BeautifulSoup's find_previous('p') returns for the tag containing `marker`.
+# Returns None when the marker or a preceding <p> cannot be found.
+def text_of_previous_p(html, marker):
+    marker_index = html.find(marker)
+    if marker_index == -1:
+        return None
+    start = None
+    for match in P_OPEN_TAG.finditer(html, 0, marker_index):
+        start = match.start()
+    if start is None:
+        return None
+    end = html.find('</p>', start)
+    if end == -1 or end > marker_index:
+        end = marker_index
+    parser = TextParser()
+    parser.feed(html[start:end])
+    parser.close()
+    return ''.join(parser.pieces)
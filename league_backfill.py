@@ -0,0 +1,246 @@
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from html_tables import extract_table_rows
+from matchday_stats import derive_next_row
+from pipeline_metrics import call_capturing_output
+from season_aggregates import refresh_aggregates, AGGREGATES_FILENAME
+from standings_file import upsert_store_file, STORE_FILENAME
+from standings_rows import league_rows_from_table, team_data_row, DATA_FILENAME, DATA_HEADER, TEAM_NAME
+
+# Backfill of the league history from an archive of standings, instead of one hourly scrape at a time:
+#   python manutd.py --backfill <archive directory> [--workers N]
+# The archive holds saved table pages (.html, as manutd.py fetches them) and CSV files, in any layout of
+# subdirectories; a file's season is the first "yyyy-yyyy" in its path (e.g. archive/2019-2020/md05.html).
+# A CSV file has a header row naming its columns: team, played, won, drawn, lost, points and either
+# 'goals for' and 'goals against' or 'goals' ("for:against"); season, position and goal difference are
+# optional, and rows of another season than the file's are left out. The store's CSV layout and
+# manchester_united_data.csv's both qualify.
+# Each season is parsed and its team history derived in a process pool, one task per season. The results
+# are then merged in season order, so the store and manchester_united_data.csv come out the same whatever
+# the number of workers: every team's rows go into the league standings store in one upsert, and the
+# team's rows of the backfilled seasons replace theirs in manchester_united_data.csv, with the derived
+# columns recomputed over the whole season; their aggregates (season_aggregates.py) are refreshed.
+# Within a season, a later file (in path order) wins.
+ARCHIVE_SEASON = re.compile(r'(\d{4})-(\d{4})')
+PAGE_EXTENSIONS = ('.html', '.htm')
+CSV_EXTENSIONS = ('.csv',)
+
+
+# Function to list the archive's pages and CSV files by season: {season: [paths in order]}. Files
+# without a season in their path are reported and left out; files of other types are ignored.
+def archive_files(directory):
+    files = {}
+    for root, directories, names in os.walk(directory):
+        directories.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if not name.lower().endswith(PAGE_EXTENSIONS + CSV_EXTENSIONS):
+                continue
+            match = ARCHIVE_SEASON.search(os.path.relpath(path, directory))
+            if not match:
+                print(f"Skipping {path}: no season (yyyy-yyyy) in its path")
+                continue
+            files.setdefault(match.group(0), []).append(path)
+    return files
+
+
+# Function to read a count from a page or CSV cell ("7", "7.0")
+def number(value):
+    return int(float(value))
+
+
+# Function to read a row's played count for sorting; rows without one sort last
+def played_order(row):
+    try:
+        return 0, number(row[4])
+    except (TypeError, ValueError):
+        return 1, 0
+
+
+# Function to keep the existing team rows the derived columns can be computed from: played, points, goals
+# for and goals against must be counts. Other rows are reported and left out of the rebuilt season.
+def usable_team_rows(team_rows):
+    usable = []
+    for row in team_rows:
+        try:
+            for col in (4, 10, 11, 12):
+                number(row[col])
+        except (IndexError, TypeError, ValueError) as e:
+            print(f"Skipping team history row {row}: {e}")
+            continue
+        usable.append(row)
+    return usable
+
+
+# Function to read the league rows of an archived CSV file (store row dictionaries)
+def league_rows_from_csv(filename, season_string):
+    league_rows = []
+    other_seasons = 0
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row.get('season') and row['season'] != season_string:
+                other_seasons += 1
+                continue
+            try:
+                if row.get('goals for') not in (None, ''):
+                    goals_for, goals_against = number(row['goals for']), number(row['goals against'])
+                else:
+                    goals_for, goals_against = (number(goals) for goals in row['goals'].split(':'))
+                difference = row.get('goal difference')
+                league_rows.append({
+                    "season": season_string,
+                    "team": row['team'].strip(),
+                    "played": number(row['played']),
+                    "position": number(row['position']) if row.get('position') else 0,
+                    "won": number(row['won']),
+                    "drawn": number(row['drawn']),
+                    "lost": number(row['lost']),
+                    "goals for": goals_for,
+                    "goals against": goals_against,
+                    "goal difference": number(difference) if difference not in (None, '') else goals_for - goals_against,
+                    "points": number(row['points']),
+                })
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping row of {filename} {row}: {e}")
+    if other_seasons:
+        print(f"Skipping {other_seasons} rows of {filename} from other seasons than {season_string}")
+    return league_rows
+
+
+# Function to read the league rows of one archived file. A page's standings table is found as
+# manutd.parse_standings finds it (the football table, else the first table), without its messages.
+def league_rows_from_file(filename, season_string):
+    if filename.lower().endswith(CSV_EXTENSIONS):
+        return league_rows_from_csv(filename, season_string)
+    with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+        html_content = f.read()
+    table_rows = extract_table_rows(html_content, {'data-testid': 'football-table'})
+    if table_rows is None:
+        table_rows = extract_table_rows(html_content)
+    return league_rows_from_table(table_rows, season_string)
+
+
+# Function to build the team's manchester_united_data.csv row (without the derived columns) from a store row
+def team_row_from_league_row(league_row):
+    extracted_data = [str(league_row["position"] or ''), "", league_row["team"]]
+    extracted_data += [league_row[col] for col in ["played", "won", "drawn", "lost", "goals for", "goals against", "goal difference", "points"]]
+    return team_data_row(extracted_data, league_row["season"])
+
+
+# Function to add the derived columns to a season's team rows (in played order). Each matchday is derived
+# from the one before it, as the hourly update does; a season with gaps is derived with
+# compute_derived_stats instead, like a full rebuild.
+def with_derived_columns(team_rows):
+    derived_rows = []
+    previous = None
+    for row in team_rows:
+        stats = {'played': number(row[4]), 'points': number(row[10]), 'goals for': number(row[11]), 'goals against': number(row[12])}
+        derived = derive_next_row(stats, previous)
+        if derived is None:
+            return with_rebuilt_derived_columns(team_rows)
+        derived_rows.append(list(row[:14]) + [derived[col] for col in DATA_HEADER[14:]])
+        previous = dict(stats, **derived)
+    return derived_rows
+
+
+# Function to add the derived columns to a season's team rows with the vectorized pass (pandas)
+def with_rebuilt_derived_columns(team_rows):
+    import pandas as pd
+    from league_stats import compute_derived_stats
+    frame = compute_derived_stats(pd.DataFrame([row[:14] for row in team_rows], columns=DATA_HEADER[:14]))
+    derived_rows = []
+    for row, (_, derived) in zip(team_rows, frame[DATA_HEADER[14:]].iterrows()):
+        derived_rows.append(list(row[:14]) + [
+            derived['last result'] if pd.notna(derived['last result']) else '',
+            derived['form'] if pd.notna(derived['form']) else '',
+        ] + [int(derived[col]) if pd.notna(derived[col]) else 0 for col in ["gf", "ga", "games scored in", "clean sheets"]])
+    return derived_rows
+
+
+# Function to backfill one season (runs in the pool's workers): read its archived files, then rebuild the
+# team's rows of the season from the archive and the rows already in manchester_united_data.csv.
+# Returns (league rows, team rows with the derived columns, or None when the archive lacks the team).
+def backfill_season(season_string, filenames, existing_team_rows, team_name=TEAM_NAME):
+    latest = {}
+    for filename in filenames:
+        file_rows = league_rows_from_file(filename, season_string)
+        if not file_rows:
+            print(f"No standings found in {filename}")
+        for league_row in file_rows:
+            latest[(league_row["team"], league_row["played"])] = league_row
+    league_rows = [latest[key] for key in sorted(latest)]
+
+    archived_team_rows = {row["played"]: team_row_from_league_row(row) for row in league_rows if row["team"] == team_name}
+    if not archived_team_rows:
+        return league_rows, None
+    team_rows = {number(row[4]): row for row in usable_team_rows(existing_team_rows)}
+    team_rows.update(archived_team_rows)
+    return league_rows, with_derived_columns([team_rows[played] for played in sorted(team_rows)])
+
+
+# Function to read manchester_united_data.csv's rows (None when its header is not DATA_HEADER)
+def read_team_rows(filename):
+    if not os.path.exists(filename) or os.stat(filename).st_size == 0:
+        return []
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        rows = list(csv.reader(csvfile))
+    if rows[0] != DATA_HEADER:
+        return None
+    return rows[1:]
+
+
+# Function to backfill the archive's seasons with `workers` processes (inline with one).
+# Returns True when the store and manchester_united_data.csv were written.
+def backfill(directory, workers=None, data_filename=DATA_FILENAME, store_filename=STORE_FILENAME, team_name=TEAM_NAME, aggregates_filename=AGGREGATES_FILENAME):
+    workers = workers or os.cpu_count() or 1
+    files = archive_files(directory)
+    if not files:
+        print(f"No archived standings found in {directory}.")
+        return False
+    existing_rows = read_team_rows(data_filename)
+    if existing_rows is None:
+        print(f"Unexpected header in {data_filename}. Nothing backfilled.")
+        return False
+
+    seasons = sorted(files)
+    tasks = [(season, files[season], [row for row in existing_rows if row[0] == season], team_name) for season in seasons]
+    print(f"Backfilling {len(seasons)} season(s) from {sum(len(paths) for paths in files.values())} file(s) with {min(workers, len(seasons))} worker process(es).")
+    if workers > 1 and len(seasons) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(seasons))) as executor:
+            futures = [executor.submit(call_capturing_output, backfill_season, *task) for task in tasks]
+            results = [future.result() for future in futures]
+    else:
+        results = [call_capturing_output(backfill_season, *task) for task in tasks]
+
+    # Merge in season order; the workers' output is printed in the same order
+    league_rows = []
+    team_rows = {}
+    for row in existing_rows:
+        team_rows.setdefault(row[0], []).append(row)
+    for season, ((season_league_rows, season_team_rows), output) in zip(seasons, results):
+        print(output, end='')
+        league_rows.extend(season_league_rows)
+        if season_team_rows is not None:
+            team_rows[season] = season_team_rows
+        print(f"{season}: {len(season_league_rows)} team rows, {len(season_team_rows or [])} rows for {team_name}")
+
+    if not league_rows:
+        print("No team rows found in the archive. Nothing backfilled.")
+        return False
+    stored = upsert_store_file(store_filename, league_rows)
+    print(f"{len(league_rows)} team rows backfilled into {store_filename} ({stored} rows).")
+
+    temp_filename = data_filename + ".tmp"
+    with open(temp_filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(DATA_HEADER)
+        for season in sorted(team_rows):
+            writer.writerows(sorted(team_rows[season], key=played_order))
+    os.replace(temp_filename, data_filename)
+    print(f"{team_name}'s history in {data_filename} rebuilt for the backfilled seasons.")
+    changed = refresh_aggregates(data_filename, seasons, aggregates_filename)
+    print(f"Aggregates of {len(changed)} season(s) updated in {aggregates_filename}.")
+    return True
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# The single-matchday derivation lives in matchday_stats.py (standard library only), so the hourly
+# update can use it without loading pandas; it is re-exported here with the column definitions.
+from matchday_stats import DERIVED_COLUMNS, FORM_LENGTH, derive_next_row
+
+
+# Function to compute the derived columns for every row of the given seasons in one vectorized pass.
+# Each matchday is compared with the previous matchday of the same season (played - 1), found with a
+# grouped shift over the frame sorted by season and played. Rows of other seasons are returned untouched,
+# so an hourly update only pays for the season that changed (a single new matchday uses derive_next_row).
+# `by` lists the columns identifying one team's season; pass ['team', 'season'] for a whole league.
+def compute_derived_stats(df, seasons=None, by=('season',)):
+    by = list(by)
+    df = df.copy()
+    for col in DERIVED_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+
+    # Ensure necessary columns are numeric for calculations
+    for col in ["played", "points", "goals for", "goals against", "gf", "ga", "games scored in", "clean sheets"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    # String columns may arrive as all-NaN floats when the file has no history yet
+    for col in ["last result", "form"]:
+        df[col] = df[col].astype(object)
+
+    # Recompute the requested seasons plus any season with missing indicator values (e.g. a new column)
+    if seasons is None:
+        target_mask = pd.Series(True, index=df.index)
+    else:
+        incomplete = df[["gf", "ga", "games scored in", "clean sheets"]].isna().any(axis=1)
+        target_mask = df["season"].isin(list(seasons)) | df["season"].isin(df.loc[incomplete, "season"].unique())
+    if not target_mask.any():
+        return df
+
+    # Work on the target seasons sorted by season and played (missing played values last)
+    work = df.loc[target_mask, list(dict.fromkeys(by + ["season", "played", "points", "goals for", "goals against"]))]
+    work = work.sort_values(by=by + ["played"], kind="stable")
+    played = work["played"]
+    group = work.groupby(by, sort=False).ngroup()
+    by_group = work.groupby(group, sort=False)
+
+    # The previous row only counts if it is the previous matchday of the same season
+    prev = by_group[["played", "points", "goals for", "goals against"]].shift(1)
+    has_prev = prev["played"] == played - 1
+    first_game = played == 1
+    counted = played.notna() & (played != 0)
+
+    # 'last result': W/D/L from the points gained since the previous matchday
+    point_diff = work["points"].where(first_game, work["points"] - prev["points"])
+    last_result = pd.Series(np.select([point_diff == 3, point_diff == 1], ["W", "D"], "L"), index=work.index, dtype=object)
+    last_result = last_result.where(counted & (first_game | has_prev), "")
+
+    # 'gf' / 'ga': 1 if goals were scored / conceded in this matchday
+    gf = np.where(first_game, work["goals for"] != 0, work["goals for"] > prev["goals for"])
+    ga = np.where(first_game, work["goals against"] > 0, work["goals against"] > prev["goals against"])
+    gf = pd.Series(gf, index=work.index).where(counted & (first_game | has_prev), False).astype(int)
+    ga = pd.Series(ga, index=work.index).where(counted & (first_game | has_prev), False).astype(int)
+
+    # 'form': results of the matchdays within the last FORM_LENGTH played values, joined with hyphens
+    form = pd.Series("", index=work.index, dtype=object)
+    started = pd.Series(False, index=work.index)
+    window_start = (played - (FORM_LENGTH - 1)).clip(lower=1)
+    shifted_results = last_result.groupby(group, sort=False)
+    for k in range(FORM_LENGTH - 1, -1, -1):
+        if k == 0:
+            part, part_played = last_result, played
+        else:
+            part = shifted_results.shift(k)
+            part_played = by_group["played"].shift(k)
+        include = counted & (part_played >= window_start)
+        form = form.where(~include, np.where(started, form + "-" + part.fillna(""), part.fillna("")))
+        started = started | include
+    form = form.where(counted, "")
+
+    # 'games scored in' / 'clean sheets': running counts, restarted at each season or at played == 1
+    valid = played.notna()
+    restart = (group != group.where(valid).ffill().shift(1)) | first_game
+    segment = restart[valid].cumsum()
+    games_scored_in = (gf[valid] == 1).astype(int).groupby(segment).cumsum()
+    clean_sheets = (ga[valid] == 0).astype(int).groupby(segment).cumsum()
+
+    df.loc[work.index, "last result"] = last_result
+    df.loc[work.index, "form"] = form
+    df.loc[work.index, "gf"] = gf
+    df.loc[work.index, "ga"] = ga
+    df.loc[work.index, "games scored in"] = games_scored_in.reindex(work.index)
+    df.loc[work.index, "clean sheets"] = clean_sheets.reindex(work.index)
+    return df
@@ -0,0 +1,158 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from league_stats import compute_derived_stats, DERIVED_COLUMNS
+from standings_file import write_store_arrays, STORE_FILENAME, KEY_COLUMNS, STAT_COLUMNS, STORE_COLUMNS
+
+# Compact columnar store of every team's row from every scrape, keyed by (season, team, played).
+# Columns are saved as typed numpy arrays in one compressed .npz file; season and team names are
+# stored once and referenced by integer codes (file format: standings_file.py).
+
+# Layout of manchester_united_data.csv, kept available as a view over the store
+TEAM_VIEW_HEADER = ["season", "position", "", "team", "played", "won", "drawn", "lost", "goals", "goal difference", "points", "goals for", "goals against", "points per game"] + DERIVED_COLUMNS
+
+
+class LeagueStore:
+    def __init__(self, filename=STORE_FILENAME):
+        self.filename = filename
+        self.frame = self.load()
+
+    # Function to load the store into a DataFrame (empty when the file does not exist yet)
+    def load(self):
+        if not os.path.exists(self.filename):
+            return pd.DataFrame({col: pd.Series(dtype=object if col in ("season", "team") else "int16") for col in STORE_COLUMNS})
+        with np.load(self.filename, allow_pickle=False) as data:
+            frame = pd.DataFrame({
+                "season": data["season_names"][data["season_codes"]].astype(object),
+                "team": data["team_names"][data["team_codes"]].astype(object),
+            })
+            for col in ["played"] + STAT_COLUMNS:
+                frame[col] = data[col.replace(" ", "_")]
+        return frame
+
+    # Function to write the store atomically
+    def save(self):
+        frame = self.frame.sort_values(by=KEY_COLUMNS, kind="stable").reset_index(drop=True)
+        season_codes, season_names = pd.factorize(frame["season"], sort=True)
+        team_codes, team_names = pd.factorize(frame["team"], sort=True)
+        arrays = {
+            "season_names": np.asarray(season_names, dtype=str),
+            "season_codes": season_codes.astype("int16"),
+            "team_names": np.asarray(team_names, dtype=str),
+            "team_codes": team_codes.astype("int16"),
+        }
+        for col in ["played"] + STAT_COLUMNS:
+            arrays[col.replace(" ", "_")] = frame[col].to_numpy(dtype="int16")
+        write_store_arrays(self.filename, arrays)
+        self.frame = frame
+
+    # Function to insert rows, replacing any existing rows with the same (season, team, played)
+    def upsert(self, rows):
+        rows = pd.DataFrame(rows, columns=STORE_COLUMNS)
+        rows["position"] = pd.to_numeric(rows["position"], errors="coerce").fillna(0)
+        for col in ["played"] + STAT_COLUMNS:
+            rows[col] = pd.to_numeric(rows[col], errors="raise").astype("int16")
+        rows = rows.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        existing_keys = pd.MultiIndex.from_frame(self.frame[KEY_COLUMNS])
+        new_keys = pd.MultiIndex.from_frame(rows[KEY_COLUMNS])
+        kept = self.frame[~existing_keys.isin(new_keys)]
+        self.frame = pd.concat([kept, rows], ignore_index=True) if len(kept) else rows.reset_index(drop=True)
+
+    # Function to list the seasons and teams held in the store
+    def seasons(self):
+        return sorted(self.frame["season"].unique())
+
+    def teams(self, season=None):
+        frame = self.frame if season is None else self.frame[self.frame["season"] == season]
+        return sorted(frame["team"].unique())
+
+    # Function to compute the derived stats for every team of the given seasons in one vectorized pass
+    def with_derived_stats(self, seasons=None):
+        frame = self.frame
+        if seasons is not None:
+            frame = frame[frame["season"].isin(list(seasons))]
+        frame = frame.sort_values(by=["team", "season", "played"], kind="stable").reset_index(drop=True)
+        return with_integer_indicators(compute_derived_stats(frame, by=["team", "season"]))
+
+    # Function to get one team's trajectory (all matchdays, oldest first) with the derived stats
+    def team_trajectory(self, team, season=None):
+        frame = self.frame[self.frame["team"] == team]
+        if season is not None:
+            frame = frame[frame["season"] == season]
+        frame = frame.sort_values(by=["season", "played"], kind="stable").reset_index(drop=True)
+        return with_integer_indicators(compute_derived_stats(frame))
+
+    # Function to build the manchester_united_data.csv layout for a team
+    def team_view(self, team):
+        trajectory = self.team_trajectory(team)
+        played = trajectory["played"].astype(int)
+        view = pd.DataFrame({
+            "season": trajectory["season"],
+            "position": trajectory["position"].astype(int).astype(str).replace("0", ""),
+            "": "",
+            "team": trajectory["team"],
+            "played": played,
+            "won": trajectory["won"].astype(int),
+            "drawn": trajectory["drawn"].astype(int),
+            "lost": trajectory["lost"].astype(int),
+            "goals": trajectory["goals for"].astype(int).astype(str) + ":" + trajectory["goals against"].astype(int).astype(str),
+            "goal difference": trajectory["goal difference"].astype(int),
+            "points": trajectory["points"].astype(int),
+            "goals for": trajectory["goals for"].astype(int),
+            "goals against": trajectory["goals against"].astype(int),
+            "points per game": (trajectory["points"] / played.where(played > 0)).round(2).fillna(0),
+        })
+        for col in DERIVED_COLUMNS:
+            view[col] = trajectory[col].fillna("") if col in ("last result", "form") else trajectory[col]
+        return view[TEAM_VIEW_HEADER]
+
+    # Function to write a team's view in the manchester_united_data.csv layout
+    def export_team_csv(self, team, csv_filename):
+        self.team_view(team).to_csv(csv_filename, index=False)
+
+
+# Function to turn the indicator and running-count columns back into integers after the derived stats pass
+def with_integer_indicators(frame):
+    for col in ["gf", "ga", "games scored in", "clean sheets"]:
+        frame[col] = frame[col].fillna(0).astype(int)
+    return frame
+
+
+# Function to convert rows in the manchester_united_data.csv layout to store rows (used for the one-time import)
+def store_rows_from_team_csv(csv_filename):
+    df = pd.read_csv(csv_filename)
+    return pd.DataFrame({
+        "season": df["season"],
+        "team": df["team"],
+        "played": df["played"],
+        "position": pd.to_numeric(df["position"], errors="coerce").fillna(0),
+        "won": df["won"],
+        "drawn": df["drawn"],
+        "lost": df["lost"],
+        "goals for": df["goals for"],
+        "goals against": df["goals against"],
+        "goal difference": df["goal difference"],
+        "points": df["points"],
+    })
+
+
+if __name__ == "__main__":
+    # python league_store.py --import manchester_united_data.csv
+    # python league_store.py --export "Manchester United" manchester_united_data.csv
+    # python league_store.py --trajectory "Arsenal" [season]
+    store = LeagueStore()
+    if len(sys.argv) >= 3 and sys.argv[1] == "--import":
+        store.upsert(store_rows_from_team_csv(sys.argv[2]))
+        store.save()
+        print(f"Imported {sys.argv[2]} into {store.filename} ({len(store.frame)} rows).")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "--export":
+        store.export_team_csv(sys.argv[2], sys.argv[3])
+        print(f"Exported {sys.argv[2]} to {sys.argv[3]}.")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "--trajectory":
+        season = sys.argv[3] if len(sys.argv) >= 4 else None
+        print(store.team_trajectory(sys.argv[2], season).to_string(index=False))
+    else:
+        print(f"{store.filename}: {len(store.frame)} rows, {len(store.seasons())} seasons, {len(store.teams())} teams")
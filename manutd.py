@@ -1,463 +1,480 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
 import re
 from datetime import datetime
 import os
-import pandas as pd
-import numpy as np
+import sys
+from csv_tail import read_last_rows, replace_rows_from, append_rows, append_row_if_changed
+from fetch import load_fetch_state, save_fetch_state, conditional_get, fetch_state_from_response, content_fingerprint
+from html_tables import table_markup, extract_table_rows
+from matchday_stats import derive_next_row
+from pipeline_metrics import RunMetrics
+from standings_rows import league_rows_from_table, team_data_row, DATA_FILENAME, DATA_HEADER, TEAM_NAME
 
 # Define start and end months for the season
 SEASON_START_MONTH = 8 # August
 SEASON_END_MONTH = 6 # June
 
-# Get the current date
-now = datetime.now()
-current_year = now.year
-current_month = now.month
-
-# Determine the season string based on the current month
-if current_month >= SEASON_START_MONTH:
-    season_string = f"{current_year}-{current_year + 1}"
-else:
-    season_string = f"{current_year - 1}-{current_year}"
-
-
-# Fetch the webpage
-url = "https://www.bbc.com/sport/football/premier-league/table"
-response = requests.get(url)
-
-if response.status_code == 200:
-    html_content = response.text
-    print("Successfully downloaded HTML content.")
-else:
-    print(f"Failed to download HTML content. Status code: {response.status_code}")
-    html_content = None
-
-# Parse the HTML
-if html_content:
-    soup = BeautifulSoup(html_content, 'html.parser')
-    print("Successfully created BeautifulSoup object.")
-else:
-    print("HTML content is not available.")
-    soup = None
-
-# Find the table
-football_table = None
-if soup:
-    tables = soup.find_all('table')
-    if tables:
-        # Try finding the table using the data-testid or class attribute found in the previous step
-        football_table = soup.find('table', {'data-testid': 'football-table'})
-
-        if football_table:
+# Validators and table fingerprint of the last processed page, used to skip runs when nothing changed
+FETCH_STATE_FILENAME = "manutd_fetch_state.json"
+FOOTBALL_TABLE_MARKER = 'data-testid="football-table"'
+# The table page (MANUTD_URL can point at a local stand-in, see fixture_server.py)
+TABLE_URL = "https://www.bbc.com/sport/football/premier-league/table"
+
+# Part A: the team's history with derived columns (DATA_FILENAME and DATA_HEADER, see standings_rows.py);
+# Part B: one row per change of the team's standing
+SHEETS_FILENAME = "manchester_united_data_sheets.csv"
+SHEETS_HEADER = ["season", "position", "", "team", "played", "won", "drawn", "lost", "goals", "goal difference", "points"]
+# Part C: every team's rows in the league standings store (standings_file.py); Part D: the per-season
+# aggregates of Part A (season_aggregates.py)
+
+# Each stage below is a function, so a stage can be run on its own against saved pages
+# (see benchmarks/suite.py); main() runs them in order.
+# The hourly path (fetch, detect the change, patch or append one row, update the derived columns) uses
+# the csv module and plain lists only. pandas is imported for a full rebuild of Part A alone, and numpy
+# for the league store in Part C; both are imported inside the functions that need them, so runs that
+# find nothing changed pay for neither.
+
+
+# Function to get the season string for a date, e.g. "2025-2026"
+def season_for(now):
+    if now.month >= SEASON_START_MONTH:
+        return f"{now.year}-{now.year + 1}"
+    return f"{now.year - 1}-{now.year}"
+
+
+# Function to fetch the table page. Returns (response, html_content, table_fingerprint), or None when
+# the page or its standings table is unchanged since the last run and there is nothing to do.
+# A full rebuild sends no validators, so the page is always downloaded.
+def fetch_table_page(url, fetch_state, full_rebuild=False):
+    response = conditional_get(url, {} if full_rebuild else fetch_state)
+    table_fingerprint = None
+
+    if response.status_code == 304:
+        print("Table page not modified since the last run. Nothing to do.")
+        return None
+    elif response.status_code == 200:
+        html_content = response.text
+        print("Successfully downloaded HTML content.")
+
+        # Fingerprint only the standings table, so changes elsewhere on the page do not trigger a run
+        table_fingerprint = content_fingerprint(table_markup(html_content, FOOTBALL_TABLE_MARKER))
+        if table_fingerprint and table_fingerprint == fetch_state.get('fingerprint') and not full_rebuild:
+            print("Standings table unchanged since the last run. Nothing to do.")
+            return None
+    else:
+        print(f"Failed to download HTML content. Status code: {response.status_code}")
+        html_content = None
+    return response, html_content, table_fingerprint
+
+
+# Function to extract the standings table rows, parsing only the table's own markup
+def parse_standings(html_content):
+    football_table_rows = None
+    if html_content:
+        football_table_rows = extract_table_rows(html_content, {'data-testid': 'football-table'})
+        if football_table_rows is not None:
             print("Successfully found the football standings table using data-testid.")
         else:
-            # If data-testid didn't work, try the class attribute.
-            if tables and 'class' in tables[0].attrs:
-                football_table = soup.find('table', class_=tables[0].attrs['class'][0])
-                if football_table:
-                    print(f"Successfully found the football standings table using class: {tables[0].attrs['class'][0]}.")
-                else:
-                    print("Could not find the football standings table using data-testid or class.")
+            # If data-testid didn't work, fall back to the first table on the page
+            football_table_rows = extract_table_rows(html_content)
+            if football_table_rows is not None:
+                print("Successfully found the football standings table as the first table on the page.")
             else:
-                 print("Could not find the football standings table using data-testid or class.")
+                print("No tables found on the page.")
     else:
-        print("No tables found on the page.")
-
-# Find the row
-manchester_united_row = None
-if football_table:
-    rows = football_table.find_all('tr')
-    for row in rows:
-        if "Manchester United" in row.get_text():
-            manchester_united_row = row
-            break
-
-    if manchester_united_row:
-        print("Successfully found the row for Manchester United.")
-    else:
-        print("Could not find the row for Manchester United.")
-else:
-    print("Error: football_table is None. Cannot proceed to find row.")
-
-# Extract data
-extracted_data = []
-if manchester_united_row:
-    cells = manchester_united_row.find_all(['td', 'th'])
-    extracted_data = [cell.get_text(strip=True) for cell in cells]
-    # Remove the last element (form data)
-    if extracted_data:
-        extracted_data = extracted_data[:-1]
+        print("HTML content is not available.")
+    return football_table_rows
 
-    # Split position and team
-    if extracted_data:
-        position_team = extracted_data[0]
-        match = re.match(r'(\d+)([A-Za-z\s]+)', position_team)
-        if match:
-            position = match.group(1)
-            team = match.group(2).strip() # Strip whitespace from team name
-            extracted_data[0:1] = [position, team] # Replace the combined element with split elements
-
-    # At this point, extracted_data should be something like:
-    # [position, "", team, played, won, drawn, lost, goals_for, goals_against, goal_difference, points]
-    print(f"Extracted data: {extracted_data}")
 
-    # Insert an empty string between position and team
-    if len(extracted_data) > 1:
-         extracted_data.insert(1, "")
+# Function to find the team's row: the team cell holds the position followed by the team name, e.g. "7Manchester United"
+def find_team_row(football_table_rows, team_name=TEAM_NAME):
+    team_row = None
+    if football_table_rows:
+        for row in football_table_rows:
+            if any(cell.lstrip('0123456789').strip() == team_name for cell in row[:2]):
+                team_row = row
+                break
 
-    print("Extracted data for Manchester United (processed):")
-    print(extracted_data)
-else:
-    print("Error: Manchester United row is not available.")
+        if team_row:
+            print(f"Successfully found the row for {team_name}.")
+        else:
+            print(f"Could not find the row for {team_name}.")
+    else:
+        print("Error: football table is not available. Cannot proceed to find row.")
+    return team_row
+
+
+# Function to extract the team's data from its row:
+# [position, "", team, played, won, drawn, lost, goals_for, goals_against, goal_difference, points]
+def extract_team_data(team_row):
+    extracted_data = []
+    if team_row:
+        extracted_data = list(team_row)
+        # Remove the last element (form data)
+        if extracted_data:
+            extracted_data = extracted_data[:-1]
+
+        # Split position and team
+        if extracted_data:
+            position_team = extracted_data[0]
+            match = re.match(r'(\d+)([A-Za-z\s]+)', position_team)
+            if match:
+                position = match.group(1)
+                team = match.group(2).strip() # Strip whitespace from team name
+                extracted_data[0:1] = [position, team] # Replace the combined element with split elements
+
+        # At this point, extracted_data should be something like:
+        # [position, "", team, played, won, drawn, lost, goals_for, goals_against, goal_difference, points]
+        print(f"Extracted data: {extracted_data}")
 
+        # Insert an empty string between position and team
+        if len(extracted_data) > 1:
+             extracted_data.insert(1, "")
 
-# --- Part A: Write to manchester_united_data.csv ---
-csv_filename_data = "manchester_united_data.csv"
-header_data = ["season", "position", "", "team", "played", "won", "drawn", "lost", "goals", "goal difference", "points", "goals for", "goals against", "points per game", "last result", "form", "gf", "ga", "games scored in", "clean sheets"]
-data_to_write = [] # Initialize data_to_write here
+        print("Extracted data for Manchester United (processed):")
+        print(extracted_data)
+    else:
+        print("Error: Manchester United row is not available.")
+    return extracted_data
+
+
+# Function to patch or append the new row in place, without reading or rewriting the rest of the file.
+# The derived columns are computed from the previous matchday alone (read by seeking from end-of-file).
+# Returns False when the file cannot be updated this way and a full rebuild is needed.
+def update_data_incrementally(filename, new_row_list):
+    if not os.path.exists(filename) or os.stat(filename).st_size == 0:
+        return False
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        if next(csv.reader(csvfile), []) != DATA_HEADER:
+            return False
+
+    last_rows = read_last_rows(filename, 2)
+    if not last_rows:
+        return False
+
+    # Convert a row (scraped list or CSV row) to the numbers needed for the derived columns
+    def as_stats(row):
+        stats = {
+            'played': int(float(row[4])),
+            'points': int(float(row[10])),
+            'goals for': int(float(row[11])),
+            'goals against': int(float(row[12])),
+        }
+        if len(row) == len(DATA_HEADER):
+            stats['form'] = row[15]
+            stats['games scored in'] = int(float(row[18]))
+            stats['clean sheets'] = int(float(row[19]))
+        return stats
 
-if extracted_data:
     try:
-        # Assuming extracted_data is now:
-        # [position, "", team, played, won, drawn, lost, goals_for, goals_against, goal_difference, points]
-        # The indices in extracted_data are relative to the list after initial processing
-
-        played = int(extracted_data[3])
-        points = int(extracted_data[10]) # Correct index for points
-        goals_for = int(extracted_data[7]) # Correct index for goals_for
-        goals_against = int(extracted_data[8]) # Correct index for goals_against
-        goal_difference = int(extracted_data[9]) # Correct index for goal_difference
-        combined_goals = f"{goals_for}:{goals_against}"
-
-
-        points_per_game = round(points / played, 2) if played > 0 else 0 # Added rounding
-
-        # Construct the new row data as a list with the desired columns and order
-        new_row_list = [
-            season_string,          # season
-            extracted_data[0],      # position
-            "",                     # empty column
-            extracted_data[2],      # team
-            extracted_data[3],      # played
-            extracted_data[4],      # won
-            extracted_data[5],      # drawn
-            extracted_data[6],      # lost
-            combined_goals,         # goals (combined)
-            extracted_data[9],      # goal_difference (from extracted_data)
-            extracted_data[10],     # points (from extracted_data)
-            goals_for,              # goals for (calculated)
-            goals_against,          # goals against (calculated)
-            points_per_game         # points per game (calculated)
-        ]
-
-        # Load existing data into a DataFrame
-        existing_df_data = pd.DataFrame(columns=header_data)
-        if os.path.exists(csv_filename_data) and os.stat(csv_filename_data).st_size > 0:
-            try:
-                existing_df_data = pd.read_csv(csv_filename_data)
-                # Ensure existing_df_data has all columns from header_data
-                for col in header_data:
-                    if col not in existing_df_data.columns:
-                        existing_df_data[col] = np.nan
-            except Exception as e:
-                print(f"Error reading existing CSV file {csv_filename_data}: {e}")
-                existing_df_data = pd.DataFrame(columns=header_data) # Reset if there's an error
-
-        # Ensure 'played' column in existing_df_data is numeric before filtering
-        existing_df_data['played'] = pd.to_numeric(existing_df_data['played'], errors='coerce')
-
-        # Filter out the existing row for the current season and played value, if it exists
-        filtered_df_data = existing_df_data[(existing_df_data['season'] != season_string) | (existing_df_data['played'] != played)]
-
-        # Create a DataFrame for the new row from the list
-        new_row_df = pd.DataFrame([new_row_list], columns=header_data[:14])
-
-        # Add placeholder columns for the calculated fields (last result, form, gf, ga, games scored in, clean sheets)
-        # These columns should be in header_data[14:]
-        calculated_cols_placeholder_data = {col: np.nan for col in header_data[14:]}
-        new_row_df = new_row_df.assign(**calculated_cols_placeholder_data)
-
-
-        # Ensure all columns from header_data are present in new_row_df before concatenation
-        for col in header_data:
-            if col not in new_row_df.columns:
-                new_row_df[col] = np.nan # Add missing columns with NaN placeholders
-
-
-        # Concatenate filtered existing data and the new row
-        temp_df_data = pd.concat([filtered_df_data, new_row_df], ignore_index=True)
-
-        # Ensure necessary columns are numeric for calculations
-        temp_df_data['played'] = pd.to_numeric(temp_df_data['played'], errors='coerce')
-        temp_df_data['points'] = pd.to_numeric(temp_df_data['points'], errors='coerce')
-        temp_df_data['goals for'] = pd.to_numeric(temp_df_data['goals for'], errors='coerce')
-        temp_df_data['goals against'] = pd.to_numeric(temp_df_data['goals against'], errors='coerce')
-        temp_df_data['gf'] = pd.to_numeric(temp_df_data['gf'], errors='coerce')
-        temp_df_data['ga'] = pd.to_numeric(temp_df_data['ga'], errors='coerce')
-
-        # Sort by season and played
-        temp_df_data = temp_df_data.sort_values(by=['season', 'played']).reset_index(drop=True)
-
-        # Function to calculate 'last result'
-        def calculate_last_result(row, df):
-            if pd.isna(row['played']) or row['played'] == 0:
-                return ''
-            if row['played'] == 1:
-                points = row['points']
-                if points == 3:
-                    return 'W'
-                elif points == 1:
-                    return 'D'
-                else: # points == 0
-                    return 'L'
-            else:
-                # Find the previous row for the same season
-                current_season = row['season']
-                current_played = row['played']
-                previous_row = df[(df['season'] == current_season) & (df['played'] == current_played - 1)]
-                if not previous_row.empty:
-                    previous_points = previous_row.iloc[0]['points']
-                    current_points = row['points']
-                    point_diff = current_points - previous_points
-                    if point_diff == 3:
-                        return 'W'
-                    elif point_diff == 1:
-                        return 'D'
-                    else: # point_diff == 0
-                        return 'L'
-                else:
-                    return ''
-
-        # Apply the function to create 'last result' column on temp_df_data
-        temp_df_data['last result'] = temp_df_data.apply(lambda row: calculate_last_result(row, temp_df_data), axis=1)
-
-        # Function to calculate 'form' (oldest result first, newest last, max 5 results)
-        def calculate_form(row, df):
-            if pd.isna(row['played']) or row['played'] == 0:
-                return ''
-            played = row['played']
-            current_season = row['season']
-            # Determine how many previous games to include (up to 4 previous + current)
-            num_games = min(int(played), 5) # Limit to 5 games total
-            start_played = played - num_games + 1
-            if start_played < 1:
-                 start_played = 1
-
-            # Get results for the last 'num_games' played in the current season, in played order
-            form_df = df[(df['season'] == current_season) & (df['played'] >= start_played) & (df['played'] <= played)].sort_values(by='played')
-
-            # Get results in chronological order (oldest to newest)
-            results = form_df['last result'].tolist()
-
-            # Join with hyphens (oldest first, newest last)
-            return "-".join(results)
-
-
-        # Apply the function to create 'form' column on temp_df_data
-        temp_df_data['form'] = temp_df_data.apply(lambda row: calculate_form(row, temp_df_data), axis=1)
-
-        # Function to calculate 'gf' (goals for indicator)
-        def calculate_gf(row, df):
-            if pd.isna(row['played']) or row['played'] == 0:
-                return 0 # Return 0 for played=0 or NaN
-            if row['played'] == 1:
-                goals_for = row['goals for']
-                return 0 if goals_for == 0 else 1
-            else:
-                current_played = row['played']
-                current_season = row['season']
-                previous_row = df[(df['season'] == current_season) & (df['played'] == current_played - 1)]
-                if not previous_row.empty:
-                    current_goals_for = row['goals for']
-                    previous_goals_for = previous_row.iloc[0]['goals for']
-                    return 1 if current_goals_for > previous_goals_for else 0
-                else:
-                    return 0 # Should not happen if data is sorted and consecutive for a season
-
-        # Apply the function to create 'gf' column on temp_df_data
-        temp_df_data['gf'] = temp_df_data.apply(lambda row: calculate_gf(row, temp_df_data), axis=1)
-
-        # Function to calculate 'ga' (goals against indicator)
-        def calculate_ga(row, df):
-            if pd.isna(row['played']) or row['played'] == 0:
-                 return 0 # Return 0 for played=0 or NaN
-            if row['played'] == 1:
-                goals_against = row['goals against']
-                return 1 if goals_against > 0 else 0 # This should be 1 if goals_against > 0, not always 1
-            else:
-                current_played = row['played']
-                current_season = row['season']
-                previous_row = df[(df['season'] == current_season) & (df['played'] == current_played - 1)]
-                if not previous_row.empty:
-                    current_goals_against = row['goals against']
-                    previous_goals_against = previous_row.iloc[0]['goals against']
-                    return 1 if current_goals_against > previous_goals_against else 0
-                else:
-                    return 0 # Should not happen if data is sorted and consecutive for a season
-
-        # Apply the function to create 'ga' column on temp_df_data
-        temp_df_data['ga'] = temp_df_data.apply(lambda row: calculate_ga(row, temp_df_data), axis=1)
-
-
-        # Function to calculate 'games scored in' (cumulative sum of gf, reset at played=1)
-        def calculate_games_scored_in(df):
-            games_scored = []
-            current_sum = 0
-            current_season = None
-            for idx, row in df.iterrows():
-                if pd.isna(row['played']):
-                    games_scored.append(np.nan) # Use NaN for missing played value
-                    continue
-                if row['season'] != current_season or row['played'] == 1:
-                    current_sum = 1 if row['gf'] == 1 else 0
-                    current_season = row['season']
-                else:
-                    current_sum += 1 if row['gf'] == 1 else 0
-                games_scored.append(current_sum)
-            return games_scored
-
-        # Apply the function to create 'games scored in' column on temp_df_data
-        temp_df_data['games scored in'] = calculate_games_scored_in(temp_df_data)
-
-        # Function to calculate 'clean sheets' (cumulative sum of ga=0, reset at played=1)
-        def calculate_clean_sheets(df):
-            clean_sheets = []
-            current_sum = 0
-            current_season = None
-            for idx, row in df.iterrows():
-                if pd.isna(row['played']):
-                    clean_sheets.append(np.nan) # Use NaN for missing played value
-                    continue
-                if row['season'] != current_season or row['played'] == 1:
-                    current_sum = 1 if row['ga'] == 0 else 0  # 1 if no goals conceded, 0 if conceded
-                    current_season = row['season']
-                else:
-                    current_sum += 1 if row['ga'] == 0 else 0  # 1 if no goals conceded, 0 if conceded
-                clean_sheets.append(current_sum)
-            return clean_sheets
-
-        # Apply the function to create 'clean sheets' column on temp_df_data
-        temp_df_data['clean sheets'] = calculate_clean_sheets(temp_df_data)
-
-
-        # Prepare data to be written to CSV as a list of lists
-        # Ensure correct order and handle NaN values for CSV
-        data_to_write = [header_data] # Start with the header
-        for index, row in temp_df_data.iterrows():
-            # Convert row to list, handling potential NaN values by converting them to empty strings or 0 as appropriate
-            # Ensure the empty string column is preserved
-            csv_row = [
-                row['season'],
-                row['position'],
-                "", # Explicitly keep this column as an empty string
-                row['team'],
-                row['played'],
-                row['won'],
-                row['drawn'],
-                row['lost'],
-                row['goals'],
-                row['goal difference'],
-                row['points'],
-                row['goals for'],
-                row['goals against'],
-                row['points per game'],
-                row['last result'] if pd.notna(row['last result']) else '', # Handle NaN for string columns
-                row['form'] if pd.notna(row['form']) else '', # Handle NaN for string columns
-                int(row['gf']) if pd.notna(row['gf']) else 0, # Convert NaN to 0 for integer columns
-                int(row['ga']) if pd.notna(row['ga']) else 0, # Convert NaN to 0 for integer columns
-                int(row['games scored in']) if pd.notna(row['games scored in']) else 0, # Convert NaN to 0 for integer columns
-                int(row['clean sheets']) if pd.notna(row['clean sheets']) else 0 # Convert NaN to 0 for integer columns
-            ]
-            data_to_write.append(csv_row)
-
+        season, played = new_row_list[0], int(new_row_list[4])
+        last_offset, last_row = last_rows[-1]
+        last_season, last_played = last_row[0], int(float(last_row[4]))
+
+        if (last_season, last_played) == (season, played):
+            # Same matchday as the last row: patch it, deriving from the row before it
+            patch_offset = last_offset
+            previous_row = last_rows[0][1] if len(last_rows) == 2 else None
+        elif (last_season == season and last_played == played - 1) or (last_season < season and played == 1):
+            # Next matchday of the season, or the first matchday of a new season: append
+            patch_offset = None
+            previous_row = last_row
+        else:
+            print(f"History in {filename} is out of order for {season} matchday {played}. Rebuilding.")
+            return False
 
-    except (ValueError, IndexError, KeyError) as e:
-        print(f"Error processing data for {csv_filename_data}: {e}")
-        data_to_write = [] # Clear data to write if there's an error
+        previous_stats = None
+        if previous_row is not None and previous_row[0] == season:
+            previous_stats = as_stats(previous_row)
+        derived = derive_next_row(as_stats(new_row_list), previous_stats)
+    except (ValueError, IndexError) as e:
+        print(f"Could not update {filename} incrementally: {e}")
+        return False
+    if derived is None:
+        return False
+
+    row = new_row_list + [derived[col] for col in DATA_HEADER[14:]]
+    if patch_offset is not None:
+        if [str(value) for value in row] == last_row:
+            print(f"Row for {season} matchday {played} is unchanged in {filename}.")
+            return True
+        replace_rows_from(filename, patch_offset, [row])
+        print(f"Row for {season} matchday {played} successfully updated in {filename}.")
+    else:
+        append_rows(filename, [row])
+        print(f"Row for {season} matchday {played} successfully appended to {filename}.")
+    return True
+
+
+# Function to rebuild the whole history with the new row: the current season's derived columns are
+# recomputed and the rows to write are returned, header first
+def rebuild_team_data(filename, new_row_list, season_string):
+    # pandas is only needed for a full rebuild, so it is imported here rather than at startup
+    import pandas as pd
+    import numpy as np
+    from league_stats import compute_derived_stats
+
+    played = int(new_row_list[4])
+
+    # Load existing data into a DataFrame
+    existing_df_data = pd.DataFrame(columns=DATA_HEADER)
+    if os.path.exists(filename) and os.stat(filename).st_size > 0:
+        try:
+            existing_df_data = pd.read_csv(filename)
+            # Ensure existing_df_data has all columns from DATA_HEADER
+            for col in DATA_HEADER:
+                if col not in existing_df_data.columns:
+                    existing_df_data[col] = np.nan
+        except Exception as e:
+            print(f"Error reading existing CSV file {filename}: {e}")
+            existing_df_data = pd.DataFrame(columns=DATA_HEADER) # Reset if there's an error
+
+    # Ensure 'played' column in existing_df_data is numeric before filtering
+    existing_df_data['played'] = pd.to_numeric(existing_df_data['played'], errors='coerce')
+
+    # Filter out the existing row for the current season and played value, if it exists
+    filtered_df_data = existing_df_data[(existing_df_data['season'] != season_string) | (existing_df_data['played'] != played)]
+
+    # Create a DataFrame for the new row from the list
+    new_row_df = pd.DataFrame([new_row_list], columns=DATA_HEADER[:14])
+
+    # Add placeholder columns for the calculated fields (last result, form, gf, ga, games scored in, clean sheets)
+    # These columns should be in DATA_HEADER[14:]
+    calculated_cols_placeholder_data = {col: np.nan for col in DATA_HEADER[14:]}
+    new_row_df = new_row_df.assign(**calculated_cols_placeholder_data)
+
+
+    # Ensure all columns from DATA_HEADER are present in new_row_df before concatenation
+    for col in DATA_HEADER:
+        if col not in new_row_df.columns:
+            new_row_df[col] = np.nan # Add missing columns with NaN placeholders
+
+
+    # Concatenate filtered existing data and the new row
+    temp_df_data = pd.concat([filtered_df_data, new_row_df], ignore_index=True)
+
+    # Ensure necessary columns are numeric for calculations
+    temp_df_data['played'] = pd.to_numeric(temp_df_data['played'], errors='coerce')
+    temp_df_data['points'] = pd.to_numeric(temp_df_data['points'], errors='coerce')
+    temp_df_data['goals for'] = pd.to_numeric(temp_df_data['goals for'], errors='coerce')
+    temp_df_data['goals against'] = pd.to_numeric(temp_df_data['goals against'], errors='coerce')
+
+    # Sort by season and played
+    temp_df_data = temp_df_data.sort_values(by=['season', 'played']).reset_index(drop=True)
+
+    # Calculate 'last result', 'form', 'gf', 'ga', 'games scored in' and 'clean sheets'.
+    # Only the current season is recomputed; earlier seasons keep the values already in the file.
+    temp_df_data = compute_derived_stats(temp_df_data, seasons=[season_string])
+
+
+    # Prepare data to be written to CSV as a list of lists
+    # Ensure correct order and handle NaN values for CSV
+    data_to_write = [DATA_HEADER] # Start with the header
+    for index, row in temp_df_data.iterrows():
+        # Convert row to list, handling potential NaN values by converting them to empty strings or 0 as appropriate
+        # Ensure the empty string column is preserved
+        csv_row = [
+            row['season'],
+            row['position'],
+            "", # Explicitly keep this column as an empty string
+            row['team'],
+            row['played'],
+            row['won'],
+            row['drawn'],
+            row['lost'],
+            row['goals'],
+            row['goal difference'],
+            row['points'],
+            row['goals for'],
+            row['goals against'],
+            row['points per game'],
+            row['last result'] if pd.notna(row['last result']) else '', # Handle NaN for string columns
+            row['form'] if pd.notna(row['form']) else '', # Handle NaN for string columns
+            int(row['gf']) if pd.notna(row['gf']) else 0, # Convert NaN to 0 for integer columns
+            int(row['ga']) if pd.notna(row['ga']) else 0, # Convert NaN to 0 for integer columns
+            int(row['games scored in']) if pd.notna(row['games scored in']) else 0, # Convert NaN to 0 for integer columns
+            int(row['clean sheets']) if pd.notna(row['clean sheets']) else 0 # Convert NaN to 0 for integer columns
+        ]
+        data_to_write.append(csv_row)
+    return data_to_write
 
 
-# Write to file using the csv module
-if data_to_write: # Check if data_to_write was successfully created
-     try:
-        with open(csv_filename_data, 'w', newline='') as csvfile: # Use 'w' to overwrite
-            writer = csv.writer(csvfile)
-            writer.writerows(data_to_write)
-        print(f"Data successfully written to {csv_filename_data}.")
-     except Exception as e:
-        print(f"Error writing to {csv_filename_data}: {e}")
+# Function to write the new matchday to Part A. Returns True when the row was stored.
+# Incremental mode derives the new row from the previous matchday and patches or appends only that row;
+# it falls back to a full rebuild when history is out of order or full_rebuild is set.
+def update_team_data(filename, extracted_data, season_string, full_rebuild=False):
+    data_to_write = [] # Initialize data_to_write here
+    if extracted_data:
+        try:
+            new_row_list = team_data_row(extracted_data, season_string)
+            if not full_rebuild and update_data_incrementally(filename, new_row_list):
+                return True
+            data_to_write = rebuild_team_data(filename, new_row_list, season_string)
+        except (ValueError, IndexError, KeyError) as e:
+            print(f"Error processing data for {filename}: {e}")
+            data_to_write = [] # Clear data to write if there's an error
+
+    # Write to file using the csv module
+    if data_to_write: # Check if data_to_write was successfully created
+         try:
+            with open(filename, 'w', newline='') as csvfile: # Use 'w' to overwrite
+                writer = csv.writer(csvfile)
+                writer.writerows(data_to_write)
+            print(f"Data successfully written to {filename}.")
+         except Exception as e:
+            print(f"Error writing to {filename}: {e}")
+    else:
+        print(f"No data to write to {filename} due to processing errors.")
+    return bool(data_to_write)
 
-else:
-    print(f"No data to write to {csv_filename_data} due to processing errors.")
 
+# Function to append the new standing to Part B unless it equals the last row. Returns True when a row was prepared.
+def update_team_sheets(filename, extracted_data, season_string):
+    new_row_sheets = [] # Initialize new_row_sheets
+    if extracted_data:
+        try:
+            # Construct the new row for _sheets.csv with the desired columns and order
+            # Desired order: season, position, "", team, played, won, drawn, lost, goals, goal difference, points
+            goals_for = int(extracted_data[7]) # Correct index for goals_for
+            goals_against = int(extracted_data[8]) # Correct index for goals_against
+            combined_goals = f"{goals_for}:{goals_against}"
+
+            new_row_sheets = [
+                season_string,          # season
+                extracted_data[0],      # position
+                "",                     # empty column
+                extracted_data[2],      # team
+                extracted_data[3],       # played
+                extracted_data[4],      # won
+                extracted_data[5],      # drawn
+                extracted_data[6],      # lost
+                combined_goals,         # goals (combined)
+                extracted_data[9],      # goal_difference
+                extracted_data[10]      # points
+            ]
 
-# --- Part B: Write to manchester_united_data_sheets.csv ---
-csv_filename_sheets = "manchester_united_data_sheets.csv"
-header_sheets = ["season", "position", "", "team", "played", "won", "drawn", "lost", "goals", "goal difference", "points"]
-new_row_sheets = [] # Initialize new_row_sheets
+        except (ValueError, IndexError) as e:
+             print(f"Error preparing data for {filename}: {e}")
+             new_row_sheets = [] # Clear new_row_sheets if there's an error
 
-if extracted_data:
-    try:
-        # Construct the new row for _sheets.csv with the desired columns and order
-        # Desired order: season, position, "", team, played, won, drawn, lost, goals, goal difference, points
-        goals_for = int(extracted_data[7]) # Correct index for goals_for
-        goals_against = int(extracted_data[8]) # Correct index for goals_against
-        combined_goals = f"{goals_for}:{goals_against}"
-
-        new_row_sheets = [
-            season_string,          # season
-            extracted_data[0],      # position
-            "",                     # empty column
-            extracted_data[2],      # team
-            extracted_data[3],       # played
-            extracted_data[4],      # won
-            extracted_data[5],      # drawn
-            extracted_data[6],      # lost
-            combined_goals,         # goals (combined)
-            extracted_data[9],      # goal_difference
-            extracted_data[10]      # points
-        ]
 
-    except (ValueError, IndexError) as e:
-         print(f"Error preparing data for {csv_filename_sheets}: {e}")
-         new_row_sheets = [] # Clear new_row_sheets if there's an error
+    # Write to file
+    if new_row_sheets: # Ensure new_row_sheets is not empty
+        try:
+            # Append unless the row equals the last row; the last row is found through a small sidecar index
+            # (or by seeking back from end-of-file), so the cost does not grow with the file's history
+            if append_row_if_changed(filename, SHEETS_HEADER, new_row_sheets):
+                print(f"New data successfully appended to {filename}.")
+            else:
+                print(f"New data is the same as the last row in {filename}. Not appending.")
+        except Exception as e:
+            print(f"Error writing to {filename}: {e}")
+    else:
+        print(f"No data to write to {filename}.")
+    return bool(new_row_sheets)
+
+
+# Function to store every team's row in the league standings store. Returns True when stored.
+# The rows are upserted into the store file with numpy alone (see standings_file.py), not through LeagueStore's DataFrame.
+def store_league_rows(league_rows, store_filename=None):
+    from standings_file import upsert_store_file, STORE_FILENAME
+    store_filename = store_filename or STORE_FILENAME
+    if league_rows:
+        try:
+            upsert_store_file(store_filename, league_rows)
+            print(f"{len(league_rows)} team rows successfully stored in {store_filename}.")
+            return True
+        except Exception as e:
+            print(f"Error updating {store_filename}: {e}")
+    else:
+        print(f"No league rows to store in {store_filename}.")
+    return False
 
 
-# Write to file
-if new_row_sheets: # Ensure new_row_sheets is not empty
+# Function to refresh the materialized aggregates (see season_aggregates.py) of the season written to
+# Part A; with full_rebuild, every season's. Returns True when the aggregates are up to date.
+def update_season_aggregates(data_filename, season_string, full_rebuild=False, aggregates_filename=None):
+    from season_aggregates import refresh_aggregates, AGGREGATES_FILENAME
+    aggregates_filename = aggregates_filename or AGGREGATES_FILENAME
     try:
-        # Check if the CSV file exists and is not empty
-        file_exists_and_not_empty = os.path.exists(csv_filename_sheets) and os.stat(csv_filename_sheets).st_size > 0
-
-        # Read the last row for comparison if the file exists and has data
-        last_data_row_sheets = None
-        if file_exists_and_not_empty:
-            with open(csv_filename_sheets, 'r', newline='') as csvfile:
-                reader = csv.reader(csvfile)
-                try:
-                    # Read all rows, including header
-                    all_rows = list(reader)
-                    if len(all_rows) > 1: # Check if there's more than just a header
-                        last_data_row_sheets = all_rows[-1]
-                except csv.Error as e:
-                    print(f"Error reading CSV file {csv_filename_sheets} for comparison: {e}")
-                    last_data_row_sheets = None # Reset last_data_row if there's an error
-
-        # Check if the new row is different from the last data row
-        if last_data_row_sheets is None or new_row_sheets != last_data_row_sheets:
-             with open(csv_filename_sheets, 'a', newline='') as csvfile: # Use 'a' to append
-                writer = csv.writer(csvfile)
-                 # Write header only if the file is empty
-                if not file_exists_and_not_empty:
-                    writer.writerow(header_sheets)
-                    print(f"Header successfully written to {csv_filename_sheets}")
-
-                writer.writerow(new_row_sheets) # Write the new row
-                print(f"New data successfully appended to {csv_filename_sheets}.")
+        changed = refresh_aggregates(data_filename, None if full_rebuild else [season_string], aggregates_filename)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error updating {aggregates_filename}: {e}")
+        return False
+    if changed:
+        print(f"Aggregates of {', '.join(changed)} successfully updated in {aggregates_filename}.")
+    else:
+        print(f"Aggregates in {aggregates_filename} are up to date.")
+    return True
+
+
+# Function to run the whole job. Pass --full-rebuild to recompute and rewrite manchester_united_data.csv
+# instead of updating it in place. Each stage's time, memory and row count is appended to the metrics log
+# (see pipeline_metrics.py). runner.py passes a deadline and its process pool (every stage here is light).
+# Returns the run's status.
+def main(argv=None, deadline=None, executor=None):
+    argv = sys.argv[1:] if argv is None else argv
+    full_rebuild = '--full-rebuild' in argv
+    season_string = season_for(datetime.now())
+
+    with RunMetrics('manutd', deadline=deadline, executor=executor) as metrics:
+        # Fetch the webpage
+        url = os.environ.get("MANUTD_URL", TABLE_URL)
+        fetch_state = load_fetch_state(FETCH_STATE_FILENAME, url)
+        with metrics.stage('fetch') as stage:
+            fetched = fetch_table_page(url, fetch_state, full_rebuild)
+            stage['bytes'] = len(fetched[0].content) if fetched else 0
+        if fetched is None:
+            metrics.status = 'unchanged'
+            return metrics.status
+        response, html_content, table_fingerprint = fetched
+
+        with metrics.stage('parse') as stage:
+            football_table_rows = parse_standings(html_content)
+            extracted_data = extract_team_data(find_team_row(football_table_rows))
+            stage['rows'] = len(football_table_rows or [])
+
+        # --- Part A: Write to manchester_united_data.csv ---
+        with metrics.stage('merge') as stage:
+            data_updated = update_team_data(DATA_FILENAME, extracted_data, season_string, full_rebuild)
+            stage['rows'] = 1 if data_updated else 0
+
+        with metrics.stage('write') as stage:
+            # --- Part B: Write to manchester_united_data_sheets.csv ---
+            sheets_updated = update_team_sheets(SHEETS_FILENAME, extracted_data, season_string)
+
+            # --- Part C: Store every team's row in the league standings store ---
+            league_rows = league_rows_from_table(football_table_rows, season_string)
+            league_store_updated = store_league_rows(league_rows)
+            stage['rows'] = len(league_rows) + (1 if sheets_updated else 0)
+
+        # --- Part D: Refresh the season's aggregates in manchester_united_aggregates.json ---
+        # After the writes, so a failure here cannot keep Parts B and C from being updated
+        with metrics.stage('aggregate'):
+            aggregates_updated = data_updated and update_season_aggregates(DATA_FILENAME, season_string, full_rebuild)
+
+        # Remember the processed table so the next run can skip an unchanged one.
+        # Only reached when the table changed, so hours without changes leave the state file untouched.
+        if table_fingerprint and data_updated and aggregates_updated and sheets_updated and league_store_updated:
+            save_fetch_state(FETCH_STATE_FILENAME, url, fetch_state_from_response(response, table_fingerprint))
+            print(f"Fetch state saved to {FETCH_STATE_FILENAME}.")
         else:
-            print(f"New data is the same as the last row in {csv_filename_sheets}. Not appending.")
-    except Exception as e:
-        print(f"Error writing to {csv_filename_sheets}: {e}")
-else:
-    print(f"No data to write to {csv_filename_sheets}.")
+            metrics.status = 'failed'
+    return metrics.status
+
+
+if __name__ == '__main__':
+    # --profile[=lines,memory] runs the job under the profilers of pipeline_profile.py
+    if any(argument.startswith('--profile') for argument in sys.argv[1:]):
+        from pipeline_profile import run_profiled, profile_options
+        run_profiled('manutd', main, profile_options(sys.argv[1:]), stage='merge')
+    elif '--backfill' in sys.argv[1:]:
+        # --backfill <archive directory> [--workers N] ingests archived pages and CSV files for many seasons
+        # (see league_backfill.py); the default is one worker process per CPU
+        from league_backfill import backfill
+        arguments = sys.argv[1:]
+        directory = arguments[arguments.index('--backfill') + 1]
+        workers = int(arguments[arguments.index('--workers') + 1]) if '--workers' in arguments else None
+        sys.exit(0 if backfill(directory, workers) else 1)
+    else:
+        main()
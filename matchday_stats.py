@@ -0,0 +1,58 @@
+# Derived columns of one new matchday, computed from the previous matchday alone with plain Python.
+# This is the hourly path of manutd.py and must not import pandas or numpy; the vectorized
+# counterpart for whole seasons is compute_derived_stats in league_stats.py.
+
+# Columns derived from the raw per-matchday standings
+DERIVED_COLUMNS = ["last result", "form", "gf", "ga", "games scored in", "clean sheets"]
+
+# Number of results shown in the 'form' column (oldest first, newest last)
+FORM_LENGTH = 5
+
+
+# Function to derive the columns of a single new matchday from the previous matchday alone.
+# `current` needs 'played', 'points', 'goals for' and 'goals against'; `previous` is the row for
+# played - 1 of the same season (or None when played == 1) and must also carry its derived columns.
+# Returns None when the row cannot be derived incrementally and the season needs a full rebuild.
+def derive_next_row(current, previous=None):
+    played = int(current["played"])
+    if played < 1:
+        return None
+    if played == 1:
+        previous = None
+    elif previous is None or int(previous["played"]) != played - 1:
+        return None
+
+    if previous is None:
+        point_diff = current["points"]
+        gf = 0 if current["goals for"] == 0 else 1
+        ga = 1 if current["goals against"] > 0 else 0
+        earlier_results = []
+        games_scored_in = 0
+        clean_sheets = 0
+    else:
+        point_diff = current["points"] - previous["points"]
+        gf = 1 if current["goals for"] > previous["goals for"] else 0
+        ga = 1 if current["goals against"] > previous["goals against"] else 0
+        earlier_results = str(previous["form"]).split("-")
+        # The previous form must cover every matchday in its window, otherwise history has gaps
+        if len(earlier_results) != min(played - 1, FORM_LENGTH):
+            return None
+        earlier_results = earlier_results[len(earlier_results) - min(played - 1, FORM_LENGTH - 1):]
+        games_scored_in = int(previous["games scored in"])
+        clean_sheets = int(previous["clean sheets"])
+
+    if point_diff == 3:
+        last_result = "W"
+    elif point_diff == 1:
+        last_result = "D"
+    else:
+        last_result = "L"
+
+    return {
+        "last result": last_result,
+        "form": "-".join(earlier_results + [last_result]),
+        "gf": gf,
+        "ga": ga,
+        "games scored in": games_scored_in + (1 if gf == 1 else 0),
+        "clean sheets": clean_sheets + (1 if ga == 0 else 0),
+    }
@@ -0,0 +1,240 @@
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Per-stage metrics of the scheduled scripts (taxi.py, manutd.py, stadfangaskra.py). Each run appends
+# one JSON record to a JSON-lines log: the run's status and, for every stage (fetch, parse, transform,
+# merge, write ...), wall time, CPU time, peak memory, rows processed and bytes fetched.
+# Every stage records the process's peak RSS when it ends, so the stage that raised the high-water mark
+# stands out. With PIPELINE_METRICS_TRACEMALLOC=1 each stage also records its own peak of traced Python
+# and numpy allocations (tracemalloc, reset at the start of the stage); this is off by default because
+# tracing made the scripts three to six times slower. The report command shows each stage's recent
+# trend and flags stages whose latest run is well above their usual time or memory.
+METRICS_FILENAME = os.environ.get('PIPELINE_METRICS_FILE', 'pipeline_metrics.jsonl')
+TRACE_MEMORY = os.environ.get('PIPELINE_METRICS_TRACEMALLOC') == '1'
+# Latest run vs the median of the runs before it: flagged above this ratio and difference
+REGRESSION_RATIO = 1.5
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 5
+HISTORY_RUNS = 10
+MIN_EARLIER_RUNS = 2
+SPARK_CHARACTERS = '▁▂▃▄▅▆▇█'
+# Context managers run around a stage, by stage name; set by pipeline_profile.py for --profile runs
+STAGE_PROFILERS = {}
+
+
+class DeadlineExceeded(Exception):
+    # Raised when a run reaches a stage after its deadline (see runner.py); the run is recorded as 'timeout'
+    pass
+
+
+class RunMetrics:
+    # Usage:
+    #   with RunMetrics('taxi') as metrics:
+    #       with metrics.stage('fetch') as stage:
+    #           response = fetch(url)
+    #           stage['bytes'] = len(response.content)
+    # The record is appended when the with block ends; an exception marks the run as 'error'.
+    # When several jobs run in one process (runner.py), a run can also carry a deadline (a time.monotonic()
+    # value: no stage starts after it) and a process pool for its CPU-heavy stages (see offload()).
+    def __init__(self, job, filename=METRICS_FILENAME, deadline=None, executor=None):
+        self.job = job
+        self.filename = filename
+        self.deadline = deadline
+        self.executor = executor
+        self.status = 'ok'
+        self.stages = []
+
+    def __enter__(self):
+        self.started = datetime.now(timezone.utc)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        # Leave tracing alone when the caller (e.g. a profiler) already started it
+        self.owns_tracing = TRACE_MEMORY and not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.status = 'timeout' if issubclass(exc_type, DeadlineExceeded) else 'error'
+        if self.owns_tracing:
+            tracemalloc.stop()
+        self.write()
+        return False
+
+    # Function to measure one stage; the yielded dictionary takes the stage's 'rows' and 'bytes'
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.check_deadline(f"the '{name}' stage")
+        stage = {'stage': name, 'rows': None, 'bytes': None}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        stage_profiler = STAGE_PROFILERS.get(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            if stage_profiler is None:
+                yield stage
+            else:
+                with stage_profiler():
+                    yield stage
+        finally:
+            stage['wall_s'] = round(time.perf_counter() - wall_start, 4)
+            stage['cpu_s'] = round(time.process_time() - cpu_start, 4)
+            stage['peak_rss_mb'] = round(peak_rss_mb(), 1)
+            stage['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 2) if tracing else None
+            self.stages.append(stage)
+
+    # Function to stop the run once its deadline has passed
+    def check_deadline(self, what):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise DeadlineExceeded(f"{self.job} passed its deadline before {what}")
+
+    # Function to run a CPU-heavy stage body, function(*args), in the run's process pool and wait for it
+    # (at most until the deadline); without a pool it is simply called. The function and its arguments
+    # must be picklable; what it prints is captured in the worker and printed here.
+    def offload(self, function, *args):
+        self.check_deadline(function.__name__)
+        if self.executor is None:
+            return function(*args)
+        future = self.executor.submit(call_capturing_output, function, *args)
+        remaining = None if self.deadline is None else max(self.deadline - time.monotonic(), 0)
+        try:
+            result, output = future.result(timeout=remaining)
+        except TimeoutError:
+            future.cancel()
+            raise DeadlineExceeded(f"{self.job} passed its deadline during {function.__name__}") from None
+        print(output, end='')
+        return result
+
+    # Function to build the run's record
+    def record(self):
+        return {
+            'job': self.job,
+            'started': self.started.isoformat(timespec='seconds'),
+            'status': self.status,
+            'wall_s': round(time.perf_counter() - self.wall_start, 4),
+            'cpu_s': round(time.process_time() - self.cpu_start, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': self.stages,
+        }
+
+    # Function to append the run's record to the log. A log that cannot be written never fails the run.
+    def write(self):
+        try:
+            with open(self.filename, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.record(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Could not write metrics to {self.filename}: {e}")
+
+
+# Function to call function(*args) with its printed output captured; returns (result, output).
+# Runs in the process pool workers for RunMetrics.offload().
+def call_capturing_output(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = function(*args)
+    return result, output.getvalue()
+
+
+# Function to report the peak resident memory of this process
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Function to read the records of the log, oldest first (lines that are not valid JSON are skipped)
+def read_records(filename=METRICS_FILENAME):
+    records = []
+    if not os.path.exists(filename):
+        return records
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+# Function to collect each (job, stage)'s values of one metric, oldest first. Runs that failed are left
+# out; runs that stopped early because nothing changed ('unchanged') count for the stages they ran.
+def stage_series(records, metric):
+    series = {}
+    for record in records:
+        if record.get('status') not in ('ok', 'unchanged'):
+            continue
+        for stage in record.get('stages', []):
+            if stage.get(metric) is not None:
+                series.setdefault((record['job'], stage['stage']), []).append(stage[metric])
+    return series
+
+
+# Function to draw a list of numbers as a one-line sparkline
+def sparkline(values):
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK_CHARACTERS[0] * len(values)
+    return ''.join(SPARK_CHARACTERS[int((value - low) / (high - low) * (len(SPARK_CHARACTERS) - 1))] for value in values)
+
+
+# Function to tell whether the latest value regressed against the median of the values before it
+def regressed(values, min_difference):
+    if len(values) <= MIN_EARLIER_RUNS:
+        return False
+    usual = statistics.median(values[:-1])
+    return values[-1] > usual * REGRESSION_RATIO and values[-1] - usual > min_difference
+
+
+# Function to print the trend of every stage of the last `runs` runs and return the stages that regressed
+def report(records, job=None, runs=HISTORY_RUNS):
+    records = [record for record in records if job is None or record.get('job') == job]
+    wall_series = stage_series(records, 'wall_s')
+    rss_series = stage_series(records, 'peak_rss_mb')
+    traced_series = stage_series(records, 'peak_traced_mb')
+    rows_series = stage_series(records, 'rows')
+    flagged = []
+    print(f"{'job':<14} {'stage':<10} {'runs':>4} {'median s':>9} {'latest s':>9} {'RSS MB':>7} {'traced MB':>9} {'rows':>9}  trend (wall)")
+    for (job_name, stage_name), walls in sorted(wall_series.items()):
+        walls = walls[-runs:]
+        peaks = rss_series.get((job_name, stage_name), [0])[-runs:]
+        traced = traced_series.get((job_name, stage_name), [])
+        rows = rows_series.get((job_name, stage_name), [])
+        flags = []
+        if regressed(walls, MIN_REGRESSION_SECONDS):
+            flags.append('SLOWER')
+        if regressed(peaks, MIN_REGRESSION_MB) or regressed(traced[-runs:], MIN_REGRESSION_MB):
+            flags.append('MORE MEMORY')
+        if flags:
+            flagged.append((job_name, stage_name, flags))
+        print(f"{job_name:<14} {stage_name:<10} {len(walls):>4} {statistics.median(walls):>9.3f} {walls[-1]:>9.3f} "
+              f"{peaks[-1]:>7.0f} {f'{traced[-1]:.1f}' if traced else '':>9} {rows[-1] if rows else '':>9}  {sparkline(walls)}  {' '.join(flags)}")
+    return flagged
+
+
+if __name__ == '__main__':
+    # python pipeline_metrics.py report [job] [--runs N]
+    # Exits with status 1 when a stage regressed, so it can gate a workflow step
+    arguments = sys.argv[1:]
+    runs = HISTORY_RUNS
+    if '--runs' in arguments:
+        position = arguments.index('--runs')
+        runs = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    if arguments and arguments[0] == 'report':
+        arguments = arguments[1:]
+    records = read_records(METRICS_FILENAME)
+    if not records:
+        print(f"No runs recorded in {METRICS_FILENAME}.")
+        sys.exit(0)
+    flagged = report(records, arguments[0] if arguments else None, runs)
+    for job_name, stage_name, flags in flagged:
+        print(f"{job_name} {stage_name}: {', '.join(flags).lower()} than usual in the latest run")
+    sys.exit(1 if flagged else 0)
@@ -0,0 +1,199 @@
+import cProfile
+import contextlib
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import pipeline_metrics
+
+# Profiling mode shared by taxi.py, manutd.py and stadfangaskra.py:
+#   python taxi.py --profile                 cProfile reports and a flamegraph stack dump of the whole run
+#   python taxi.py --profile=lines           ... plus time per source line of this repository during one stage
+#   python taxi.py --profile=memory          ... plus the allocations made during one stage, by source line
+#   python taxi.py --profile=lines,memory
+# The stage is the script's transform stage ('merge' for manutd.py, whose rebuild is its transform).
+# Reports go to profiles/ in the working directory, next to the outputs:
+#   <job>.txt          cProfile, sorted by cumulative time and by own time
+#   <job>.pstats       raw cProfile data (python -m pstats, snakeviz ...)
+#   <job>.folded       sampled stacks in the collapsed format of flamegraph.pl and speedscope
+#   <job>_lines.txt    per-line times of the stage
+#   <job>_memory.txt   allocations of the stage
+# The scripts import this module only when --profile is given, so normal runs pay nothing for it.
+PROFILE_DIRECTORY = 'profiles'
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_INTERVAL = 0.005
+REPORT_LINES = 40
+# Allocations made by the profiling machinery itself are left out of the allocation report
+ALLOCATION_FILTERS = [tracemalloc.Filter(False, filename) for filename in
+                      (__file__, pipeline_metrics.__file__, contextlib.__file__, tracemalloc.__file__)]
+
+
+# Function to read the profiling options from the command line: None without --profile, else a set of extras
+def profile_options(argv):
+    options = None
+    for argument in argv:
+        if argument == '--profile':
+            options = options or set()
+        elif argument.startswith('--profile='):
+            options = (options or set()) | {option for option in argument.split('=', 1)[1].split(',') if option}
+    return options
+
+
+class StackSampler:
+    # Samples the stack of one thread at a fixed interval from a background thread and counts each
+    # distinct stack, oldest frame first, as flamegraph.pl's collapsed "frame;frame;frame count" lines
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':'))
+                frame = frame.f_back
+            if stack:
+                key = ';'.join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    # Function to write the collapsed stacks
+    def write(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class LineTimer:
+    # Times every source line of this repository's modules with sys.settrace. A line's time runs until
+    # the next line event of the same frame, so it includes the calls it makes (e.g. into pandas).
+    def __init__(self, directory=REPOSITORY_DIRECTORY):
+        self.directory = directory
+        self.times = {}
+        self.hits = {}
+        self.current = {}
+
+    def _call(self, frame, event, arg):
+        if frame.f_code.co_filename.startswith(self.directory):
+            return self._line
+        return None
+
+    def _line(self, frame, event, arg):
+        now = time.perf_counter()
+        previous = self.current.pop(frame, None)
+        if previous is not None:
+            self.times[previous[0]] = self.times.get(previous[0], 0) + now - previous[1]
+        if event == 'line':
+            key = (frame.f_code.co_filename, frame.f_lineno)
+            self.hits[key] = self.hits.get(key, 0) + 1
+            self.current[frame] = (key, time.perf_counter())
+        return self._line
+
+    @contextlib.contextmanager
+    def tracing(self):
+        sys.settrace(self._call)
+        try:
+            yield
+        finally:
+            sys.settrace(None)
+
+    # Function to write the slowest lines with their hit counts and source
+    def write(self, filename, stage):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"Time per line during the '{stage}' stage (includes time in the calls each line makes)\n")
+            f.write(f"{'ms':>10} {'hits':>9} {'us/hit':>9}  line\n")
+            for key, seconds in sorted(self.times.items(), key=lambda item: item[1], reverse=True)[:REPORT_LINES]:
+                filename_of_line, lineno = key
+                hits = self.hits.get(key, 1)
+                source = linecache.getline(filename_of_line, lineno).strip()
+                f.write(f"{seconds * 1000:>10.1f} {hits:>9} {seconds / hits * 1e6:>9.1f}  "
+                        f"{os.path.relpath(filename_of_line, self.directory)}:{lineno}  {source}\n")
+
+
+# Function to record the allocations made during a stage: tracemalloc snapshots at its start and end,
+# compared by source line, plus the stage's peak
+@contextlib.contextmanager
+def allocation_profile(filename, stage):
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"Allocations during the '{stage}' stage: peak {peak / (1 << 20):.1f} MB traced\n")
+            f.write("Memory still held at the end of the stage, by allocating line:\n")
+            after, before = after.filter_traces(ALLOCATION_FILTERS), before.filter_traces(ALLOCATION_FILTERS)
+            for statistic in after.compare_to(before, 'lineno')[:REPORT_LINES]:
+                f.write(f"{statistic}\n")
+
+
+# Function to write the cProfile reports
+def write_cprofile_reports(profiler, directory, job):
+    profiler.dump_stats(os.path.join(directory, f"{job}.pstats"))
+    with open(os.path.join(directory, f"{job}.txt"), 'w', encoding='utf-8') as f:
+        for sort_key in ('cumulative', 'tottime'):
+            f.write(f"===== sorted by {sort_key} =====\n")
+            pstats.Stats(profiler, stream=f).strip_dirs().sort_stats(sort_key).print_stats(REPORT_LINES)
+
+
+# Function to run a script's main() under cProfile and the stack sampler, with the optional line and
+# allocation profiles of one stage, and write the reports
+def run_profiled(job, main, options, stage='transform', directory=PROFILE_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    stage_profilers = []
+    if 'memory' in options:
+        memory_filename = os.path.join(directory, f"{job}_memory.txt")
+        stage_profilers.append(lambda: allocation_profile(memory_filename, stage))
+    line_timer = None
+    if 'lines' in options:
+        line_timer = LineTimer()
+        stage_profilers.append(line_timer.tracing)
+    for option in options - {'lines', 'memory'}:
+        print(f"Unknown profiling option '{option}' (use lines and/or memory).")
+
+    if stage_profilers:
+        @contextlib.contextmanager
+        def profile_stage():
+            with contextlib.ExitStack() as stack:
+                for stage_profiler in stage_profilers:
+                    stack.enter_context(stage_profiler())
+                yield
+        pipeline_metrics.STAGE_PROFILERS[stage] = profile_stage
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    profiler.enable()
+    try:
+        main()
+    finally:
+        profiler.disable()
+        sampler.stop()
+        pipeline_metrics.STAGE_PROFILERS.pop(stage, None)
+        write_cprofile_reports(profiler, directory, job)
+        sampler.write(os.path.join(directory, f"{job}.folded"))
+        if line_timer is not None:
+            line_timer.write(os.path.join(directory, f"{job}_lines.txt"), stage)
+        print(f"Profile of {job} written to {directory}/")
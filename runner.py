@@ -0,0 +1,159 @@
+import asyncio
+import contextvars
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from pipeline_metrics import DeadlineExceeded
+
+# Single entry point for the scheduled jobs. It runs the due jobs (or the named ones) concurrently in one
+# process, instead of one cold Python process per script:
+#   python runner.py                     the jobs due this hour (UTC), see JOBS
+#   python runner.py taxi manutd         the named jobs, whatever the time
+#   python runner.py --all [--workers N]
+# Each job is its script's main(), run by the asyncio event loop on a thread of its own. The fetches are
+# blocking requests calls, so the jobs' network waits overlap on those threads, all through fetch.py's
+# one pooled session, and the modules the jobs share (pandas, requests ...) are imported once.
+# CPU-heavy stages (taxi's parse, stadfangaskra's transform) go through RunMetrics.offload() to
+# a shared process pool, so they do not hold the GIL the other jobs need. The pool gets one worker per
+# spare CPU; with none, those stages run on their job's thread.
+# Every job has a deadline. Once it passes, the job is reported as timed out and stops before its next
+# stage; an offloaded stage is abandoned, but a stage running on the job's thread cannot be interrupted
+# and the runner exits when it returns (fetch.py's timeouts bound the fetches).
+# Printed lines are prefixed with the job's name. Each job appends its own record to the metrics log as
+# before, but with jobs running side by side its CPU times and peak RSS cover the whole runner.
+
+# Jobs by name: the module whose main() runs the job, when it is due (hourly runs, UTC) and its deadline
+# in seconds. The schedules are those of the jobs' workflows in .github/workflows.
+JOBS = {
+    'stadfangaskra': {'module': 'stadfangaskra', 'due': lambda now: now.weekday() == 6 and now.hour == 0, 'deadline': 3600},
+    'taxi': {'module': 'taxi', 'due': lambda now: now.hour == 0, 'deadline': 600},
+    'manutd': {'module': 'manutd', 'due': lambda now: now.hour >= 12, 'deadline': 300, 'arguments': {'argv': []}},
+}
+# Modules the pool's workers import when the pool starts (forkserver preload), not once per stage
+WORKER_PRELOAD = ['taxi', 'stadfangaskra']
+# Statuses of a job that went as planned
+SUCCESS_STATUSES = ('ok', 'unchanged')
+# Name of the job the current thread or task works for, used to prefix its printed lines
+CURRENT_JOB = contextvars.ContextVar('CURRENT_JOB', default=None)
+
+
+class JobOutput:
+    # Stream that prefixes every line with the name of the job printing it. Partial lines are held per
+    # job until they end, so the lines of jobs printing at the same time do not mix.
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        job = CURRENT_JOB.get()
+        with self.lock:
+            lines = (self.pending.pop(job, '') + text).split('\n')
+            if lines[-1]:
+                self.pending[job] = lines[-1]
+            for line in lines[:-1]:
+                self.stream.write(f"[{job}] {line}\n" if job else f"{line}\n")
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            for job, line in self.pending.items():
+                self.stream.write(f"[{job}] {line}" if job else line)
+            self.pending.clear()
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# Function to pick the jobs to run: the named ones, every job with --all, else the jobs due at `now`
+def select_jobs(names, run_all=False, now=None):
+    if names or run_all:
+        return list(names) if names else list(JOBS)
+    now = now or datetime.now(timezone.utc)
+    return [name for name, job in JOBS.items() if job['due'](now)]
+
+
+# Function to create the process pool for offloaded stages (None when there is no spare CPU)
+def make_process_pool(workers):
+    if workers < 1:
+        return None
+    # forkserver rather than fork: the pool starts while the jobs' threads are running
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(WORKER_PRELOAD)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+# Function to run one job's main() on a thread of its own, within the job's deadline. Returns its status.
+async def run_job(name, executor):
+    job = JOBS[name]
+    CURRENT_JOB.set(name)
+    started = time.perf_counter()
+    deadline = time.monotonic() + job['deadline']
+
+    def run():
+        module = importlib.import_module(job['module'])
+        return module.main(deadline=deadline, executor=executor, **job.get('arguments', {}))
+
+    try:
+        status = await asyncio.wait_for(asyncio.to_thread(run), job['deadline'])
+    except (TimeoutError, DeadlineExceeded):
+        print(f"Deadline of {job['deadline']} s passed; the job stops before its next stage.")
+        status = 'timeout'
+    except Exception:
+        print(traceback.format_exc().rstrip())
+        status = 'error'
+    print(f"Finished in {time.perf_counter() - started:.1f} s: {status}")
+    return status
+
+
+# Function to run the jobs concurrently. Returns {job name: status}.
+async def run_jobs(names, workers):
+    executor = make_process_pool(workers)
+    try:
+        statuses = await asyncio.gather(*(run_job(name, executor) for name in names))
+    finally:
+        if executor is not None:
+            # Stages abandoned at a deadline may still be running in the pool: stop them rather than wait
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in multiprocessing.active_children():
+                process.terminate()
+    return dict(zip(names, statuses))
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    workers = (os.cpu_count() or 1) - 1
+    if '--workers' in arguments:
+        position = arguments.index('--workers')
+        workers = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    run_all = '--all' in arguments
+    names = [argument for argument in arguments if argument != '--all']
+    unknown = [name for name in names if name not in JOBS]
+    if unknown:
+        print(f"Unknown job(s): {', '.join(unknown)} (jobs: {', '.join(JOBS)})")
+        sys.exit(2)
+
+    names = select_jobs(names, run_all)
+    if not names:
+        print("No job is due this hour.")
+        sys.exit(0)
+    print(f"Running {', '.join(names)} with {max(workers, 0)} worker process(es) for CPU-heavy stages.")
+    started = time.perf_counter()
+    sys.stdout = JobOutput(sys.stdout)
+    try:
+        statuses = asyncio.run(run_jobs(names, workers))
+    finally:
+        sys.stdout.flush()
+        sys.stdout = sys.stdout.stream
+    print(f"All jobs finished in {time.perf_counter() - started:.1f} s: "
+          f"{', '.join(f'{name} {status}' for name, status in statuses.items())}")
+    sys.exit(0 if all(status in SUCCESS_STATUSES for status in statuses.values()) else 1)
@@ -0,0 +1,263 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+
+from csv_tail import read_last_rows
+
+# Materialized per-season aggregates of manchester_united_data.csv, so dashboards read a small JSON file
+# instead of rescanning the per-matchday history. Each season's entry holds:
+#   final       the latest matchday's standing (the final one once the season is over)
+#   positions   the best and worst position of the season
+#   curve       per matchday: [played, position, points, points per game, points of the form column]
+#   runs        the longest winning, unbeaten, winless and losing runs (consecutive matchdays)
+#   milestones  the matchday on which 'games scored in' and 'clean sheets' reached each multiple of MILESTONE_STEP
+# manutd.py refreshes the entry of the season it wrote to; the entry keeps a fingerprint of the season's
+# rows, so a season whose rows did not change is not recomputed and the file is not rewritten. The
+# current season's rows are read from the end of the file (csv_tail.py); the whole file is only read when
+# the aggregates file is new, for a full rebuild, or for seasons elsewhere in the file (a backfill).
+# Standard library only, like the rest of manutd.py's hourly path.
+#   python season_aggregates.py                   the final table of every season
+#   python season_aggregates.py season 2024-2025  one season's aggregates
+#   python season_aggregates.py runs [kind]       the longest runs of every kind (or one) over all seasons
+#   python season_aggregates.py rebuild           recompute every season from manchester_united_data.csv
+AGGREGATES_FILENAME = "manchester_united_aggregates.json"
+TEAM_DATA_FILENAME = "manchester_united_data.csv"
+# Entries written by another version of this module are recomputed
+AGGREGATES_VERSION = 1
+FILE_START = f'{{"version": {AGGREGATES_VERSION}, "seasons": ['
+# A season's line in the file starts with its name
+SEASON_LINE = re.compile(r'\{"season": "([^"]+)"')
+MILESTONE_STEP = 5
+# Most rows a season can have in the file (one per matchday); more than this and the whole file is read
+SEASON_ROWS_LIMIT = 60
+RESULT_POINTS = {'W': 3, 'D': 1, 'L': 0}
+# Results continuing each kind of run
+RUN_RESULTS = {'winning': 'W', 'unbeaten': 'WD', 'winless': 'DL', 'losing': 'L'}
+FINAL_COLUMNS = ["played", "position", "won", "drawn", "lost", "goals for", "goals against", "goal difference", "points", "points per game"]
+MILESTONE_COLUMNS = ["games scored in", "clean sheets"]
+
+
+# Function to read a count from the file ("7", "7.0"); None when it is blank or "nan" (some older rows)
+def count(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number == number else None
+
+
+# Function to fingerprint a season's rows as they are in the file
+def rows_fingerprint(rows):
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# Function to find the longest run of consecutive matchdays whose result is one of `results`.
+# Returns {'length', 'from', 'to'} (matchday numbers; the first of equally long runs), or None.
+def longest_run(matchdays, results):
+    best = None
+    start = length = 0
+    previous_played = None
+    for played, result in matchdays:
+        # A matchday without a played count ends any run
+        if played is not None and result and result in results:
+            if length and previous_played is not None and played == previous_played + 1:
+                length += 1
+            else:
+                start, length = played, 1
+            if best is None or length > best['length']:
+                best = {'length': length, 'from': start, 'to': played}
+        else:
+            length = 0
+        previous_played = played
+    return best
+
+
+# Function to read a rate from the file ("1.5"); None when it is blank or not a number
+def rate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Function to compute one season's aggregates from its rows (dictionaries keyed by the file's header).
+# Rows without a played count are left out; None when no row has one.
+def season_summary(rows):
+    rows = sorted((row for row in rows if count(row['played']) is not None), key=lambda row: count(row['played']))
+    if not rows:
+        return None
+    last = rows[-1]
+    positions = [count(row['position']) for row in rows if count(row['position'])]
+    matchdays = [(count(row['played']), row['last result']) for row in rows]
+
+    milestones = {}
+    for col in MILESTONE_COLUMNS:
+        reached = {}
+        for row in rows:
+            value = count(row[col]) or 0
+            for milestone in range(MILESTONE_STEP, value + 1, MILESTONE_STEP):
+                reached.setdefault(str(milestone), count(row['played']))
+        milestones[col] = reached
+
+    return {
+        'matchdays': len(rows),
+        'final': {col: (rate(last[col]) if col == 'points per game' else count(last[col])) for col in FINAL_COLUMNS},
+        'positions': {'best': min(positions), 'worst': max(positions)} if positions else None,
+        'curve': [[count(row['played']), count(row['position']), count(row['points']), rate(row['points per game']),
+                   sum(RESULT_POINTS.get(result, 0) for result in row['form'].split('-'))] for row in rows],
+        'runs': {kind: longest_run(matchdays, results) for kind, results in RUN_RESULTS.items()},
+        'milestones': milestones,
+        'totals': {col: count(last[col]) or 0 for col in MILESTONE_COLUMNS},
+    }
+
+
+# Function to read the rows of the given seasons (all seasons when None) from the team history:
+# {season: [row dictionaries]}. A single season at the end of the file is read from the end.
+def read_season_rows(data_filename, seasons=None):
+    with open(data_filename, 'r', newline='', encoding='utf-8') as csvfile:
+        header = next(csv.reader(csvfile), [])
+    if seasons is not None and len(seasons) == 1:
+        last_rows = [row for offset, row in read_last_rows(data_filename, SEASON_ROWS_LIMIT)]
+        season_rows = []
+        for row in reversed(last_rows):
+            if row[0] != seasons[0]:
+                break
+            season_rows.append(dict(zip(header, row)))
+        # The season must start within the rows read (or the file holds nothing else)
+        if season_rows and len(season_rows) < len(last_rows):
+            return {seasons[0]: season_rows[::-1]}
+
+    rows_by_season = {}
+    with open(data_filename, 'r', newline='', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if seasons is None or row['season'] in seasons:
+                rows_by_season.setdefault(row['season'], []).append(row)
+    return rows_by_season
+
+
+class SeasonAggregates:
+    # The aggregates file: {"version": AGGREGATES_VERSION, "seasons": [entries in season order]}, one season
+    # per line. Each season's line is kept as it was read and only decoded when the season is queried or
+    # refreshed, so an hourly update decodes and encodes one season and changes one line of the file.
+    def __init__(self, filename=AGGREGATES_FILENAME):
+        self.filename = filename
+        self.lines = {}  # season -> its line in the file
+        self.entries = {}  # season -> entry, decoded from its line on first use
+        if os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+            # A file written by another version is left empty here, so every season is recomputed
+            if lines[0] == FILE_START:
+                for line in lines[1:]:
+                    match = SEASON_LINE.match(line)
+                    if match:
+                        self.lines[match.group(1)] = line.rstrip(',')
+
+    def save(self):
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            f.write(FILE_START + '\n')
+            f.write(',\n'.join(self.lines[season] for season in self.seasons()))
+            f.write('\n]}\n')
+        os.replace(temp_filename, self.filename)
+
+    # Function to recompute a season's entry from its rows, unless they are the rows it was computed from.
+    # Returns True when the entry changed.
+    def update_season(self, season, rows):
+        fingerprint = rows_fingerprint([list(row.values()) for row in rows])
+        if rows and season in self.lines and self.season(season)['source'] == fingerprint:
+            return False
+        summary = season_summary(rows) if rows else None
+        if summary is None:
+            self.entries.pop(season, None)
+            return self.lines.pop(season, None) is not None
+        self.entries[season] = dict(season=season, source=fingerprint, **summary)
+        self.lines[season] = json.dumps(self.entries[season], ensure_ascii=False)
+        return True
+
+    # Queries
+    def seasons(self):
+        return sorted(self.lines)
+
+    def season(self, season):
+        if season not in self.entries:
+            self.entries[season] = json.loads(self.lines[season])
+        return self.entries[season]
+
+    # Function to get the final table: one row per season with its latest standing and position range
+    def final_table(self):
+        table = []
+        for season in self.seasons():
+            entry = self.season(season)
+            positions = entry['positions'] or {'best': None, 'worst': None}
+            table.append(dict(season=season, **entry['final'], best=positions['best'], worst=positions['worst']))
+        return table
+
+    # Function to get a season's per-matchday curve as dictionaries
+    def curve(self, season):
+        return [dict(zip(['played', 'position', 'points', 'points per game', 'form points'], point)) for point in self.season(season)['curve']]
+
+    # Function to get the longest runs of a kind over every season, longest first: [(season, run), ...]
+    def longest_runs(self, kind, limit=5):
+        runs = [(season, self.season(season)['runs'][kind]) for season in self.seasons() if self.season(season)['runs'][kind]]
+        return sorted(runs, key=lambda item: -item[1]['length'])[:limit]
+
+    def milestones(self, season):
+        return self.season(season)['milestones']
+
+
+# Function to refresh the aggregates of the given seasons (every season when None, or when the
+# aggregates file is new) from the team history. Returns the seasons whose entries changed.
+def refresh_aggregates(data_filename=TEAM_DATA_FILENAME, seasons=None, aggregates_filename=AGGREGATES_FILENAME):
+    aggregates = SeasonAggregates(aggregates_filename)
+    if not aggregates.lines:
+        seasons = None
+    rows_by_season = read_season_rows(data_filename, None if seasons is None else list(seasons))
+    targets = sorted(set(rows_by_season) | set(aggregates.lines)) if seasons is None else list(seasons)
+    changed = [season for season in targets if aggregates.update_season(season, rows_by_season.get(season, []))]
+    if changed or not os.path.exists(aggregates_filename):
+        aggregates.save()
+    return changed
+
+
+# Aggregates files opened by open_aggregates(), by filename: ((mtime, size), SeasonAggregates)
+_opened = {}
+
+
+# Function to get the aggregates for queries. The file is read again only when it has changed since
+# the last call, so a dashboard can call this on every request.
+def open_aggregates(filename=AGGREGATES_FILENAME):
+    stat = os.stat(filename)
+    key = (stat.st_mtime_ns, stat.st_size)
+    opened = _opened.get(filename)
+    if opened is None or opened[0] != key:
+        opened = _opened[filename] = (key, SeasonAggregates(filename))
+    return opened[1]
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    command = arguments[0] if arguments else 'table'
+    if command == 'rebuild':
+        changed = refresh_aggregates(TEAM_DATA_FILENAME, None, AGGREGATES_FILENAME)
+        print(f"Recomputed {len(changed)} season(s) into {AGGREGATES_FILENAME}.")
+        sys.exit(0)
+    aggregates = open_aggregates()
+    if command == 'season' and len(arguments) >= 2:
+        print(json.dumps(aggregates.season(arguments[1]), ensure_ascii=False, indent=1))
+    elif command == 'runs':
+        for kind in arguments[1:] or list(RUN_RESULTS):
+            for season, run in aggregates.longest_runs(kind):
+                print(f"{kind:<9} {run['length']:>3} matchdays  {season} matchdays {run['from']}-{run['to']}")
+    else:
+        print(f"{'season':<10} {'played':>6} {'position':>8} {'points':>6} {'ppg':>5} {'best':>4} {'worst':>5}")
+        for row in aggregates.final_table():
+            points_per_game = '' if row['points per game'] is None else f"{row['points per game']:.2f}"
+            print(f"{row['season']:<10} {row['played']:>6} {row['position'] or '':>8} {'' if row['points'] is None else row['points']:>6} "
+                  f"{points_per_game:>5} {row['best'] or '':>4} {row['worst'] or '':>5}")
@@ -1,43 +1,123 @@
+import os
+import sys
+import tempfile
 import pandas as pd
-
-# Load the original CSV file, specifying 'HUSMERKING' and 'SVFNR' as string columns
-df = pd.read_csv('https://fasteignaskra.is/Stadfangaskra.csv', dtype={'HUSMERKING': 'string', 'SVFNR': 'string'})
-
-# Select the desired columns for part a
-selected_columns_df_a = df[['SVFNR', 'POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
-
-# Attempt to fill blank HEITI_TGF based on other entries for the same street and postal code for part a
-selected_columns_df_a['HEITI_TGF'] = selected_columns_df_a.groupby(['POSTNR', 'HEITI_NF'])['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
-
-
-# Save the new DataFrame to a CSV file for part a
-selected_columns_df_a.to_csv('stadfangaskra_trimmed.csv', index=False)
-
-print("New CSV file 'stadfangaskra_trimmed.csv' created successfully!")
-
-# Select the desired columns for part b
-selected_columns_df_b = df[['POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']].copy()
-
-# Attempt to fill blank HEITI_TGF based on other entries for the same street and postal code for part b
-selected_columns_df_b['HEITI_TGF'] = selected_columns_df_b.groupby(['POSTNR', 'HEITI_NF'])['HEITI_TGF'].transform(lambda x: x.fillna(x.dropna().iloc[0]) if not x.dropna().empty else x)
-
-
-# Append 'HUSMERKING' to 'HEITI_NF' and 'HEITI_TGF' only if it exists
-selected_columns_df_b['HEITI_NF'] = selected_columns_df_b.apply(lambda row: f"{row['HEITI_NF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' else row['HEITI_NF'], axis=1)
-selected_columns_df_b['HEITI_TGF'] = selected_columns_df_b.apply(lambda row: f"{row['HEITI_TGF']} {row['HUSMERKING']}" if pd.notna(row['HUSMERKING']) and row['HUSMERKING'] != '' and pd.notna(row['HEITI_TGF']) else row['HEITI_TGF'], axis=1)
-
-
-# Drop the original 'HUSMERKING' column
-selected_columns_df_b = selected_columns_df_b.drop('HUSMERKING', axis=1)
-
-# Remove duplicate entries based on 'POSTNR' and 'HEITI_NF'
-selected_columns_df_b = selected_columns_df_b.drop_duplicates(subset=['POSTNR', 'HEITI_NF'])
-
-# Sort the DataFrame by 'POSTNR' and then 'HEITI_NF'
-selected_columns_df_b = selected_columns_df_b.sort_values(by=['POSTNR', 'HEITI_NF'])
-
-
-# Save the new DataFrame to a CSV file for part b
-selected_columns_df_b.to_csv('icelandic_addresses.csv', index=False)
-
-print("New CSV file 'icelandic_addresses.csv' created successfully!")
+from fetch import download_to_cache
+from address_changes import address_changes, write_changes, replace_if_changed, CHANGES_FILENAME
+from pipeline_metrics import RunMetrics, peak_rss_mb
+from stadfangaskra_transform import read_registry_chunks, first_dative_names, transform_chunk, REGISTRY_DTYPES, STREET_KEY, ADDRESS_COLUMNS
+
+# The national address registry (STADFANGASKRA_URL can point at a local stand-in or a local file)
+REGISTRY_URL = os.environ.get('STADFANGASKRA_URL', 'https://fasteignaskra.is/Stadfangaskra.csv')
+# The download is cached locally and only fetched again when the server reports a change
+CACHE_DIRECTORY = 'stadfangaskra_cache'
+CACHE_FILENAME = os.path.join(CACHE_DIRECTORY, 'Stadfangaskra.csv')
+FETCH_STATE_FILENAME = os.path.join(CACHE_DIRECTORY, 'fetch_state.json')
+# Outputs: part a (every registry row, trimmed) and part b (one row per street and postal code)
+TRIMMED_FILENAME = 'stadfangaskra_trimmed.csv'
+ADDRESSES_FILENAME = 'icelandic_addresses.csv'
+
+# Each stage below is a function, so a stage can be run on its own against saved registry files
+# (see benchmarks/suite.py); main() runs them in order.
+
+
+# Function to append a chunk's part b rows to one spill file per postal code, so the final
+# de-duplication and sort only ever hold a single postal code's addresses in memory
+def spill_by_postcode(chunk_b, spill_directory, spill_files):
+    for postnr, rows in chunk_b.groupby('POSTNR', dropna=False, sort=False):
+        if postnr not in spill_files:
+            spill_files[postnr] = os.path.join(spill_directory, f"{len(spill_files)}.csv")
+        rows.to_csv(spill_files[postnr], mode='a', header=False, index=False)
+
+
+# Function to write part b from the spill files: postal codes in order (blank last), then each
+# postal code's first entry per HEITI_NF sorted by HEITI_NF
+def write_addresses(spill_files, output_filename, columns):
+    postcodes = sorted(postnr for postnr in spill_files if pd.notna(postnr))
+    postcodes += [postnr for postnr in spill_files if pd.isna(postnr)]
+    pd.DataFrame(columns=columns).to_csv(output_filename, index=False)
+    for postnr in postcodes:
+        addresses = pd.read_csv(spill_files[postnr], names=columns, dtype={col: REGISTRY_DTYPES[col] for col in columns})
+        addresses = addresses.drop_duplicates(subset=STREET_KEY).sort_values(by=STREET_KEY)
+        addresses.to_csv(output_filename, mode='a', header=False, index=False)
+
+
+# Function to download (or reuse) the registry, unless the URL names a local file.
+# Returns the registry's filename and the number of bytes downloaded (0 when the cached copy was kept).
+def fetch_registry(registry_url=REGISTRY_URL):
+    if os.path.exists(registry_url):
+        return registry_url, 0
+    if download_to_cache(registry_url, CACHE_FILENAME, FETCH_STATE_FILENAME):
+        return CACHE_FILENAME, os.path.getsize(CACHE_FILENAME)
+    return CACHE_FILENAME, 0
+
+
+# Function to run both passes over the registry and write part a to `trimmed_temp` and part b to
+# `addresses_temp`: first the dative name of every street (for back-filling blank HEITI_TGF), then one
+# shared transform per chunk feeding part a (written as it goes) and part b (spilled by postal code).
+# Returns the number of registry rows.
+def transform_registry(registry_filename, trimmed_temp, addresses_temp):
+    dative_names = first_dative_names(read_registry_chunks(registry_filename, STREET_KEY + ['HEITI_TGF']))
+
+    registry_rows = 0
+    with tempfile.TemporaryDirectory() as spill_directory:
+        spill_files = {}
+        for chunk_number, chunk in enumerate(read_registry_chunks(registry_filename, list(REGISTRY_DTYPES))):
+            trimmed, addresses = transform_chunk(chunk, dative_names)
+            trimmed.to_csv(trimmed_temp, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0, index=False)
+            spill_by_postcode(addresses, spill_directory, spill_files)
+            registry_rows += len(chunk)
+
+        # Remove duplicate entries based on 'POSTNR' and 'HEITI_NF', sort by 'POSTNR' and then 'HEITI_NF' and save part b
+        write_addresses(spill_files, addresses_temp, ADDRESS_COLUMNS)
+    return registry_rows
+
+
+# Function to move the new outputs into place (files whose content did not change are left untouched)
+# and write the change set against the previous part b. Returns True when part b changed.
+def publish_outputs(trimmed_temp, addresses_temp, trimmed_filename=TRIMMED_FILENAME, addresses_filename=ADDRESSES_FILENAME, changes_filename=CHANGES_FILENAME):
+    if replace_if_changed(trimmed_temp, trimmed_filename):
+        print(f"New CSV file '{trimmed_filename}' created successfully!")
+    else:
+        print(f"'{trimmed_filename}' is unchanged.")
+
+    # Change set against the previous part b, keyed by (POSTNR, HEITI_NF), for consumers that patch instead of reloading
+    changes = address_changes(addresses_filename, addresses_temp)
+    write_changes(changes, changes_filename + '.tmp')
+    replace_if_changed(changes_filename + '.tmp', changes_filename)
+    print(f"Change set '{changes_filename}': {sum(1 for c in changes if c[0] == 'added')} added, "
+          f"{sum(1 for c in changes if c[0] == 'removed')} removed, {sum(1 for c in changes if c[0] == 'modified')} modified")
+
+    addresses_changed = replace_if_changed(addresses_temp, addresses_filename)
+    if addresses_changed:
+        print(f"New CSV file '{addresses_filename}' created successfully!")
+    else:
+        print(f"'{addresses_filename}' is unchanged.")
+    return addresses_changed
+
+
+# Function to run the whole job. Each stage's time, memory and row count is appended to the metrics log
+# (see pipeline_metrics.py). runner.py passes a deadline and a process pool, which runs the transform
+# stage. Returns the run's status.
+def main(deadline=None, executor=None):
+    with RunMetrics('stadfangaskra', deadline=deadline, executor=executor) as metrics:
+        with metrics.stage('fetch') as stage:
+            registry_filename, stage['bytes'] = fetch_registry()
+
+        trimmed_temp = TRIMMED_FILENAME + '.tmp'
+        addresses_temp = ADDRESSES_FILENAME + '.tmp'
+        with metrics.stage('transform') as stage:
+            stage['rows'] = metrics.offload(transform_registry, registry_filename, trimmed_temp, addresses_temp)
+        with metrics.stage('write'):
+            publish_outputs(trimmed_temp, addresses_temp)
+        print(f"Peak memory (RSS) after the registry ingest: {peak_rss_mb():.0f} MB")
+    return metrics.status
+
+
+if __name__ == '__main__':
+    # --profile[=lines,memory] runs the job under the profilers of pipeline_profile.py
+    if any(argument.startswith('--profile') for argument in sys.argv[1:]):
+        from pipeline_profile import run_profiled, profile_options
+        run_profiled('stadfangaskra', main, profile_options(sys.argv[1:]))
+    else:
+        main()
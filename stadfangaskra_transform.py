@@ -0,0 +1,61 @@
+import pandas as pd
+
+# Column-wise transform stage shared by both stadfangaskra.py outputs: the HEITI_TGF back-fill is
+# computed once per chunk and feeds stadfangaskra_trimmed.csv (part a) and icelandic_addresses.csv (part b).
+
+# Only the needed registry columns are read, with compact dtypes
+REGISTRY_DTYPES = {'SVFNR': 'category', 'POSTNR': 'Int16', 'HEITI_NF': 'string', 'HEITI_TGF': 'string', 'HUSMERKING': 'string'}
+STREET_KEY = ['POSTNR', 'HEITI_NF']
+TRIMMED_COLUMNS = ['SVFNR', 'POSTNR', 'HEITI_NF', 'HEITI_TGF', 'HUSMERKING']
+ADDRESS_COLUMNS = ['POSTNR', 'HEITI_NF', 'HEITI_TGF']
+CHUNK_ROWS = 50_000
+
+
+# Function to read the registry in chunks, keeping only the given columns
+def read_registry_chunks(filename, columns, chunk_rows=CHUNK_ROWS):
+    return pd.read_csv(filename, usecols=columns, dtype={col: REGISTRY_DTYPES[col] for col in columns}, chunksize=chunk_rows)
+
+
+# Function to get the first non-blank HEITI_TGF of every street (POSTNR, HEITI_NF) in a frame, in row order
+def dative_names_in(frame):
+    return frame[STREET_KEY + ['HEITI_TGF']].dropna().drop_duplicates(subset=STREET_KEY)
+
+
+# Function to find the first non-blank HEITI_TGF of every street over all chunks of the registry.
+# Only one row per street is kept, so the result is as large as the street list, not the registry.
+def first_dative_names(chunks):
+    first = None
+    for chunk in chunks:
+        named = dative_names_in(chunk)
+        first = named if first is None else pd.concat([first, named]).drop_duplicates(subset=STREET_KEY)
+    if first is None:
+        return pd.Series(dtype='string', index=pd.MultiIndex.from_arrays([[], []], names=STREET_KEY))
+    return first.set_index(STREET_KEY)['HEITI_TGF']
+
+
+# Function to fill blank HEITI_TGF from the street's first dative name with one lookup per row.
+# Rows without a POSTNR or HEITI_NF get no HEITI_TGF, as with the previous groupby transform.
+def fill_dative_names(chunk, dative_names):
+    keys = pd.MultiIndex.from_frame(chunk[STREET_KEY])
+    backfill = pd.Series(dative_names.reindex(keys).to_numpy(), index=chunk.index, dtype='string')
+    has_key = chunk['POSTNR'].notna() & chunk['HEITI_NF'].notna()
+    return chunk['HEITI_TGF'].fillna(backfill).where(has_key)
+
+
+# Function to append 'HUSMERKING' to a name column where a house marking exists (and the name is not blank)
+def with_house_marking(names, house_markings):
+    has_marking = (house_markings.notna() & (house_markings != '')).fillna(False)
+    return names.where(~(has_marking & names.notna()), names + ' ' + house_markings)
+
+
+# Function to transform one chunk into its part a rows and its (chunk-level de-duplicated) part b rows
+def transform_chunk(chunk, dative_names):
+    chunk = chunk.copy()
+    chunk['HEITI_TGF'] = fill_dative_names(chunk, dative_names)
+    trimmed = chunk[TRIMMED_COLUMNS]
+    addresses = pd.DataFrame({
+        'POSTNR': chunk['POSTNR'],
+        'HEITI_NF': with_house_marking(chunk['HEITI_NF'], chunk['HUSMERKING']),
+        'HEITI_TGF': with_house_marking(chunk['HEITI_TGF'], chunk['HUSMERKING']),
+    })
+    return trimmed, addresses.drop_duplicates(subset=STREET_KEY)
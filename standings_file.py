@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+# On-disk format of the league standings store (see league_store.py): one compressed .npz file with a
+# typed numpy array per column, rows sorted by (season, team, played), season and team names stored
+# once (sorted) and referenced by int16 codes. This module reads and writes the file with numpy alone,
+# so the hourly upsert in manutd.py does not load pandas; LeagueStore builds its DataFrame on top.
+STORE_FILENAME = "premier_league_standings.npz"
+KEY_COLUMNS = ["season", "team", "played"]
+# Position 0 means the position is not known (some imported history has no position)
+STAT_COLUMNS = ["position", "won", "drawn", "lost", "goals for", "goals against", "goal difference", "points"]
+STORE_COLUMNS = KEY_COLUMNS + STAT_COLUMNS
+# The integer columns, by their array name in the file
+NUMBER_ARRAYS = [col.replace(" ", "_") for col in ["played"] + STAT_COLUMNS]
+
+
+# Function to read the store's arrays (empty arrays when the file does not exist yet)
+def read_store_arrays(filename=STORE_FILENAME):
+    if not os.path.exists(filename):
+        arrays = {"season_names": np.array([], dtype=str), "team_names": np.array([], dtype=str)}
+        for name in ["season_codes", "team_codes"] + NUMBER_ARRAYS:
+            arrays[name] = np.array([], dtype="int16")
+        return arrays
+    with np.load(filename, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+# Function to write the store's arrays atomically
+def write_store_arrays(filename, arrays):
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temp_filename, filename)
+
+
+# Function to read a position, which may be blank or missing in imported rows
+def position_number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+# Function to insert rows (dictionaries keyed by STORE_COLUMNS) straight into the store file, replacing
+# any existing rows with the same (season, team, played). Gives the same file as LeagueStore's
+# upsert() and save(), without building a DataFrame of the whole store.
+def upsert_store_file(filename, rows):
+    latest = {}
+    for row in rows:
+        latest[(row["season"], row["team"], int(row["played"]))] = row
+    rows = list(latest.values())
+    arrays = read_store_arrays(filename)
+
+    # Name tables over the old and new names; the old codes are translated into the new tables
+    old_seasons = arrays["season_names"][arrays["season_codes"]]
+    old_teams = arrays["team_names"][arrays["team_codes"]]
+    new_seasons = np.array([row["season"] for row in rows], dtype=str)
+    new_teams = np.array([row["team"] for row in rows], dtype=str)
+    season_names = np.union1d(arrays["season_names"], new_seasons)
+    team_names = np.union1d(arrays["team_names"], new_teams)
+    season_codes = np.concatenate([np.searchsorted(season_names, old_seasons), np.searchsorted(season_names, new_seasons)]).astype("int16")
+    team_codes = np.concatenate([np.searchsorted(team_names, old_teams), np.searchsorted(team_names, new_teams)]).astype("int16")
+
+    numbers = {}
+    for name, col in zip(NUMBER_ARRAYS, ["played"] + STAT_COLUMNS):
+        values = [position_number(row[col]) if col == "position" else int(row[col]) for row in rows]
+        numbers[name] = np.concatenate([arrays[name], np.array(values, dtype="int16")])
+
+    # Drop the old rows whose key is replaced, then sort by (season, team, played)
+    keys = (season_codes.astype("int64") << 32) | (team_codes.astype("int64") << 16) | numbers["played"].astype("int64")
+    old_count = len(old_seasons)
+    kept = np.ones(len(keys), dtype=bool)
+    kept[:old_count] = ~np.isin(keys[:old_count], keys[old_count:])
+    order = np.flatnonzero(kept)
+    order = order[np.lexsort((numbers["played"][order], team_codes[order], season_codes[order]))]
+
+    result = {
+        "season_names": season_names,
+        "season_codes": season_codes[order],
+        "team_names": team_names,
+        "team_codes": team_codes[order],
+    }
+    for name in NUMBER_ARRAYS:
+        result[name] = numbers[name][order]
+    write_store_arrays(filename, result)
+    return int(len(order))
@@ -0,0 +1,68 @@
+import re
+
+# Rows shared by manutd.py's hourly run and the backfill of archived standings (league_backfill.py):
+# the team's manchester_united_data.csv rows and every team's league standings store rows, built from
+# the standings table's cells.
+TEAM_NAME = "Manchester United"
+DATA_FILENAME = "manchester_united_data.csv"
+DATA_HEADER = ["season", "position", "", "team", "played", "won", "drawn", "lost", "goals", "goal difference", "points", "goals for", "goals against", "points per game", "last result", "form", "gf", "ga", "games scored in", "clean sheets"]
+
+
+# Function to build the team's manchester_united_data.csv row (Part A of manutd.py) without the derived columns
+# from the extracted data
+def team_data_row(extracted_data, season_string):
+    # The indices in extracted_data are relative to the list after initial processing
+    played = int(extracted_data[3])
+    points = int(extracted_data[10]) # Correct index for points
+    goals_for = int(extracted_data[7]) # Correct index for goals_for
+    goals_against = int(extracted_data[8]) # Correct index for goals_against
+    goal_difference = int(extracted_data[9]) # Correct index for goal_difference
+    combined_goals = f"{goals_for}:{goals_against}"
+
+
+    points_per_game = round(points / played, 2) if played > 0 else 0 # Added rounding
+
+    # Construct the new row data as a list with the desired columns and order
+    return [
+        season_string,          # season
+        extracted_data[0],      # position
+        "",                     # empty column
+        extracted_data[2],      # team
+        extracted_data[3],      # played
+        extracted_data[4],      # won
+        extracted_data[5],      # drawn
+        extracted_data[6],      # lost
+        combined_goals,         # goals (combined)
+        extracted_data[9],      # goal_difference (from extracted_data)
+        extracted_data[10],     # points (from extracted_data)
+        goals_for,              # goals for (calculated)
+        goals_against,          # goals against (calculated)
+        points_per_game         # points per game (calculated)
+    ]
+
+
+# Function to turn every team's table row into a league store row
+def league_rows_from_table(football_table_rows, season_string):
+    league_rows = []
+    for row in football_table_rows or []:
+        # Cells: position and team, played, won, drawn, lost, goals for, goals against, goal difference, points, form
+        match = re.match(r'(\d+)\s*(.+)', row[0]) if row else None
+        if not match or len(row) < 9:
+            continue # Header or unexpected row
+        try:
+            league_rows.append({
+                "season": season_string,
+                "team": match.group(2).strip(),
+                "played": int(row[1]),
+                "position": int(match.group(1)),
+                "won": int(row[2]),
+                "drawn": int(row[3]),
+                "lost": int(row[4]),
+                "goals for": int(row[5]),
+                "goals against": int(row[6]),
+                "goal difference": int(row[7]),
+                "points": int(row[8]),
+            })
+        except ValueError as e:
+            print(f"Skipping league row {row}: {e}")
+    return league_rows
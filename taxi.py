@@ -1,10 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
 from io import StringIO
 from datetime import datetime
 import os
+import sys
+import sqlite3
+from operator import itemgetter
 import pandas as pd # Import pandas for the second part
+from fetch import fetch, content_fingerprint
+from html_tables import extract_table_rows, text_of_previous_p, table_markup
+from taxi_summary import open_summary_store, SUMMARY_DB_FILENAME, SUMMARY_CSV_FILENAME
+from taxi_records import build_license_ids, station_categories, LicenseBatch
+from taxi_snapshots import SnapshotStore, SNAPSHOT_DIRECTORY, ROW_COLUMNS as SNAPSHOT_ROW_COLUMNS
+from pipeline_metrics import RunMetrics
 
 # Define the desired output column names and their corresponding expected scraped header names
 OUTPUT_COLUMN_MAPPING = {
@@ -15,217 +22,227 @@ OUTPUT_COLUMN_MAPPING = {
     "Forráðamaður, ef lögaðili": "Forráðamaður ef lögaðili" # Handle potential variation in header
 }
 
-# Part (a): Web scraping and preparing new daily data
-url = "https://island.is/listi-yfir-rekstrarleyfishafa-i-leigubilaakstri"
-response = requests.get(url)
+# Class attributes used to locate the license table and the update stamp on the page
+LICENSE_TABLE_CLASS = '_1wc4apv0 _1wc4apv5 _1ovv93d1o3 _1ovv93d1o4 b7a64p0'
+UPDATE_STAMP_DIV_CLASS = '_1wc4apv0 _1ovv93d1o3 hpuvl25'
 
-# Get the current date
-current_date = datetime.now().date() # Use date() for date comparison
-# Get the current date in yyyy-mm-dd format for filename and directory
-current_date_yyyymmdd = datetime.now().strftime("%Y-%m-%d")
-current_year = datetime.now().strftime("%Y")
+# The license list page (TAXI_URL can point at a local stand-in, see fixture_server.py)
+LICENSES_URL = os.environ.get('TAXI_URL', "https://island.is/listi-yfir-rekstrarleyfishafa-i-leigubilaakstri")
 
+# Each stage below is a function, so a stage can be run on its own against saved pages
+# (see benchmarks/suite.py); main() runs them in order.
 
-# Check if the request was successful
-if response.status_code == 200:
-    soup = BeautifulSoup(response.content, 'html.parser')
 
-    table = soup.find('table', class_='_1wc4apv0 _1wc4apv5 _1ovv93d1o3 _1ovv93d1o4 b7a64p0')
-
-    # Find the div element with the specific class
-    target_element = soup.find('div', class_='_1wc4apv0 _1ovv93d1o3 hpuvl25')
+# Function to decode the page (island.is serves UTF-8)
+def page_text(response):
+    try:
+        return response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return response.text
+
+
+# Function to get the "Uppfært af Samgöngustofu" stamp from the page (None when it cannot be found)
+def source_stamp(html_content):
+    extracted_value = text_of_previous_p(html_content, f'class="{UPDATE_STAMP_DIV_CLASS}"')
+    if extracted_value is None:
+        return None
+    # Remove the first 8 characters from the extracted value
+    return extracted_value[8:]
+
+
+# Function to fingerprint the license table's markup, so a republished list can be told from an unchanged one
+def table_digest(html_content):
+    return content_fingerprint(table_markup(html_content, f'class="{LICENSE_TABLE_CLASS}"'))
+
+
+# Function to record the day without parsing the page when the list has not been republished: the stamp
+# and the table digest equal those of the last recorded day. The snapshot store gets a 'same' entry (no
+# file) and the summary's last appearances move to the day with one UPDATE.
+# Returns True when the day was handled this way.
+def record_unchanged_day(stamp, digest, current_date, db_filename=SUMMARY_DB_FILENAME, csv_filename=SUMMARY_CSV_FILENAME, snapshot_directory=SNAPSHOT_DIRECTORY):
+    snapshot_store = SnapshotStore(snapshot_directory)
+    latest = snapshot_store.latest()
+    day = current_date.isoformat()
+    if latest is None or stamp is None or digest is None or latest['date'] > day:
+        return False
+    if latest['uppfaert'] != stamp or latest.get('digest') != digest:
+        return False
+    if latest['date'] == day:
+        print(f"Daily data for {day} is already stored and the list is unchanged. Nothing to do.")
+        return True
+    # The summary first: if recording the snapshot fails, the next run repeats both steps harmlessly
+    with open_summary_store(db_filename, csv_filename) as summary_store:
+        seen_again = summary_store.repeat_day(latest['date'], day)
+        summary_store.export_csv(csv_filename)
+    snapshot_store.record_unchanged(day, stamp, digest)
+    print(f"List unchanged since {latest['date']} (updated {stamp}): {day} recorded as the same list, "
+          f"{seen_again} license holders seen again")
+    return True
+
+
+# Function to extract the update stamp and the license rows from the page, without building a tree for the whole page.
+# Returns (extracted_value_truncated, batch): a LicenseBatch holding the rows column by column, with the
+# stamp and the date stored once.
+def parse_licenses(html_content, current_date):
+    # Find the license table rows
+    table_rows = extract_table_rows(html_content, {'class': LICENSE_TABLE_CLASS})
 
     # Initialize extracted_value_truncated with a default value
     extracted_value_truncated = ""
 
-    # If the target element is found, find the previous p element
-    if target_element:
-        previous_p_element = target_element.find_previous('p')
-        if previous_p_element:
-            extracted_value = previous_p_element.get_text(strip=True)
-            # Remove the first 8 characters from the extracted value
-            extracted_value_truncated = extracted_value[8:]
-            print(f"Extracted and truncated value: {extracted_value_truncated}")
-        else:
-            print("No previous p element found.")
-    else:
-        print("Target element with the specified class not found.")
-
-    new_data_list = []
-    if table:
-        rows = table.find_all('tr')
-        if rows:
-            # Get the header row (first row)
-            header_row = rows[0]
-            header_cols = header_row.find_all(['th', 'td'])
-            header_names = [col.get_text(strip=True) for col in header_cols]
-
-            # Create a mapping from desired output column names to their index in the scraped header
-            scraped_col_indices = {}
-            for output_col, scraped_header in OUTPUT_COLUMN_MAPPING.items():
-                 try:
-                     # Find the index of the scraped header name in the actual scraped headers
-                     scraped_col_indices[output_col] = header_names.index(scraped_header)
-                 except ValueError:
-                     # If a required header is not found, print a warning or handle as needed
-                     print(f"Warning: Scraped header '{scraped_header}' not found in table headers.")
-                     scraped_col_indices[output_col] = -1 # Assign -1 to indicate column not found
-
-
-            # Process the data rows (starting from the second row)
-            for row in rows[1:]:
-                cols = row.find_all(['th', 'td'])
-                row_data = [col.get_text(strip=True) for col in cols]
-
-                # Prepare a dictionary to hold the data for the new row
-                new_row_data = {}
-
-                # Populate the dictionary based on the scraped column indices
-                for col_name, index in scraped_col_indices.items():
-                    if index != -1 and index < len(row_data):
-                        new_row_data[col_name] = row_data[index]
-                    else:
-                        new_row_data[col_name] = "" # Ensure all expected columns are present
-
-                # Special handling for Kennitala padding
-                if "Kennitala" in new_row_data:
-                     kennitala = new_row_data["Kennitala"]
-                     if len(kennitala) == 9:
-                         new_row_data["Kennitala"] = "0" + kennitala
-
-                # Add the "Uppfært af Samgöngustofu" and "Date" columns
-                new_row_data["Uppfært af Samgöngustofu"] = extracted_value_truncated
-                new_row_data["Date"] = current_date # Store as date object for easier comparison
-
-                new_data_list.append(new_row_data)
-
-    # Convert the list of dictionaries to a pandas DataFrame
-    new_df = pd.DataFrame(new_data_list)
-
-    # Generate the 'ID' column for the new data
-    def generate_id(row):
-        id_parts = [str(row['Nafn'])]
-        if pd.notna(row['Stöð']) and str(row['Stöð']).strip() != '' and str(row['Stöð']).lower() != 'nan':
-            id_parts.append(str(row['Stöð']).replace('.0', '')) # Ensure string and remove .0 if present
-        if pd.notna(row['Stöðvarnúmer']) and str(row['Stöðvarnúmer']).strip() != '' and str(row['Stöðvarnúmer']).lower() != 'nan':
-            id_parts.append(str(row['Stöðvarnúmer']).replace('.0', '')) # Ensure string and remove .0 if present
-        return " - ".join(id_parts)
-
-    new_df['ID'] = new_df.apply(generate_id, axis=1)
-
-    # Ensure 'Stöð' column is string type and replace "nan" with empty string in new_df
-    # Corrected escape sequence
-    new_df['Stöð'] = new_df['Stöð'].astype(str).replace(r'\.0$', '', regex=True).replace('nan', '')
-
-
-    # Part (b): Update the summary CSV file
-    summary_filename = "taxi_licenses_summary.csv"
-
-    # Define the columns expected in the summary file
-    summary_cols = ['Nafn', 'First appearance', 'Last appearance', 'ID']
-
-    # Check if the summary file exists
-    if os.path.exists(summary_filename):
-        # Read the existing summary file with specific error handling for parsing
-        try:
-            summary_df = pd.read_csv(summary_filename, on_bad_lines='warn') # Use warn for bad lines
-            # Ensure all expected columns are present after reading, add if missing
-            for col in ['First appearance', 'Last appearance', 'ID']:
-                if col not in summary_df.columns:
-                    summary_df[col] = pd.NaT # Add missing date columns as NaT
-            # Convert date columns to datetime objects for comparison
-            summary_df['First appearance'] = pd.to_datetime(summary_df['First appearance'], format='%d.%m.%Y', errors='coerce').dt.date
-            summary_df['Last appearance'] = pd.to_datetime(summary_df['Last appearance'], format='%d.%m.%Y', errors='coerce').dt.date
-
-            # Drop 'Kennitala' and 'Stöð' columns if they exist in the read summary_df
-            columns_to_drop = ['Kennitala', 'Stöð']
-            for col in columns_to_drop:
-                if col in summary_df.columns:
-                    summary_df = summary_df.drop(columns=[col])
-
-        except pd.errors.EmptyDataError:
-             print(f"Warning: Summary file '{summary_filename}' is empty. Starting with an empty summary.")
-             summary_df = pd.DataFrame(columns=summary_cols) # Use defined columns
-        except FileNotFoundError: # Should be caught by os.path.exists, but good practice
-             print(f"Warning: Summary file '{summary_filename}' not found. Starting with an empty summary.")
-             summary_df = pd.DataFrame(columns=summary_cols) # Use defined columns
-        except Exception as e:
-            print(f"Error reading existing summary file: {e}. Starting with an empty summary.")
-            summary_df = pd.DataFrame(columns=summary_cols) # Use defined columns
+    # The update stamp is the p element preceding the div with the specific class
+    stamp = source_stamp(html_content)
+    if stamp is not None:
+        extracted_value_truncated = stamp
+        print(f"Extracted and truncated value: {extracted_value_truncated}")
     else:
-        # If summary file doesn't exist, create an empty DataFrame with the correct columns
-        summary_df = pd.DataFrame(columns=summary_cols) # Use defined columns
-
-
-    # Prepare new data for merging - Ensure 'Date' is in datetime.date for consistent comparison later
-    new_data_for_merge = new_df[['ID', 'Nafn', 'Date']].copy()
-
-
-    # Combine existing summary data and new daily data for calculating min/max dates and retaining original Nafn
-    # We need to keep the 'Nafn' associated with the earliest date for each ID
-    # First, combine all data that has an ID and a valid Date, including existing summary and new data
-    combined_data_for_merge = pd.concat([
-        summary_df[['ID', 'Nafn', 'First appearance']].rename(columns={'First appearance': 'Date'}),
-        new_data_for_merge[['ID', 'Nafn', 'Date']]
-    ]).dropna(subset=['ID', 'Date'])
-
-    # Sort by ID and Date to easily find the first appearance and associated Nafn
-    combined_data_for_merge = combined_data_for_merge.sort_values(by=['ID', 'Date'])
-
-    # Group by ID to find the min and max dates and the Nafn from the earliest date
-    updated_summary_df = combined_data_for_merge.groupby('ID').agg(
-        First_appearance=('Date', 'min'),
-        Last_appearance=('Date', 'max'),
-        Nafn=('Nafn', 'first') # Get the Nafn associated with the earliest date
-    ).reset_index()
-
-    # Rename the columns to match the desired output
-    updated_summary_df = updated_summary_df.rename(columns={'First_appearance': 'First appearance', 'Last_appearance': 'Last appearance'})
-
-    # Select and reorder columns for the final summary DataFrame
-    summary_columns_order = ['Nafn', 'First appearance', 'Last appearance', 'ID']
-    updated_summary_df = updated_summary_df[summary_columns_order]
-
-
-    # Format date columns back to 'dd.mm.yyyy' format for saving
-    updated_summary_df['First appearance'] = updated_summary_df['First appearance'].apply(lambda x: x.strftime('%d.%m.%Y') if pd.notna(x) else '')
-    updated_summary_df['Last appearance'] = updated_summary_df['Last appearance'].apply(lambda x: x.strftime('%d.%m.%Y') if pd.notna(x) else '')
-
-    # Sort the DataFrame by the 'Nafn' column in ascending order
-    updated_summary_df = updated_summary_df.sort_values(by='Nafn', ascending=True)
-
-    # Save the updated summary data to taxi_licenses_summary.csv
-    updated_summary_df.to_csv(summary_filename, index=False)
-
-    print(f"Updated summary data successfully saved to {summary_filename}")
-
-    # Part (c): Save daily data to a dated file and move to year directory
-    daily_filename_temp = "taxi_licenses_daily_scrape_temp.csv" # Temporary filename for daily data
-    dated_filename = f"taxi_license_{current_date_yyyymmdd}.csv" # Desired dated filename
-    year_directory = f"./{current_year}"
-    dated_filepath = os.path.join(year_directory, dated_filename)
-
+        print("Target element with the specified class or previous p element not found.")
+
+    return extracted_value_truncated, build_license_batch(table_rows or [], extracted_value_truncated, current_date)
+
+
+# Function to collect the scraped table rows (header row first) into a LicenseBatch of the output columns
+def build_license_batch(rows, extracted_value_truncated, current_date):
+    batch = LicenseBatch(extracted_value_truncated, current_date)
+    if rows:
+        # Get the header row (first row)
+        header_names = list(rows[0])
+
+        # Find the index of each output column's header in the scraped header (-1 when it is missing)
+        scraped_col_indices = []
+        for output_col, scraped_header in OUTPUT_COLUMN_MAPPING.items():
+             try:
+                 scraped_col_indices.append(header_names.index(scraped_header))
+             except ValueError:
+                 print(f"Warning: Scraped header '{scraped_header}' not found in table headers.")
+                 scraped_col_indices.append(-1)
+
+        # Rows holding every mapped cell are read with one itemgetter call; shorter rows (or a missing
+        # header) get "" for the cells they lack
+        take = itemgetter(*scraped_col_indices) if min(scraped_col_indices) >= 0 else None
+        cells_needed = max(scraped_col_indices) + 1
+
+        # Process the data rows (starting from the second row)
+        for row_data in rows[1:]:
+            if take is not None and len(row_data) >= cells_needed:
+                nafn, kennitala, stod, stodvarnumer, forradamadur = take(row_data)
+            else:
+                nafn, kennitala, stod, stodvarnumer, forradamadur = (row_data[index] if 0 <= index < len(row_data) else "" for index in scraped_col_indices)
+
+            # Special handling for Kennitala padding
+            if len(kennitala) == 9:
+                kennitala = "0" + kennitala
+
+            batch.append(nafn, kennitala, stod, stodvarnumer, forradamadur)
+    return batch
+
+
+# Function to build the day's DataFrame from the parsed batch, with the license IDs and station categories.
+# The columns are taken from the batch as they are; 'Stöð' starts out as a categorical over the batch's codes.
+def build_license_frame(batch):
+    new_df = pd.DataFrame({
+        "Nafn": batch.names,
+        "Kennitala": batch.kennitolur,
+        "Stöð": pd.Categorical.from_codes(batch.station_codes, categories=batch.stations),
+        "Stöðvarnúmer": batch.station_numbers,
+        "Forráðamaður, ef lögaðili": batch.guardians,
+    })
+
+    # Generate the 'ID' column for the new data with column-wise string operations
+    new_df['ID'] = build_license_ids(new_df)
+
+    # Ensure 'Stöð' column is a string categorical with "nan" replaced by an empty string
+    new_df['Stöð'] = station_categories(new_df['Stöð'])
+    return new_df
+
+
+# Function to update the license summary
+# Each scraped (ID, Nafn) is upserted into the SQLite summary keyed by ID, so the merge costs O(new rows)
+# as long as the database is kept between runs (the workflow caches it; without it, the CSV is imported
+# first). taxi_licenses_summary.csv, the committed copy of the summary, is then rewritten from the database.
+def update_summary(new_df, current_date, db_filename=SUMMARY_DB_FILENAME, csv_filename=SUMMARY_CSV_FILENAME):
     try:
-        # Remove the 'ID' column before saving the daily data
-        new_df_no_id = new_df.drop(columns=['ID'])
-
-        # Save the new_df (daily scraped data without ID) to a temporary CSV file
-        new_df_no_id.to_csv(daily_filename_temp, index=False, encoding='utf-8')
-
-        # Create the year directory if it doesn't exist
-        if not os.path.exists(year_directory):
-            os.makedirs(year_directory)
-
-        # Move the daily data file
-        if os.path.exists(daily_filename_temp):
-            os.rename(daily_filename_temp, dated_filepath) # Use the correct source filename: daily_filename_temp
-            print(f"Renamed '{daily_filename_temp}' to '{dated_filename}' and moved to '{year_directory}'")
-        else:
-            print(f"Error: '{daily_filename_temp}' not found for renaming and moving.")
-
+        with open_summary_store(db_filename, csv_filename) as summary_store:
+            id_name_pairs = new_df[['ID', 'Nafn']].dropna(subset=['ID']).itertuples(index=False, name=None)
+            summary_store.record_day(id_name_pairs, current_date.isoformat())
+            summary_store.export_csv(csv_filename)
+            print(f"Updated summary data successfully saved to {csv_filename} ({summary_store.count()} license holders)")
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error updating summary database {db_filename}: {e}")
+
+
+# Function to record the daily data in the delta-encoded snapshot store
+# Only the rows added, removed or changed since the previous day are written (with a periodic full base).
+# Any day's full list can be rebuilt with: python taxi_snapshots.py export <yyyy-mm-dd> <file.csv>
+# `digest` (see table_digest) is kept with the day, so the next run can tell whether the list was republished.
+def record_snapshot(new_df, current_date_yyyymmdd, extracted_value_truncated, snapshot_directory=SNAPSHOT_DIRECTORY, digest=None):
+    try:
+        snapshot_store = SnapshotStore(snapshot_directory)
+        snapshot_rows = new_df[SNAPSHOT_ROW_COLUMNS].values.tolist() if not new_df.empty else []
+        snapshot_kind = snapshot_store.record(current_date_yyyymmdd, extracted_value_truncated, snapshot_rows, digest)
+        print(f"Daily data for {current_date_yyyymmdd} successfully stored in '{snapshot_directory}' as {snapshot_kind}")
     except Exception as e:
-        print(f"An error occurred during daily file saving/moving: {e}")
+        print(f"An error occurred while storing the daily snapshot: {e}")
+
+
+# Function to run the whole job. Each stage's time, memory and row count is appended to the metrics log
+# (see pipeline_metrics.py). runner.py passes a deadline and a process pool, which runs the parse stage.
+# Returns the run's status.
+def main(deadline=None, executor=None):
+    with RunMetrics('taxi', deadline=deadline, executor=executor) as metrics:
+        # Part (a): Web scraping and preparing new daily data
+        url = LICENSES_URL
+        with metrics.stage('fetch') as stage:
+            response = fetch(url)
+            stage['bytes'] = len(response.content)
+
+        # Get the current date
+        current_date = datetime.now().date() # Use date() for date comparison
+        # Get the current date in yyyy-mm-dd format for filename and directory
+        current_date_yyyymmdd = datetime.now().strftime("%Y-%m-%d")
+
+        # Check if the request was successful
+        if response.status_code == 200:
+            html_content = page_text(response)
+            # Nights when Samgöngustofa has not republished the list end here, without parsing the table
+            with metrics.stage('check'):
+                digest = table_digest(html_content)
+                unchanged = record_unchanged_day(source_stamp(html_content), digest, current_date)
+            if unchanged:
+                metrics.status = 'unchanged'
+                return metrics.status
+
+            with metrics.stage('parse') as stage:
+                extracted_value_truncated, batch = metrics.offload(parse_licenses, html_content, current_date)
+                stage['rows'] = len(batch)
+            if not len(batch):
+                # A page without license rows is a broken page, not an empty list: keep the previous day as it is
+                print(f"No license rows found on {url}. Nothing recorded.")
+                metrics.status = 'failed'
+                return metrics.status
+            with metrics.stage('transform') as stage:
+                new_df = build_license_frame(batch)
+                stage['rows'] = len(new_df)
+
+            # Part (b): Update the license summary
+            with metrics.stage('merge') as stage:
+                update_summary(new_df, current_date)
+                stage['rows'] = len(new_df)
+
+            # Part (c): Record the daily data in the delta-encoded snapshot store
+            with metrics.stage('write') as stage:
+                record_snapshot(new_df, current_date_yyyymmdd, extracted_value_truncated, digest=digest)
+                stage['rows'] = len(new_df)
+        else:
+            print(f"Failed to retrieve data from {url}. Status code: {response.status_code}")
+            metrics.status = 'failed'
+    return metrics.status
 
 
-else:
-    print(f"Failed to retrieve data from {url}. Status code: {response.status_code}")
+if __name__ == '__main__':
+    # --profile[=lines,memory] runs the job under the profilers of pipeline_profile.py
+    if any(argument.startswith('--profile') for argument in sys.argv[1:]):
+        from pipeline_profile import run_profiled, profile_options
+        run_profiled('taxi', main, profile_options(sys.argv[1:]))
+    else:
+        main()
@@ -0,0 +1,199 @@
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from taxi_records import license_id
+from taxi_snapshots import SnapshotStore, SNAPSHOT_DIRECTORY
+
+# Point-in-time and range queries over the taxi license history.
+# Every license ID is turned into presence spans: runs of consecutive recorded days on which the ID
+# was listed. A recorded day without the ID ends the span, so a license that lapsed and came back
+# has several spans. Days without a scrape do not break a span. The spans are held in a static
+# centered interval tree, so "who was active on X" costs O(log n + k) instead of a scan over every day.
+
+
+# Function to turn per-day ID sets into presence spans {ID: [(first ordinal, last ordinal), ...]}.
+# `daily_ids` yields (ISO date, iterable of IDs) in date order.
+def presence_spans(daily_ids):
+    spans = {}
+    open_spans = {}  # ID -> first ordinal of the span that is still running
+    previous_day = None
+    for day, ids in daily_ids:
+        ordinal = date.fromisoformat(day).toordinal()
+        ids = set(ids)
+        for holder_id in [i for i in open_spans if i not in ids]:
+            spans.setdefault(holder_id, []).append((open_spans.pop(holder_id), previous_day))
+        for holder_id in ids:
+            open_spans.setdefault(holder_id, ordinal)
+        previous_day = ordinal
+    for holder_id, start in open_spans.items():
+        spans.setdefault(holder_id, []).append((start, previous_day))
+    for holder_id in spans:
+        spans[holder_id].sort()
+    return spans
+
+
+class IntervalTree:
+    # Static centered interval tree over (start, end, value) tuples with inclusive integer bounds
+    def __init__(self, intervals):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = points[len(points) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        # Node layout: [center, by start ascending, by end descending, left child, right child]
+        return [center,
+                sorted(here, key=lambda interval: interval[0]),
+                sorted(here, key=lambda interval: interval[1], reverse=True),
+                self._build(left),
+                self._build(right)]
+
+    # Function to get the values of every interval containing `point`
+    def at(self, point):
+        found = []
+        node = self.root
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if point < center:
+                for start, end, value in by_start:
+                    if start > point:
+                        break
+                    found.append(value)
+                node = left
+            elif point > center:
+                for start, end, value in by_end:
+                    if end < point:
+                        break
+                    found.append(value)
+                node = right
+            else:
+                found.extend(value for _, _, value in by_start)
+                break
+        return found
+
+    # Function to get the values of every interval overlapping [low, high]
+    def overlapping(self, low, high):
+        found = []
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if high < center:
+                for start, end, value in by_start:
+                    if start > high:
+                        break
+                    found.append(value)
+            elif low > center:
+                for start, end, value in by_end:
+                    if end < low:
+                        break
+                    found.append(value)
+            else:
+                found.extend(value for _, _, value in by_start)
+            if low < center:
+                pending.append(left)
+            if high > center:
+                pending.append(right)
+        return found
+
+
+class LicenseHistory:
+    def __init__(self, spans, names=None):
+        self.spans = spans
+        self.names = names or {}
+        self.tree = IntervalTree((start, end, holder_id) for holder_id, id_spans in spans.items() for start, end in id_spans)
+        # Sorted span bounds answer "how many were active" with two binary searches
+        self.starts = sorted(start for id_spans in spans.values() for start, _ in id_spans)
+        self.ends = sorted(end for id_spans in spans.values() for _, end in id_spans)
+
+    # Function to build the history from the delta-encoded daily snapshots
+    @classmethod
+    def from_snapshots(cls, store=None):
+        store = store or SnapshotStore(SNAPSHOT_DIRECTORY)
+        names = {}
+
+        def daily_ids():
+            for day, rows in store.iter_days():
+                ids = []
+                for row in rows:
+                    row_id = license_id(row)
+                    names.setdefault(row_id, row[0])
+                    ids.append(row_id)
+                yield day, ids
+
+        spans = presence_spans(daily_ids())
+        return cls(spans, names)
+
+    # Function to list the IDs holding a license on a date (ISO string or date).
+    # An ID's spans never overlap, so each active ID is found once.
+    def active_on(self, day):
+        return sorted(self.tree.at(to_ordinal(day)))
+
+    # Function to count the licenses active on a date without listing them
+    def count_active_on(self, day):
+        ordinal = to_ordinal(day)
+        return bisect_right(self.starts, ordinal) - bisect_left(self.ends, ordinal)
+
+    # Function to list the IDs holding a license at any time between two dates (inclusive)
+    def active_between(self, first_day, last_day):
+        return sorted(set(self.tree.overlapping(to_ordinal(first_day), to_ordinal(last_day))))
+
+    # Function to compare two dates: (IDs that left, IDs that joined)
+    def churn(self, first_day, last_day):
+        before = set(self.tree.at(to_ordinal(first_day)))
+        after = set(self.tree.at(to_ordinal(last_day)))
+        return sorted(before - after), sorted(after - before)
+
+    # Function to get an ID's presence spans as (first ISO date, last ISO date) pairs
+    def spans_of(self, holder_id):
+        return [(date.fromordinal(start).isoformat(), date.fromordinal(end).isoformat()) for start, end in self.spans.get(holder_id, [])]
+
+
+# Function to convert an ISO date string or a date to its ordinal
+def to_ordinal(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+if __name__ == '__main__':
+    # python taxi_history.py active 2025-10-31
+    # python taxi_history.py between 2025-10-01 2025-10-31
+    # python taxi_history.py churn 2025-10-30 2025-11-01
+    # python taxi_history.py spans "AAA þjónusta ehf. - Hreyfill svf. - 479"
+    history = LicenseHistory.from_snapshots()
+    command = sys.argv[1] if len(sys.argv) >= 2 else None
+    if command == 'active' and len(sys.argv) >= 3:
+        active = history.active_on(sys.argv[2])
+        for holder_id in active:
+            print(holder_id)
+        print(f"{history.count_active_on(sys.argv[2])} licenses active on {sys.argv[2]}")
+    elif command == 'between' and len(sys.argv) >= 4:
+        active = history.active_between(sys.argv[2], sys.argv[3])
+        for holder_id in active:
+            print(holder_id)
+        print(f"{len(active)} licenses active between {sys.argv[2]} and {sys.argv[3]}")
+    elif command == 'churn' and len(sys.argv) >= 4:
+        left, joined = history.churn(sys.argv[2], sys.argv[3])
+        for holder_id in left:
+            print(f"- {holder_id}")
+        for holder_id in joined:
+            print(f"+ {holder_id}")
+        print(f"{len(left)} left, {len(joined)} joined between {sys.argv[2]} and {sys.argv[3]}")
+    elif command == 'spans' and len(sys.argv) >= 3:
+        for first_day, last_day in history.spans_of(sys.argv[2]):
+            print(f"{first_day} - {last_day}")
+    else:
+        print(f"{len(history.spans)} license IDs, {sum(len(s) for s in history.spans.values())} presence spans")
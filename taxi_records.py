@@ -0,0 +1,85 @@
+from array import array
+from typing import NamedTuple
+
+
+class LicenseRecord(NamedTuple):
+    # One scraped license row, in the order of taxi_snapshots.ROW_COLUMNS
+    # ("Nafn", "Kennitala", "Stöð", "Stöðvarnúmer", "Forráðamaður, ef lögaðili")
+    nafn: str
+    kennitala: str
+    stod: str
+    stodvarnumer: str
+    forradamadur: str
+
+
+class LicenseBatch:
+    # One day's scraped license rows, column by column. Rows are appended straight into the columns;
+    # 'Stöð' (a handful of stations) is kept as an array of integer codes into `stations`, and the
+    # "Uppfært af Samgöngustofu" stamp and the date are held once for the whole batch.
+    __slots__ = ('uppfaert', 'date', 'names', 'kennitolur', 'station_codes', 'stations', 'station_numbers', 'guardians', '_station_codes_by_name')
+
+    def __init__(self, uppfaert, date):
+        self.uppfaert = uppfaert
+        self.date = date
+        self.names = []
+        self.kennitolur = []
+        self.station_codes = array('I')
+        self.stations = []
+        self.station_numbers = []
+        self.guardians = []
+        self._station_codes_by_name = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    # Function to add one row
+    def append(self, nafn, kennitala, stod, stodvarnumer, forradamadur):
+        code = self._station_codes_by_name.get(stod)
+        if code is None:
+            code = self._station_codes_by_name[stod] = len(self.stations)
+            self.stations.append(stod)
+        self.names.append(nafn)
+        self.kennitolur.append(kennitala)
+        self.station_codes.append(code)
+        self.station_numbers.append(stodvarnumer)
+        self.guardians.append(forradamadur)
+
+    # Function to get one row as a record
+    def __getitem__(self, index):
+        return LicenseRecord(self.names[index], self.kennitolur[index], self.stations[self.station_codes[index]],
+                             self.station_numbers[index], self.guardians[index])
+
+    def __iter__(self):
+        stations = self.stations
+        for nafn, kennitala, code, stodvarnumer, forradamadur in zip(self.names, self.kennitolur, self.station_codes, self.station_numbers, self.guardians):
+            yield LicenseRecord(nafn, kennitala, stations[code], stodvarnumer, forradamadur)
+
+
+# Function to build the license 'ID' column ("Nafn - Stöð - Stöðvarnúmer") with column-wise string operations.
+# Missing, blank or "nan" parts are left out and every ".0" is removed from a part, as the row-wise
+# version did. Works on plain string and categorical columns.
+def build_license_ids(df):
+    ids = df['Nafn'].astype(str)
+    for col in ['Stöð', 'Stöðvarnúmer']:
+        text = df[col].astype(str)
+        present = df[col].notna() & (text.str.strip() != '') & (text.str.lower() != 'nan')
+        ids = ids.where(~present, ids + ' - ' + text.str.replace('.0', '', regex=False))
+    return ids.astype(object)
+
+
+# Function to clean the 'Stöð' column ("nan" and trailing ".0" removed) and store it as a categorical;
+# there are only a handful of stations, so each row holds a small integer code instead of a string
+def station_categories(stations):
+    cleaned = stations.astype(str).replace(r'\.0$', '', regex=True).replace('nan', '')
+    return cleaned.astype('category')
+
+
+# Function to build the license ID of a single row (Nafn, Kennitala, Stöð, Stöðvarnúmer, ...),
+# with the same rules as build_license_ids, for rows read back from the snapshot store
+def license_id(row):
+    id_parts = [str(row[0])]
+    for value in (row[2], row[3]):
+        text = str(value)
+        if text.strip() != '' and text.lower() != 'nan':
+            id_parts.append(text.replace('.0', ''))
+    return " - ".join(id_parts)
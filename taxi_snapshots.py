@@ -0,0 +1,247 @@
+import csv
+import json
+import os
+import sys
+from datetime import date
+from difflib import SequenceMatcher
+
+# Delta-encoded store for the daily taxi license snapshots.
+# A full base snapshot is written periodically; every other day only records the rows that were
+# added, removed or changed since the previous day. The per-day "Uppfært af Samgöngustofu" stamp
+# and the date are kept once in the manifest instead of on every row, with a digest of the page's table.
+# A day on which the list was not republished (same stamp and digest as the previous day) is recorded
+# as 'same': a manifest entry without a file, read back as the previous day's rows.
+SNAPSHOT_DIRECTORY = "taxi_snapshots"
+MANIFEST_FILENAME = "manifest.json"
+BASE_INTERVAL_DAYS = 30
+
+ROW_COLUMNS = ["Nafn", "Kennitala", "Stöð", "Stöðvarnúmer", "Forráðamaður, ef lögaðili"]
+SNAPSHOT_COLUMNS = ROW_COLUMNS + ["Uppfært af Samgöngustofu", "Date"]
+DELTA_COLUMNS = ["op", "old index", "new index"] + ROW_COLUMNS
+
+
+# Function to get the key identifying a license row across days (the same fields as the ID)
+def row_key(row):
+    return (row[0], row[2], row[3])
+
+
+# Function to compute the delta between two days as (op, old index, new index, row) tuples.
+# Rows are matched in order, so applying the delta reproduces the new day's row order exactly.
+# Returns None when the days differ too much for a delta to be worthwhile.
+def diff_rows(old_rows, new_rows):
+    delta = []
+    matcher = SequenceMatcher(None, old_rows, new_rows, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        old_block, new_block = old_rows[i1:i2], new_rows[j1:j2]
+        if tag == 'replace' and len(old_block) == len(new_block) and all(row_key(a) == row_key(b) for a, b in zip(old_block, new_block)):
+            delta.extend(('changed', i1 + k, j1 + k, row) for k, row in enumerate(new_block))
+            continue
+        delta.extend(('removed', i1 + k, '', row) for k, row in enumerate(old_block))
+        delta.extend(('added', '', j1 + k, row) for k, row in enumerate(new_block))
+    if len(delta) > max(len(new_rows), 1) // 2:
+        return None
+    return delta
+
+
+# Function to apply a delta produced by diff_rows to the previous day's rows
+def apply_delta(old_rows, delta):
+    removed = set()
+    changed = {}
+    added = []
+    for op, old_index, new_index, row in delta:
+        if op == 'removed':
+            removed.add(int(old_index))
+        elif op == 'changed':
+            changed[int(old_index)] = row
+        elif op == 'added':
+            added.append((int(new_index), row))
+    rows = [changed.get(index, row) for index, row in enumerate(old_rows) if index not in removed]
+    for new_index, row in sorted(added):
+        rows.insert(new_index, row)
+    return rows
+
+
+class SnapshotStore:
+    def __init__(self, directory=SNAPSHOT_DIRECTORY):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        self.days = {}  # ISO date -> manifest entry
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.days = {entry['date']: entry for entry in json.load(f)['days']}
+        self._cache = (None, None)  # (ISO date, rows) of the last reconstructed day
+
+    def dates(self):
+        return sorted(self.days)
+
+    def save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'days': [self.days[day] for day in self.dates()]}, f, ensure_ascii=False, indent=1)
+            f.write('\n')
+        os.replace(temp_path, self.manifest_path)
+
+    # Function to get the manifest entry of the last recorded date (None when nothing is recorded)
+    def latest(self):
+        return self.days[self.dates()[-1]] if self.days else None
+
+    # Function to reconstruct the license rows (ROW_COLUMNS) of a recorded date
+    def rows_on(self, day):
+        day = str(day)
+        if day not in self.days:
+            raise KeyError(f"No taxi license snapshot recorded for {day}")
+        if self._cache[0] == day:
+            return list(self._cache[1])
+
+        # Walk back to the nearest base, then replay the deltas forward
+        chain = []
+        for candidate in reversed([d for d in self.dates() if d <= day]):
+            chain.append(self.days[candidate])
+            if self.days[candidate]['kind'] == 'base':
+                break
+        chain.reverse()
+        if not chain or chain[0]['kind'] != 'base':
+            raise KeyError(f"No base snapshot found before {day}")
+
+        rows = self._read_rows(chain[0]['file'])
+        for entry in chain[1:]:
+            if entry['kind'] == 'delta':
+                rows = apply_delta(rows, self._read_delta(entry['file']))
+        self._cache = (day, rows)
+        return list(rows)
+
+    # Function to yield (ISO date, rows) for every recorded date in order, applying each delta once
+    def iter_days(self):
+        rows = None
+        for day in self.dates():
+            entry = self.days[day]
+            if entry['kind'] == 'base':
+                rows = self._read_rows(entry['file'])
+            elif rows is None:
+                raise KeyError(f"No base snapshot found before {day}")
+            elif entry['kind'] == 'delta':
+                rows = apply_delta(rows, self._read_delta(entry['file']))
+            yield day, rows
+
+    # Function to get a recorded date's snapshot in the daily CSV layout (SNAPSHOT_COLUMNS)
+    def snapshot_on(self, day):
+        entry = self.days[str(day)]
+        return [list(row) + [entry['uppfaert'], entry['date']] for row in self.rows_on(day)]
+
+    # Function to write a recorded date's snapshot as the daily CSV the scraper used to write
+    def export_csv(self, day, csv_filename):
+        with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\n')
+            writer.writerow(SNAPSHOT_COLUMNS)
+            writer.writerows(self.snapshot_on(day))
+
+    # Function to record one day's rows, as a delta against the previous recorded day when possible.
+    # `digest` identifies the page's table that day, so an unchanged table can be recorded with record_unchanged().
+    def record(self, day, uppfaert, rows, digest=None):
+        day = str(day)
+        rows = [tuple(str(value) for value in row) for row in rows]
+        earlier = [d for d in self.dates() if d < day]
+        if any(d > day for d in self.dates()):
+            raise ValueError(f"Cannot record {day}: later days are already stored as deltas")
+
+        kind, delta = 'base', None
+        if earlier:
+            last_base = max(d for d in earlier if self.days[d]['kind'] == 'base')
+            if (date.fromisoformat(day) - date.fromisoformat(last_base)).days < BASE_INTERVAL_DAYS:
+                delta = diff_rows(self.rows_on(earlier[-1]), rows)
+                if delta is not None:
+                    kind = 'delta'
+
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{kind}_{day}.csv"
+        for old_kind in ('base', 'delta'):
+            old_path = os.path.join(self.directory, f"{old_kind}_{day}.csv")
+            if old_kind != kind and os.path.exists(old_path):
+                os.remove(old_path)
+        with open(os.path.join(self.directory, filename), 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\n')
+            if kind == 'base':
+                writer.writerow(ROW_COLUMNS)
+                writer.writerows(rows)
+            else:
+                writer.writerow(DELTA_COLUMNS)
+                writer.writerows([op, old_index, new_index] + list(row) for op, old_index, new_index, row in delta)
+
+        self.days[day] = {'date': day, 'kind': kind, 'file': filename, 'uppfaert': uppfaert, 'rows': len(rows)}
+        if digest is not None:
+            self.days[day]['digest'] = digest
+        self.save_manifest()
+        self._cache = (day, rows)
+        return kind
+
+    # Function to record that a day's list is the previous recorded day's, unchanged: a manifest entry
+    # only, without reading or writing any rows
+    def record_unchanged(self, day, uppfaert, digest=None):
+        day = str(day)
+        if any(d >= day for d in self.dates()):
+            raise ValueError(f"Cannot record {day} as unchanged: it is not after the last recorded day")
+        previous = self.latest()
+        if previous is None:
+            raise ValueError(f"Cannot record {day} as unchanged: no earlier day is recorded")
+        self.days[day] = {'date': day, 'kind': 'same', 'file': None, 'uppfaert': uppfaert, 'rows': previous['rows']}
+        if digest is not None:
+            self.days[day]['digest'] = digest
+        self.save_manifest()
+        return 'same'
+
+    def _read_rows(self, filename):
+        with open(os.path.join(self.directory, filename), 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            return [tuple(row) for row in reader]
+
+    def _read_delta(self, filename):
+        return [(op, old_index, new_index, tuple(row)) for op, old_index, new_index, *row in self._read_rows(filename)]
+
+
+# Function to move existing dated snapshot files (e.g. 2025/taxi_license_2025-10-30.csv) into the store.
+# Each file is only removed after its reconstruction from the store matched it byte for byte.
+def migrate_daily_files(source_directories, store, remove_originals=True):
+    paths = []
+    for source_directory in source_directories:
+        for filename in os.listdir(source_directory):
+            if filename.startswith('taxi_license_') and filename.endswith('.csv'):
+                paths.append(os.path.join(source_directory, filename))
+
+    for path in sorted(paths, key=os.path.basename):
+        with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+            records = list(csv.reader(csvfile))
+        header, body = records[0], records[1:]
+        if header != SNAPSHOT_COLUMNS:
+            print(f"Skipping {path}: unexpected header {header}")
+            continue
+        day = body[0][6] if body else os.path.basename(path)[len('taxi_license_'):-len('.csv')]
+        uppfaert = body[0][5] if body else ''
+        kind = store.record(day, uppfaert, [row[:5] for row in body])
+
+        check_path = path + '.check'
+        store.export_csv(day, check_path)
+        with open(path, 'rb') as original, open(check_path, 'rb') as rebuilt:
+            identical = original.read() == rebuilt.read()
+        os.remove(check_path)
+        if identical and remove_originals:
+            os.remove(path)
+        print(f"{path}: stored as {kind}{'' if identical else ' (reconstruction differs, original kept)'}")
+
+
+if __name__ == '__main__':
+    # python taxi_snapshots.py migrate 2025 [2026 ...]
+    # python taxi_snapshots.py export 2025-11-01 taxi_license_2025-11-01.csv
+    store = SnapshotStore()
+    if len(sys.argv) >= 3 and sys.argv[1] == 'migrate':
+        migrate_daily_files(sys.argv[2:], store)
+    elif len(sys.argv) >= 4 and sys.argv[1] == 'export':
+        store.export_csv(sys.argv[2], sys.argv[3])
+        print(f"Exported {sys.argv[2]} to {sys.argv[3]}.")
+    else:
+        for day in store.dates():
+            entry = store.days[day]
+            print(f"{day} {entry['kind']:<5} {entry['rows']:>5} rows  {entry['uppfaert']}")
@@ -0,0 +1,151 @@
+import csv
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Summary of taxi license holders kept in a local SQLite table keyed by ID, so the daily merge is one
+# upsert per scraped row instead of re-reading and merging the whole summary CSV.
+# taxi_licenses_summary.csv is the committed source of truth; the database is a working copy of it (not
+# committed; the daily workflow keeps it in the Actions cache). It is rebuilt from the CSV when it is
+# missing, and reloaded from the CSV whenever the CSV's content differs from what the store last
+# imported or exported (e.g. a pull of the daily workflow's commit, or a database from an older cache).
+SUMMARY_DB_FILENAME = "taxi_licenses_summary.sqlite"
+SUMMARY_CSV_FILENAME = "taxi_licenses_summary.csv"
+SUMMARY_CSV_HEADER = ['Nafn', 'First appearance', 'Last appearance', 'ID']
+CSV_DATE_FORMAT = '%d.%m.%Y'
+DOTTED_DATE_SQL = "substr({column}, 9, 2) || '.' || substr({column}, 6, 2) || '.' || substr({column}, 1, 4)"
+UPSERT_SQL = (
+    "INSERT INTO license_summary (id, nafn, first_appearance, last_appearance) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    "nafn = CASE WHEN excluded.first_appearance < first_appearance THEN excluded.nafn ELSE nafn END, "
+    "first_appearance = min(first_appearance, excluded.first_appearance), "
+    "last_appearance = max(last_appearance, excluded.last_appearance)"
+)
+
+
+class LicenseSummaryStore:
+    def __init__(self, db_filename=SUMMARY_DB_FILENAME):
+        self.db_filename = db_filename
+        self.connection = sqlite3.connect(db_filename)
+        # Dates are stored as ISO strings so min/max compare correctly
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS license_summary ("
+            "id TEXT PRIMARY KEY, "
+            "nafn TEXT NOT NULL, "
+            "first_appearance TEXT NOT NULL, "
+            "last_appearance TEXT NOT NULL)"
+        )
+        # The digest of the CSV's content as of the last import or export
+        self.connection.execute("CREATE TABLE IF NOT EXISTS csv_source (csv_filename TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Function to tell whether the CSV differs from the one the store last imported or exported
+    def csv_changed(self, csv_filename=SUMMARY_CSV_FILENAME):
+        row = self.connection.execute("SELECT digest FROM csv_source WHERE csv_filename = ?", (os.path.basename(csv_filename),)).fetchone()
+        return row is None or row[0] != csv_digest(csv_filename)
+
+    def mark_csv_synced(self, csv_filename=SUMMARY_CSV_FILENAME):
+        with self.connection:
+            self.record_csv_digest(csv_filename)
+
+    def record_csv_digest(self, csv_filename):
+        self.connection.execute("INSERT OR REPLACE INTO csv_source (csv_filename, digest) VALUES (?, ?)",
+                                (os.path.basename(csv_filename), csv_digest(csv_filename)))
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM license_summary").fetchone()[0]
+
+    # Function to record that each (ID, Nafn) was seen on the given dates.
+    # `rows` yields (ID, Nafn, first date, last date) with ISO dates; first and last are usually the same day.
+    # The Nafn kept for an ID is the one from its earliest appearance.
+    def upsert(self, rows):
+        with self.connection:
+            self.connection.executemany(UPSERT_SQL, rows)
+
+    # Function to record one day's scrape: (ID, Nafn) pairs seen on an ISO date
+    def record_day(self, id_name_pairs, date_iso):
+        self.upsert((license_id, nafn, date_iso, date_iso) for license_id, nafn in id_name_pairs)
+
+    # Function to carry a day's scrape over to a later day with the same list: every license holder last
+    # seen on `previous_iso` is also seen on `date_iso`. Returns the number of holders updated.
+    def repeat_day(self, previous_iso, date_iso):
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE license_summary SET last_appearance = ? WHERE last_appearance = ?", (date_iso, previous_iso))
+        return cursor.rowcount
+
+    # Function to replace the store's contents with a summary CSV (dd.mm.yyyy dates), in one transaction,
+    # so rows deleted or corrected in the CSV are deleted or corrected in the store too
+    def import_csv(self, csv_filename=SUMMARY_CSV_FILENAME):
+        rows = []
+        with open(csv_filename, 'r', newline='', encoding='utf-8') as csvfile:
+            for record in csv.DictReader(csvfile):
+                try:
+                    first = datetime.strptime(record['First appearance'], CSV_DATE_FORMAT).date().isoformat()
+                    last = datetime.strptime(record['Last appearance'], CSV_DATE_FORMAT).date().isoformat()
+                except (ValueError, TypeError):
+                    print(f"Skipping summary row with unreadable dates: {record}")
+                    continue
+                if record.get('ID'):
+                    rows.append((record['ID'], record['Nafn'], first, last))
+        with self.connection:
+            self.connection.execute("DELETE FROM license_summary")
+            self.connection.executemany(UPSERT_SQL, rows)
+            self.record_csv_digest(csv_filename)
+        return len(rows)
+
+    # Function to write the summary CSV in its usual layout, sorted by Nafn
+    def export_csv(self, csv_filename=SUMMARY_CSV_FILENAME):
+        # Dates are reformatted from yyyy-mm-dd to dd.mm.yyyy column-wise inside the query
+        cursor = self.connection.execute(
+            "SELECT nafn, "
+            f"{DOTTED_DATE_SQL.format(column='first_appearance')}, "
+            f"{DOTTED_DATE_SQL.format(column='last_appearance')}, "
+            "id FROM license_summary ORDER BY nafn, id"
+        )
+        temp_filename = csv_filename + ".tmp"
+        with open(temp_filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\n')
+            writer.writerow(SUMMARY_CSV_HEADER)
+            writer.writerows(cursor)
+        os.replace(temp_filename, csv_filename)
+        self.mark_csv_synced(csv_filename)
+
+
+# Function to identify a version of the CSV file by its content (a checkout resets modification times)
+def csv_digest(csv_filename):
+    with open(csv_filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Function to open the store, loading the summary CSV into it when the database is new or the CSV changed
+# since the store last read or wrote it (the CSV's rows replace the store's).
+def open_summary_store(db_filename=SUMMARY_DB_FILENAME, csv_filename=SUMMARY_CSV_FILENAME):
+    store = LicenseSummaryStore(db_filename)
+    if os.path.exists(csv_filename) and os.stat(csv_filename).st_size > 0 and store.csv_changed(csv_filename):
+        imported = store.import_csv(csv_filename)
+        print(f"Imported {imported} rows from {csv_filename} into {db_filename}.")
+    return store
+
+
+if __name__ == '__main__':
+    # python taxi_summary.py export [taxi_licenses_summary.csv]
+    if len(sys.argv) >= 2 and sys.argv[1] == 'export':
+        csv_filename = sys.argv[2] if len(sys.argv) >= 3 else SUMMARY_CSV_FILENAME
+        with open_summary_store() as store:
+            store.export_csv(csv_filename)
+            print(f"Exported {store.count()} rows to {csv_filename}.")
+    else:
+        with open_summary_store() as store:
+            print(f"{SUMMARY_DB_FILENAME}: {store.count()} license holders")